@@ -0,0 +1,55 @@
+"""
+Password hashers whose cost comes from settings.
+
+They keep Django's algorithm names, so existing hashes keep verifying.
+Because ``must_update`` compares the stored parameters with the configured
+ones, changing ``PASSWORD_HASH_POLICY`` or a cost setting rehashes each
+password on that user's next successful login. ``PASSWORD_HASHERS`` lists
+the selected policy first.
+"""
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    def __init__(self):
+        self.iterations = settings.PASSWORD_PBKDF2_ITERATIONS
+
+
+class ScryptPasswordHasher(hashers.ScryptPasswordHasher):
+    def __init__(self):
+        self.work_factor = settings.PASSWORD_SCRYPT_WORK_FACTOR
+        self.block_size = settings.PASSWORD_SCRYPT_BLOCK_SIZE
+        self.parallelism = settings.PASSWORD_SCRYPT_PARALLELISM
+        self.maxmem = max_scrypt_memory(self.work_factor, self.block_size, self.parallelism)
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    def __init__(self):
+        self.time_cost = settings.PASSWORD_ARGON2_TIME_COST
+        self.memory_cost = settings.PASSWORD_ARGON2_MEMORY_COST
+        self.parallelism = settings.PASSWORD_ARGON2_PARALLELISM
+
+
+POLICIES = {
+    "pbkdf2": PBKDF2PasswordHasher,
+    "scrypt": ScryptPasswordHasher,
+    "argon2": Argon2PasswordHasher,
+}
+
+
+def max_scrypt_memory(work_factor, block_size, parallelism):
+    # OpenSSL refuses to use more than ``maxmem`` (32 MiB by default), which
+    # larger costs need. It is only a ceiling; leave room for verifying hashes
+    # made under a costlier policy than the current one
+    return max(2 * 128 * work_factor * block_size * parallelism, 256 * 1024 * 1024)
+
+
+@receiver(setting_changed)
+def _reset_hashers(setting, **kwargs):
+    # Django only resets its hasher cache for PASSWORD_HASHERS; costs are read at init
+    if setting.startswith("PASSWORD_"):
+        hashers.get_hashers.cache_clear()
+        hashers.get_hashers_by_algorithm.cache_clear()
@@ -0,0 +1,112 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.contrib.auth.hashers import get_hashers
+from django.core.management.base import BaseCommand
+
+from accounts.hashers import POLICIES, max_scrypt_memory
+from techbridge.benchmarks import format_timings
+
+PASSWORD = "correct horse battery staple"
+
+# Common starting points; Django's defaults are the second of each pair
+CANDIDATES = [
+    ("pbkdf2", {"iterations": 600000}),
+    ("pbkdf2", {"iterations": 1000000}),
+    ("scrypt", {"work_factor": 2 ** 14, "block_size": 8, "parallelism": 1}),
+    ("scrypt", {"work_factor": 2 ** 14, "block_size": 32, "parallelism": 1}),
+    ("argon2", {"time_cost": 2, "memory_cost": 19456, "parallelism": 1}),
+    ("argon2", {"time_cost": 2, "memory_cost": 102400, "parallelism": 8}),
+]
+
+
+def _verify(hasher, encoded, rounds):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        hasher.verify(PASSWORD, encoded)
+    return time.perf_counter() - started
+
+
+def _memory(policy, params):
+    if policy == "scrypt":
+        return 128 * params["work_factor"] * params["block_size"] * params["parallelism"]
+    if policy == "argon2":
+        return params["memory_cost"] * 1024
+    return 0
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure password verification cost (one login) per hashing policy: latency "
+        "and logins/s on one core, and throughput with every core busy."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rounds", type=int, default=10, help="Verifications per measurement")
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=os.cpu_count(),
+            help="Parallel processes for the all-cores measurement"
+        )
+        parser.add_argument(
+            "--configured-only",
+            action="store_true",
+            help="Only measure the hasher selected by the settings"
+        )
+
+    def handle(self, *args, **options):
+        configured = get_hashers()[0]
+        runs = [("configured", configured, self._params(configured))]
+        if not options["configured_only"]:
+            for policy, params in CANDIDATES:
+                runs.append((policy, self._build(policy, params), params))
+
+        self.stdout.write(
+            f"{options['rounds']} verifications per row, {options['processes']} processes for the "
+            "all-cores column\n"
+        )
+        for label, hasher, params in runs:
+            self._measure(label, hasher, params, options["rounds"], options["processes"])
+
+    @staticmethod
+    def _params(hasher):
+        names = ("iterations", "work_factor", "block_size", "parallelism", "time_cost", "memory_cost")
+        return {name: getattr(hasher, name) for name in names if hasattr(hasher, name)}
+
+    @staticmethod
+    def _build(policy, params):
+        hasher = POLICIES[policy]()
+        for name, value in params.items():
+            setattr(hasher, name, value)
+        if policy == "scrypt":
+            hasher.maxmem = max_scrypt_memory(params["work_factor"], params["block_size"], params["parallelism"])
+        return hasher
+
+    def _measure(self, label, hasher, params, rounds, processes):
+        description = " ".join(f"{name}={value}" for name, value in params.items())
+        try:
+            encoded = hasher.encode(PASSWORD, hasher.salt())
+        except ValueError as e:
+            # e.g. argon2-cffi not installed
+            self.stdout.write(f"{label:<10} {hasher.algorithm:<14} {description}\n    skipped: {str(e)}")
+            return
+
+        timings = []
+        for _ in range(rounds):
+            timings.append(_verify(hasher, encoded, 1))
+        per_core = rounds / sum(timings)
+
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            started = time.perf_counter()
+            list(pool.map(_verify, [hasher] * processes, [encoded] * processes, [rounds] * processes))
+            all_cores = processes * rounds / (time.perf_counter() - started)
+
+        memory = _memory(hasher.algorithm, {**params, **self._params(hasher)})
+        self.stdout.write(f"{label:<10} {hasher.algorithm:<14} {description}")
+        self.stdout.write(
+            f"    {format_timings(timings)}\n"
+            f"    {per_core:.1f} logins/s on one core, {all_cores:.1f} logins/s on {processes} processes"
+            + (f", {memory / 1024 / 1024:.0f} MiB per verification" if memory else "")
+        )
@@ -48,7 +48,7 @@ class User(AbstractBaseUser, PermissionsMixin):
     is_staff = models.BooleanField(default=False)
     is_working = models.BooleanField(default=False)  # For freelancers
     date_joined = models.DateTimeField(auto_now_add=True)
-    last_login = models.DateTimeField(auto_now=True)
+    last_login = models.DateTimeField(blank=True, null=True)
 
     objects = UserManager()
 
@@ -80,6 +80,17 @@ class Profile(models.Model):
     test_preference = models.CharField(max_length=50, blank=True)
     module_preference = models.CharField(max_length=50, blank=True)
 
+    # Elo-style skill estimate, updated after every module test (modules.services)
+    skill_rating = models.FloatField(null=True, blank=True)
+    rated_attempts = models.PositiveIntegerField(default=0)
+
 
     def __str__(self):
         return f"{self.user.email} Profile"
+
+
+class ThrottleCounter(models.Model):
+    """One rate-limit window's hit count (accounts.throttling, database store)."""
+    key = models.CharField(max_length=128, unique=True)
+    count = models.PositiveIntegerField(default=0)
+    expires_at = models.DateTimeField(db_index=True)
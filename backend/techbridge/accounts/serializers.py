@@ -1,7 +1,6 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate, get_user_model
 from .models import *
-from django.contrib.auth.hashers import check_password
 
 User = get_user_model()
 
@@ -31,6 +30,8 @@ class RegisterSerializer(serializers.ModelSerializer):
         if password != confirm_password:
             raise serializers.ValidationError({"confirm_password": "Passwords do not match"})
 
+        # Stored lowercased so logins can use the unique index
+        attrs['email'] = email
         return attrs
 
     def create(self, validated_data):
@@ -48,13 +49,17 @@ class LoginSerializer(serializers.Serializer):
     def validate(self, data):
         # Authenticate the user using email and password
         email = data.get('email', '').lower()
-        try:
-            user = User.objects.get(email__iexact=email)
-        except User.DoesNotExist:
+        # The profile is joined in for the login response. An exact match uses
+        # the unique index; older accounts may have been stored with mixed case
+        users = User.objects.select_related('profile')
+        user = users.filter(email=email).first() or users.filter(email__iexact=email).first()
+        if user is None:
             raise serializers.ValidationError('Invalid email or password')
         
         
-        if not check_password(data['password'], user.password):
+        # Also rehashes the password (one narrow UPDATE) if it was hashed under
+        # an older policy or cost, see accounts.hashers
+        if not user.check_password(data['password']):
             raise serializers.ValidationError('Invalid email or password')
              
         if user.is_active:
@@ -66,7 +71,7 @@ class ProfileSerializer(serializers.ModelSerializer):
     class Meta:
         model = Profile
         fields = "__all__"
-        read_only_fields = ["user"]
+        read_only_fields = ["user", "skill_rating", "rated_attempts"]
 
 class UserDataSerializer(serializers.ModelSerializer):
     profile = ProfileSerializer(read_only=True)
@@ -1,3 +1,253 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import hashers
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from . import throttling
+from .models import User, Profile, ThrottleCounter
+
+
+def _statements(queries, prefix, table):
+    return [q["sql"] for q in queries.captured_queries if q["sql"].startswith(prefix) and table in q["sql"]]
+
+
+class LoginAPITests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email="learner@example.com",
+            password="password123",
+            role="student",
+            verified=True
+        )
+        Profile.objects.create(user=self.user, learning_rate="fast")
+        self.client = APIClient()
+
+    def login(self, email="learner@example.com", password="password123"):
+        return self.client.post("/api/accounts/login/", {"email": email, "password": password}, format="json")
+
+    def test_login_writes_only_last_login(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.login()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["data"]["user"]["profile"]["learning_rate"], "fast")
+
+        updates = _statements(queries, "UPDATE", '"accounts_user"')
+        self.assertEqual(len(updates), 1)
+        self.assertIn('SET "last_login"', updates[0])
+        self.assertNotIn('"password"', updates[0])
+        # The profile came in with the user
+        self.assertEqual(_statements(queries, "SELECT", 'FROM "accounts_profile"'), [])
+
+        self.user.refresh_from_db()
+        self.assertIsNotNone(self.user.last_login)
+
+    def test_repeated_login_skips_the_write(self):
+        self.login()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.login()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(_statements(queries, "UPDATE", '"accounts_user"'), [])
+
+    def test_mixed_case_email(self):
+        User.objects.filter(pk=self.user.pk).update(email="Learner@Example.com")
+        self.assertEqual(self.login("LEARNER@example.com").status_code, 200)
+
+    def test_unverified_login_mints_no_tokens(self):
+        User.objects.filter(pk=self.user.pk).update(verified=False)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.login()
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(_statements(queries, "INSERT", "outstandingtoken"), [])
+
+
+class RegisterAPITests(TestCase):
+    def test_register_inserts_verified_user_and_profile(self):
+        client = APIClient()
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post("/api/accounts/register/", {
+                "email": "New.Learner@Example.com",
+                "password": "password123",
+                "confirm_password": "password123",
+                "role": "student"
+            }, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertIsNotNone(response.data["data"]["user"]["profile"])
+
+        self.assertEqual(len(_statements(queries, "INSERT", '"accounts_user"')), 1)
+        self.assertEqual(len(_statements(queries, "INSERT", '"accounts_profile"')), 1)
+        self.assertEqual(_statements(queries, "UPDATE", '"accounts_user"'), [])
+
+        user = User.objects.get(email="new.learner@example.com")
+        self.assertTrue(user.verified)
+        self.assertTrue(Profile.objects.filter(user=user).exists())
+
+
+SCRYPT_FIRST = [
+    "accounts.hashers.ScryptPasswordHasher",
+    "accounts.hashers.PBKDF2PasswordHasher",
+    "accounts.hashers.Argon2PasswordHasher",
+]
+
+
+@override_settings(PASSWORD_PBKDF2_ITERATIONS=1000, PASSWORD_SCRYPT_WORK_FACTOR=2 ** 10)
+class PasswordHashPolicyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email="learner@example.com",
+            password="password123",
+            role="student",
+            verified=True
+        )
+        self.client = APIClient()
+
+    def login(self, password="password123"):
+        return self.client.post(
+            "/api/accounts/login/", {"email": "learner@example.com", "password": password}, format="json"
+        )
+
+    def stored_hash(self):
+        return User.objects.values_list("password", flat=True).get(pk=self.user.pk)
+
+    def test_cost_change_rehashes_on_login(self):
+        self.assertTrue(self.stored_hash().startswith("pbkdf2_sha256$1000$"))
+        with override_settings(PASSWORD_PBKDF2_ITERATIONS=2000):
+            self.assertEqual(self.login().status_code, 200)
+        self.assertTrue(self.stored_hash().startswith("pbkdf2_sha256$2000$"))
+
+    def test_policy_change_rehashes_on_login(self):
+        with override_settings(PASSWORD_HASHERS=SCRYPT_FIRST):
+            self.assertEqual(self.login().status_code, 200)
+            self.assertTrue(self.stored_hash().startswith("scrypt$"))
+            # Still verifies under the new policy without another write
+            before = self.stored_hash()
+            self.assertEqual(self.login().status_code, 200)
+            self.assertEqual(self.stored_hash(), before)
+
+    def test_legacy_django_hash_verifies_and_upgrades(self):
+        legacy = hashers.PBKDF2SHA1PasswordHasher().encode("password123", "legacysalt", iterations=1000)
+        User.objects.filter(pk=self.user.pk).update(password=legacy)
+
+        self.assertEqual(self.login().status_code, 200)
+        self.assertTrue(self.stored_hash().startswith("pbkdf2_sha256$"))
+
+    def test_failed_login_does_not_rehash(self):
+        before = self.stored_hash()
+        with override_settings(PASSWORD_HASHERS=SCRYPT_FIRST):
+            self.assertEqual(self.login("wrong-password").status_code, 400)
+        self.assertEqual(self.stored_hash(), before)
+
+
+class ThrottlingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_parse_rate(self):
+        self.assertEqual(throttling.parse_rate("20/min"), (20, 60))
+        self.assertEqual(throttling.parse_rate("10/hour"), (10, 3600))
+        self.assertEqual(throttling.parse_rate("3/5m"), (3, 300))
+
+    def test_previous_window_is_weighted_by_overlap(self):
+        # Four hits late in one window, then a quarter of the way into the next
+        for _ in range(4):
+            throttling.hit("test", "ident", 5, 60, now=1200 + 50)
+        decision = throttling.hit("test", "ident", 5, 60, now=1260 + 15)
+        self.assertEqual(decision.count, 1 + 4 * 0.75)
+        self.assertTrue(decision.allowed)
+
+        throttling.hit("test", "ident", 5, 60, now=1260 + 15)
+        decision = throttling.hit("test", "ident", 5, 60, now=1260 + 15)
+        self.assertEqual(decision.count, 3 + 4 * 0.75)
+        self.assertFalse(decision.allowed)
+        # Under the limit again once the previous window's weight halves
+        self.assertEqual(decision.retry_after, 15)
+
+    def test_rejected_hits_are_not_counted(self):
+        for _ in range(2):
+            self.assertTrue(throttling.hit("test", "ident", 2, 60, now=600).allowed)
+        for _ in range(5):
+            self.assertFalse(throttling.hit("test", "ident", 2, 60, now=600).allowed)
+        self.assertEqual(throttling.count("test", "ident", 60, now=600), 2)
+        # Retrying did not push the lockout into the next window
+        self.assertTrue(throttling.hit("test", "ident", 2, 60, now=660 + 30).allowed)
+
+    @override_settings(THROTTLE_STORE="database")
+    def test_database_rejected_hit_is_taken_back(self):
+        throttling.hit("test", "ident", 1, 60, now=600)
+        self.assertFalse(throttling.hit("test", "ident", 1, 60, now=600).allowed)
+        self.assertEqual(ThrottleCounter.objects.get().count, 1)
+
+    @override_settings(THROTTLE_STORE="database")
+    def test_database_counter_increments_in_place(self):
+        for expected in range(1, 4):
+            self.assertEqual(throttling.hit("test", "ident", 10, 60, now=600).count, expected)
+        self.assertEqual(ThrottleCounter.objects.count(), 1)
+        self.assertEqual(throttling.count("test", "ident", 60, now=600), 3)
+
+        throttling.reset("test", "ident", 60, now=600)
+        self.assertEqual(throttling.count("test", "ident", 60, now=600), 0)
+
+    @override_settings(THROTTLE_STORE="cache")
+    def test_cache_counter(self):
+        for expected in range(1, 4):
+            self.assertEqual(throttling.hit("test", "ident", 10, 60, now=600).count, expected)
+        self.assertEqual(throttling.count("test", "ident", 60, now=600), 3)
+
+
+class LoginThrottlingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email="learner@example.com",
+            password="password123",
+            role="student",
+            verified=True
+        )
+        self.client = APIClient()
+
+    def login(self, password):
+        return self.client.post(
+            "/api/accounts/login/", {"email": "learner@example.com", "password": password}, format="json"
+        )
+
+    def test_account_locked_after_failed_attempts(self):
+        for _ in range(3):
+            self.assertEqual(self.login("wrong-password").status_code, 400)
+        self.assertEqual(self.login("password123").status_code, 429)
+
+    def test_successful_login_clears_failures(self):
+        self.login("wrong-password")
+        self.login("wrong-password")
+        self.assertEqual(self.login("password123").status_code, 200)
+        self.assertEqual(self.login("wrong-password").status_code, 400)
+        self.assertEqual(self.login("password123").status_code, 200)
+
+    @override_settings(THROTTLE_STORE="database")
+    @mock.patch.object(throttling.DatabaseCounters, "PURGE_PROBABILITY", 0)
+    def test_login_without_failures_deletes_nothing(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.login("password123").status_code, 200)
+        self.assertEqual(_statements(queries, "DELETE", "accounts_throttlecounter"), [])
+
+        self.login("wrong-password")
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.login("password123").status_code, 200)
+        self.assertEqual(len(_statements(queries, "DELETE", "accounts_throttlecounter")), 1)
+
+    @override_settings(THROTTLE_RATES={"login": "2/min"})
+    def test_login_rate_per_client(self):
+        self.assertEqual(self.login("password123").status_code, 200)
+        self.assertEqual(self.login("password123").status_code, 200)
+        response = self.login("password123")
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response["Retry-After"]), 0)
+
+    @override_settings(THROTTLE_RATES={})
+    def test_unconfigured_scope_is_not_throttled(self):
+        for _ in range(3):
+            self.assertEqual(self.login("password123").status_code, 200)
@@ -0,0 +1,217 @@
+"""
+Sliding-window rate limiting shared by every worker process.
+
+Hits are counted in fixed windows of ``window`` seconds. The rate over the
+last ``window`` seconds is estimated as the current window's count plus the
+previous window's count weighted by how much of it still overlaps (the
+"sliding window counter"). A rejected hit is taken back, so a client that
+keeps retrying while over the limit is not locked out for longer.
+Increments are atomic in both stores:
+
+* ``cache``: ``INCR`` on the shared cache; used when Redis is configured
+* ``database``: an ``INSERT ... ON CONFLICT DO UPDATE`` on ``ThrottleCounter``
+
+``SlidingWindowThrottle`` applies a rate from ``settings.THROTTLE_RATES`` to
+any DRF view with a ``throttle_scope``. ``hit``/``count``/``reset`` serve
+custom policies such as the login lockout.
+"""
+import hashlib
+import math
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F
+from rest_framework.throttling import BaseThrottle
+
+from .models import ThrottleCounter
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate):
+    """``"20/min"`` -> ``(20, 60)``; the period may carry a multiplier, as in ``"3/5m"``."""
+    count, _, period = rate.partition("/")
+    multiplier = "".join(c for c in period if c.isdigit()) or "1"
+    unit = period.lstrip("0123456789")[:1]
+    return int(count), int(multiplier) * PERIODS[unit]
+
+
+@dataclass(frozen=True)
+class Decision:
+    allowed: bool
+    count: float  # estimated hits in the last window, this one included
+    limit: int
+    retry_after: int  # seconds
+
+
+class CacheCounters:
+    """Counters in the shared cache; atomic where ``incr`` is (Redis, Memcached)."""
+
+    def incr(self, key, ttl):
+        for _ in range(2):
+            cache.add(key, 0, timeout=ttl)
+            try:
+                return cache.incr(key)
+            except ValueError:
+                # Expired between add and incr; start the window again
+                continue
+        return 1
+
+    def decr(self, key):
+        try:
+            cache.decr(key)
+        except ValueError:
+            pass
+
+    def get_many(self, keys):
+        return cache.get_many(keys)
+
+    def delete_many(self, keys):
+        cache.delete_many(keys)
+
+
+class DatabaseCounters:
+    """Counters in ``ThrottleCounter`` rows; expired rows are purged now and then."""
+
+    PURGE_PROBABILITY = 0.01
+
+    def incr(self, key, ttl):
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=ttl)
+        if random.random() < self.PURGE_PROBABILITY:
+            ThrottleCounter.objects.filter(expires_at__lt=datetime.now(timezone.utc)).delete()
+
+        if connection.vendor in ("sqlite", "postgresql"):
+            table = connection.ops.quote_name(ThrottleCounter._meta.db_table)
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"""
+                    INSERT INTO {table} ("key", "count", "expires_at") VALUES (%s, 1, %s)
+                    ON CONFLICT ("key") DO UPDATE SET "count" = {table}."count" + 1
+                    RETURNING "count"
+                    """,
+                    [key, connection.ops.adapt_datetimefield_value(expires_at)]
+                )
+                return cursor.fetchone()[0]
+
+        with transaction.atomic():
+            counter, created = ThrottleCounter.objects.select_for_update().get_or_create(
+                key=key, defaults={"count": 1, "expires_at": expires_at}
+            )
+            if not created:
+                ThrottleCounter.objects.filter(pk=counter.pk).update(count=F("count") + 1)
+                counter.refresh_from_db(fields=["count"])
+            return counter.count
+
+    def decr(self, key):
+        ThrottleCounter.objects.filter(key=key, count__gt=0).update(count=F("count") - 1)
+
+    def get_many(self, keys):
+        return dict(
+            ThrottleCounter.objects.filter(key__in=keys, expires_at__gt=datetime.now(timezone.utc))
+            .values_list("key", "count")
+        )
+
+    def delete_many(self, keys):
+        ThrottleCounter.objects.filter(key__in=keys).delete()
+
+
+_STORES = {"cache": CacheCounters(), "database": DatabaseCounters()}
+
+
+def get_store():
+    return _STORES[settings.THROTTLE_STORE]
+
+
+def _keys(scope, ident, window, now):
+    digest = hashlib.sha1(str(ident).encode()).hexdigest()[:20]
+    index = int(now // window)
+    return (
+        f"throttle:{scope}:{window}:{digest}:{index}",
+        f"throttle:{scope}:{window}:{digest}:{index - 1}",
+    )
+
+
+def _estimate(current, previous, window, now):
+    overlap = 1 - (now % window) / window
+    return current + previous * overlap
+
+
+def _retry_after(current, previous, limit, window, now):
+    # Seconds until the weighted previous window has decayed enough, or the
+    # current window has ended if it alone is over the limit
+    remaining = window - now % window
+    if current >= limit or not previous:
+        return math.ceil(remaining)
+    needed_overlap = (limit - current) / previous
+    return max(math.ceil(remaining - needed_overlap * window), 1)
+
+
+def hit(scope, ident, limit, window, now=None):
+    """
+    Count one hit for ``ident`` and decide whether it is within ``limit`` per
+    ``window`` seconds. A hit that is not allowed is not kept in the count.
+    """
+    now = time.time() if now is None else now
+    current_key, previous_key = _keys(scope, ident, window, now)
+    store = get_store()
+    current = store.incr(current_key, ttl=2 * window)
+    previous = store.get_many([previous_key]).get(previous_key, 0)
+
+    estimated = _estimate(current, previous, window, now)
+    allowed = estimated <= limit
+    if not allowed:
+        store.decr(current_key)
+    return Decision(
+        allowed,
+        estimated,
+        limit,
+        0 if allowed else _retry_after(current, previous, limit, window, now)
+    )
+
+
+def count(scope, ident, window, now=None):
+    """Estimated hits in the last ``window`` seconds, without counting a new one."""
+    now = time.time() if now is None else now
+    current_key, previous_key = _keys(scope, ident, window, now)
+    counts = get_store().get_many([current_key, previous_key])
+    return _estimate(counts.get(current_key, 0), counts.get(previous_key, 0), window, now)
+
+
+def reset(scope, ident, window, now=None):
+    now = time.time() if now is None else now
+    get_store().delete_many(list(_keys(scope, ident, window, now)))
+
+
+def rate_for(scope):
+    """``(limit, window)`` for ``scope`` from THROTTLE_RATES, or None when unthrottled."""
+    rate = settings.THROTTLE_RATES.get(scope)
+    return parse_rate(rate) if rate else None
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """
+    Throttle a view by its ``throttle_scope``: per user when authenticated,
+    per client address otherwise.
+    """
+
+    def allow_request(self, request, view):
+        scope = getattr(view, "throttle_scope", None)
+        rate = rate_for(scope) if scope else None
+        if rate is None:
+            return True
+
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            ident = f"user:{user.pk}"
+        else:
+            ident = f"ip:{self.get_ident(request)}"
+        self.decision = hit(scope, ident, *rate)
+        return self.decision.allowed
+
+    def wait(self):
+        return self.decision.retry_after
@@ -1,8 +1,10 @@
+from datetime import timedelta
+
+from django.conf import settings
 from django.db import transaction
 from django.utils import timezone
 from django.core.validators import EmailValidator
 from django.core.exceptions import ValidationError as DjangoValidationError
-from django.core.cache import cache
 
 from rest_framework import status, serializers, viewsets
 from rest_framework.views import APIView
@@ -15,6 +17,8 @@ from rest_framework_simplejwt.exceptions import TokenError
 import logging
 
 from accounts.utils import get_tokens_for_user 
+from . import throttling
+from .throttling import SlidingWindowThrottle
 from .serializers import (
     RegisterSerializer,
     LoginSerializer, UserDataSerializer,
@@ -32,6 +36,8 @@ COOLDOWN_SECONDS = 300
 class RegisterView(APIView):
     serializer_class = RegisterSerializer
     permission_classes = [AllowAny]
+    throttle_classes = [SlidingWindowThrottle]
+    throttle_scope = "register"
 
     def post(self, request):
         serializer = self.serializer_class(data=request.data)
@@ -47,12 +53,12 @@ class RegisterView(APIView):
                 except DjangoValidationError:
                     return Response({"message": "Invalid email format"}, status=400)
 
-                existing_user = User.objects.filter(email=email).first()
+                existing_user = User.objects.select_related("profile").filter(email=email).first()
                 if existing_user:
                     if not existing_user.verified:
                         existing_user.verified = True
                         existing_user.set_password(request.data.get("password"))
-                        existing_user.save()
+                        existing_user.save(update_fields=["verified", "password"])
                         tokens = get_tokens_for_user(existing_user)
                         return Response({
                             "message": "User verified successfully.",
@@ -64,9 +70,8 @@ class RegisterView(APIView):
                     return Response({"message": "Email already registered"}, status=409)
 
                 serializer.is_valid(raise_exception=True)
-                user = serializer.save()
-                user.verified = True
-                user.save()
+                # Created verified in the same INSERT; the new profile is cached on the user
+                user = serializer.save(verified=True)
                 tokens = get_tokens_for_user(user)
 
                 return Response({
@@ -106,13 +111,15 @@ class VerifyEmailView(APIView):
 class LoginView(APIView):
     serializer_class = LoginSerializer
     permission_classes = [AllowAny]
+    throttle_classes = [SlidingWindowThrottle]
+    throttle_scope = "login"
 
     def post(self, request):
         email = request.data.get("email", "").lower()
-        cache_key_attempts = f"login_attempts_{email}"
-        cache_key_blocked = f"login_blocked_{email}"
 
-        if cache.get(cache_key_blocked):
+        # Failed attempts per account, shared by all workers (accounts.throttling)
+        failures = throttling.count("login-failures", email, COOLDOWN_SECONDS)
+        if failures >= ATTEMPT_LIMIT:
             return Response({"message": "Too many failed attempts. Try again later."}, status=429)
 
         serializer = self.serializer_class(data=request.data)
@@ -120,16 +127,20 @@ class LoginView(APIView):
             serializer.is_valid(raise_exception=True)
             user = serializer.context['user']
             if not user.verified:
-                tokens = get_tokens_for_user(user)
                 # Temporarily commented out due to email configuration issues
-                # send_verification_email(user, tokens['access'])
+                # send_verification_email(user, get_tokens_for_user(user)['access'])
                 return Response({"message": "Email not verified. Email verification temporarily disabled."}, status=403)
 
-            cache.delete(cache_key_attempts)
-            cache.delete(cache_key_blocked)
+            if failures:
+                throttling.reset("login-failures", email, COOLDOWN_SECONDS)
 
-            user.last_login = timezone.now()
-            user.save()
+            # One narrow UPDATE, skipped when the last login was only moments ago
+            now = timezone.now()
+            if user.last_login is None or now - user.last_login >= timedelta(
+                seconds=settings.LAST_LOGIN_UPDATE_INTERVAL
+            ):
+                user.last_login = now
+                user.save(update_fields=["last_login"])
             tokens = get_tokens_for_user(user)
 
             return Response({
@@ -140,11 +151,9 @@ class LoginView(APIView):
                 }
             }, status=200)
         except serializers.ValidationError as e:
-            attempts = cache.get(cache_key_attempts, 0) + 1
-            cache.set(cache_key_attempts, attempts, timeout=COOLDOWN_SECONDS)
+            attempts = throttling.hit("login-failures", email, ATTEMPT_LIMIT, COOLDOWN_SECONDS)
 
-            if attempts >= ATTEMPT_LIMIT:
-                cache.set(cache_key_blocked, True, timeout=COOLDOWN_SECONDS)
+            if attempts.count >= ATTEMPT_LIMIT:
                 user = User.objects.filter(email=email).first()
                 if user:
                     # Temporarily commented out due to email configuration issues
@@ -0,0 +1,85 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from analysis import recalibration
+
+
+class Command(BaseCommand):
+    help = "Recompute every learner's level from assessment scores and module test results."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--thresholds",
+            nargs=2,
+            type=float,
+            metavar=("SLOW_MAX", "AVERAGE_MAX"),
+            help="Score cut-offs (default: LEARNING_LEVEL_*_MAX_SCORE settings)"
+        )
+        parser.add_argument(
+            "--quantiles",
+            nargs=2,
+            type=float,
+            metavar=("Q1", "Q2"),
+            help="Fit cut-offs to these quantiles of current scores, e.g. 0.33 0.67"
+        )
+        parser.add_argument(
+            "--no-tests",
+            action="store_true",
+            help="Ignore module test results"
+        )
+        parser.add_argument("--min-attempts", type=int, default=3)
+        parser.add_argument(
+            "--promote-at",
+            type=float,
+            default=80.0,
+            help="Mean test percentage that moves a learner up one level"
+        )
+        parser.add_argument(
+            "--demote-at",
+            type=float,
+            default=40.0,
+            help="Mean test percentage that moves a learner down one level"
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report the changes without saving them"
+        )
+
+    def handle(self, *args, **options):
+        if options["thresholds"] and options["quantiles"]:
+            raise CommandError("Use either --thresholds or --quantiles, not both")
+        if options["quantiles"] and not all(0 < q < 1 for q in options["quantiles"]):
+            raise CommandError("Quantiles must be between 0 and 1")
+
+        started = time.perf_counter()
+        result = recalibration.recalibrate(
+            thresholds=options["thresholds"],
+            quantiles=options["quantiles"],
+            use_tests=not options["no_tests"],
+            min_attempts=options["min_attempts"],
+            promote_at=options["promote_at"],
+            demote_at=options["demote_at"]
+        )
+        computed = time.perf_counter() - started
+
+        changed = int(result.changed.sum())
+        self.stdout.write(f"Learners with an assessment: {len(result.user_ids)}")
+        self.stdout.write(
+            "Thresholds: " + ", ".join(f"{t:g}" for t in result.thresholds)
+        )
+        self.stdout.write(f"Current levels: {result.distribution(result.current)}")
+        self.stdout.write(f"New levels:     {result.distribution(result.levels)}")
+        self.stdout.write(f"Changed: {changed} (computed in {computed:.2f}s)")
+
+        if options["dry_run"]:
+            self.stdout.write("Dry run, nothing saved")
+            return
+
+        started = time.perf_counter()
+        updated = recalibration.apply(result, batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Updated {updated} learners in {time.perf_counter() - started:.2f}s"
+        ))
@@ -44,3 +44,11 @@ class PersonalityResult(models.Model):
 
     def __str__(self):
         return f"{self.user.email} - {self.learning_level}"
+
+
+class QuestionnaireVersion(models.Model):
+    """Single row whose number changes whenever the questionnaire does."""
+    version = models.PositiveBigIntegerField()
+
+    def __str__(self):
+        return str(self.version)
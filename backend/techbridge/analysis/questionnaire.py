@@ -0,0 +1,84 @@
+"""
+Cached, pre-rendered questionnaire payload for ``QuestionListAPI``.
+
+The version number lives in the ``QuestionnaireVersion`` row, so every
+worker sees the same value whatever cache backend is configured. The
+rendered JSON is stored in the cache under that version and memoised per
+process; a request costs one primary-key read. Saving or deleting a
+``Question`` or ``Option`` (e.g. from the admin) bumps the version through
+``analysis.signals``, so every process rebuilds on its next request. Queryset ``update()`` and
+``bulk_create()`` do not send signals; call ``invalidate()`` after those.
+"""
+import hashlib
+import threading
+import time
+from dataclasses import dataclass
+
+from django.core.cache import cache
+from django.db.models import F
+from rest_framework.renderers import JSONRenderer
+
+from .models import Question, QuestionnaireVersion
+from .serializers import QuestionSerializer
+
+# Rendered payloads for old versions simply age out
+PAYLOAD_TIMEOUT = 24 * 60 * 60
+
+
+@dataclass(frozen=True)
+class Payload:
+    version: int
+    body: bytes
+    etag: str
+
+
+_local = None
+_lock = threading.Lock()
+
+
+def _payload_key(version):
+    return f"analysis:questionnaire:{version}"
+
+
+def current_version():
+    version = QuestionnaireVersion.objects.filter(pk=1).values_list("version", flat=True).first()
+    if version is None:
+        # Start from a fresh number so a payload cached for an earlier
+        # database can never be mistaken for the current one
+        row, _ = QuestionnaireVersion.objects.get_or_create(
+            pk=1, defaults={"version": time.time_ns()}
+        )
+        version = row.version
+    return version
+
+
+def _render(version):
+    questions = Question.objects.prefetch_related("options").order_by("order")
+    body = JSONRenderer().render(QuestionSerializer(questions, many=True).data)
+    etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+    return Payload(version, body, etag)
+
+
+def get_payload():
+    """Return the current questionnaire ``Payload``, rendering it at most once per version."""
+    global _local
+    version = current_version()
+
+    payload = _local
+    if payload is not None and payload.version == version:
+        return payload
+
+    with _lock:
+        if _local is not None and _local.version == version:
+            return _local
+        payload = cache.get(_payload_key(version))
+        if payload is None:
+            payload = _render(version)
+            cache.set(_payload_key(version), payload, timeout=PAYLOAD_TIMEOUT)
+        _local = payload
+        return payload
+
+
+def invalidate():
+    if not QuestionnaireVersion.objects.filter(pk=1).update(version=F("version") + 1):
+        current_version()
@@ -0,0 +1,165 @@
+"""
+Batch recalibration of every learner's level with NumPy.
+
+Assessment scores and module test results are streamed out of the
+database into arrays once; levels for the whole user base are then
+computed in a handful of vectorised operations and only the learners
+whose level actually changes are written back, in chunked UPDATEs of both
+``Profile.learning_rate`` and ``PersonalityResult.learning_level``.
+
+Level codes index ``LEVELS``: 0 = slow, 1 = average, 2 = fast.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+
+from accounts.models import Profile
+from modules.models import ModuleTestAttempt
+from .models import PersonalityResult
+
+LEVELS = ("slow", "average", "fast")
+
+
+@dataclass
+class Recalibration:
+    user_ids: np.ndarray
+    current: np.ndarray
+    recorded: np.ndarray
+    levels: np.ndarray
+    thresholds: tuple
+
+    @property
+    def changed(self):
+        return (self.levels != self.current) | (self.levels != self.recorded)
+
+    def distribution(self, codes):
+        counts = np.bincount(codes[codes >= 0], minlength=len(LEVELS))
+        return dict(zip(LEVELS, counts.tolist()))
+
+
+def level_code(level):
+    return LEVELS.index(level) if level in LEVELS else -1
+
+
+def load_assessments(chunk_size=10000):
+    """Return ``(user_ids, scores, recorded_levels)`` sorted by user id."""
+    rows = (
+        (user_id, score, level_code(level))
+        for user_id, score, level in PersonalityResult.objects.order_by("user_id")
+        .values_list("user_id", "total_score", "learning_level")
+        .iterator(chunk_size=chunk_size)
+    )
+    data = np.fromiter(
+        rows, dtype=[("user_id", np.int64), ("score", np.float64), ("level", np.int64)]
+    )
+    return data["user_id"], data["score"], data["level"]
+
+
+def load_test_performance(chunk_size=10000):
+    """Return ``(user_ids, attempt_counts, mean_percentages)`` sorted by user id."""
+    rows = (
+        ModuleTestAttempt.objects
+        .values_list("user_id", "percentage")
+        .iterator(chunk_size=chunk_size)
+    )
+    data = np.fromiter(rows, dtype=[("user_id", np.int64), ("percentage", np.float64)])
+    user_ids, inverse = np.unique(data["user_id"], return_inverse=True)
+    counts = np.bincount(inverse, minlength=len(user_ids))
+    totals = np.bincount(inverse, weights=data["percentage"], minlength=len(user_ids))
+    # bincount of an empty array is integer-typed, so give the output its own dtype
+    means = np.divide(totals, counts, out=np.zeros(len(user_ids)), where=counts > 0)
+    return user_ids, counts, means
+
+
+def load_current_levels(user_ids, chunk_size=10000):
+    """Current level code of each user in ``user_ids`` (-1 when unset or unknown)."""
+    current = np.full(len(user_ids), -1, dtype=np.int64)
+    for code, level in enumerate(LEVELS):
+        rows = (
+            Profile.objects.filter(learning_rate=level)
+            .values_list("user_id", flat=True)
+            .iterator(chunk_size=chunk_size)
+        )
+        current[np.isin(user_ids, np.fromiter(rows, dtype=np.int64))] = code
+    return current
+
+
+def fit_thresholds(scores, quantiles):
+    """Score cut-offs at the given quantiles of the observed distribution."""
+    if len(scores) == 0:
+        return default_thresholds()
+    return tuple(float(t) for t in np.quantile(scores, quantiles))
+
+
+def default_thresholds():
+    return (
+        settings.LEARNING_LEVEL_SLOW_MAX_SCORE,
+        settings.LEARNING_LEVEL_AVERAGE_MAX_SCORE,
+    )
+
+
+def levels_for_scores(scores, thresholds):
+    # A score equal to a cut-off belongs to the lower band, as in calculate_learning_level
+    return np.searchsorted(np.asarray(thresholds, dtype=np.float64), scores, side="left")
+
+
+def adjust_for_tests(user_ids, levels, performance, min_attempts, promote_at, demote_at):
+    """Move users up or down one level based on their mean module test percentage."""
+    test_users, counts, means = performance
+    if len(test_users) == 0:
+        return levels
+
+    position = np.clip(np.searchsorted(test_users, user_ids), 0, len(test_users) - 1)
+    has_tests = (test_users[position] == user_ids) & (counts[position] >= min_attempts)
+    mean = means[position]
+
+    step = (has_tests & (mean >= promote_at)).astype(np.int64)
+    step -= (has_tests & (mean <= demote_at)).astype(np.int64)
+    return np.clip(levels + step, 0, len(LEVELS) - 1)
+
+
+def recalibrate(thresholds=None, quantiles=None, use_tests=True, min_attempts=3,
+                promote_at=80.0, demote_at=40.0):
+    """Compute new levels for every user with an assessment result, without saving them."""
+    user_ids, scores, recorded = load_assessments()
+
+    if quantiles:
+        thresholds = fit_thresholds(scores, quantiles)
+    elif thresholds is None:
+        thresholds = default_thresholds()
+
+    levels = levels_for_scores(scores, thresholds)
+    if use_tests:
+        levels = adjust_for_tests(
+            user_ids, levels, load_test_performance(),
+            min_attempts, promote_at, demote_at
+        )
+
+    return Recalibration(
+        user_ids=user_ids,
+        current=load_current_levels(user_ids),
+        recorded=recorded,
+        levels=levels,
+        thresholds=tuple(thresholds),
+    )
+
+
+def apply(result, batch_size=5000):
+    """
+    Write changed levels to ``Profile.learning_rate`` and
+    ``PersonalityResult.learning_level``; returns the number of learners updated.
+    """
+    changed = result.changed
+    updated = 0
+    with transaction.atomic():
+        for code, level in enumerate(LEVELS):
+            ids = result.user_ids[changed & (result.levels == code)]
+            for start in range(0, len(ids), batch_size):
+                batch = ids[start:start + batch_size].tolist()
+                Profile.objects.filter(user_id__in=batch).update(learning_rate=level)
+                updated += PersonalityResult.objects.filter(
+                    user_id__in=batch
+                ).update(learning_level=level)
+    return updated
@@ -1,6 +1,58 @@
+from django.conf import settings
+
+from .models import Option
+
+
 def calculate_learning_level(score):
-    if score <= 15:
+    if score <= settings.LEARNING_LEVEL_SLOW_MAX_SCORE:
         return "slow"
-    elif 16 <= score <= 30:
+    elif score <= settings.LEARNING_LEVEL_AVERAGE_MAX_SCORE:
         return "average"
     return "fast"
+
+
+class InvalidAnswers(Exception):
+    pass
+
+
+def option_scores():
+    """Map every option id to its ``(question_id, score)``, in one query."""
+    return {
+        option_id: (question_id, score)
+        for option_id, question_id, score in Option.objects.values_list("id", "question_id", "score")
+    }
+
+
+def score_answers(answers):
+    """
+    Total score of a submission of ``{"question_id", "option_id"}`` pairs.
+
+    Raises ``InvalidAnswers`` unless every question is answered exactly
+    once with one of its own options.
+    """
+    if not isinstance(answers, list):
+        raise InvalidAnswers("Answers must be a list")
+
+    scores = option_scores()
+    answered = set()
+    total_score = 0
+    for ans in answers:
+        try:
+            question_id = int(ans["question_id"])
+            option_id = int(ans["option_id"])
+        except (KeyError, TypeError, ValueError):
+            raise InvalidAnswers("Each answer needs a question_id and an option_id")
+
+        if scores.get(option_id, (None,))[0] != question_id:
+            raise InvalidAnswers(f"Option {option_id} does not belong to question {question_id}")
+        if question_id in answered:
+            raise InvalidAnswers(f"Question {question_id} was answered more than once")
+
+        answered.add(question_id)
+        total_score += scores[option_id][1]
+
+    missing = {question_id for question_id, _ in scores.values()} - answered
+    if missing:
+        raise InvalidAnswers(f"{len(missing)} question(s) were not answered")
+
+    return total_score
@@ -0,0 +1,15 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import questionnaire
+from .models import Option, Question
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+@receiver(post_save, sender=Option)
+@receiver(post_delete, sender=Option)
+def invalidate_questionnaire(sender, **kwargs):
+    # Wait for the commit so no request re-caches the old rows under the new version
+    transaction.on_commit(questionnaire.invalidate)
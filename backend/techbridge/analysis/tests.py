@@ -1,3 +1,246 @@
+from django.db import connection
+from django.db.models import F
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from accounts.models import User, Profile
+from modules.models import LearningModule, ModuleTestAttempt
+from . import recalibration
+from .models import Question, Option, PersonalityResult, QuestionnaireVersion
+
+
+class UserProgressAPITests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="learner@example.com",
+            password="password123",
+            role="student"
+        )
+        Profile.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_modules(self, count, attempts_per_module=2):
+        for i in range(count):
+            module = LearningModule.objects.create(
+                user=self.user,
+                topic=f"Topic {i}",
+                difficulty="beginner",
+                content="content"
+            )
+            for score in range(attempts_per_module):
+                ModuleTestAttempt.objects.create(
+                    module=module,
+                    user=self.user,
+                    score=score,
+                    percentage=score * 20.0,
+                    passed=score >= 3
+                )
+
+    def test_query_count_is_constant(self):
+        self.create_modules(2)
+        with self.assertNumQueries(3):
+            response = self.client.get("/api/analysis/progress/")
+        self.assertEqual(response.status_code, 200)
+
+        self.create_modules(30)
+        with self.assertNumQueries(3):
+            response = self.client.get("/api/analysis/progress/")
+        self.assertEqual(len(response.data["modules"]), 32)
+
+    def test_latest_attempt_per_module(self):
+        self.create_modules(1, attempts_per_module=0)
+        module = LearningModule.objects.get()
+
+        response = self.client.get("/api/analysis/progress/")
+        self.assertIsNone(response.data["modules"][0]["latest_test"])
+
+        ModuleTestAttempt.objects.create(
+            module=module, user=self.user, score=1, percentage=20.0, passed=False
+        )
+        ModuleTestAttempt.objects.create(
+            module=module, user=self.user, score=4, percentage=80.0, passed=True
+        )
+
+        response = self.client.get("/api/analysis/progress/")
+        latest = response.data["modules"][0]["latest_test"]
+        self.assertEqual(latest["score"], 4)
+        self.assertEqual(latest["percentage"], 80.0)
+        self.assertIs(latest["passed"], True)
+        self.assertEqual(
+            response.data["recent_activity"][0]["title"],
+            f"Passed: {module.topic} Test"
+        )
+
+
+class SubmitPersonalityTestAPITests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="learner@example.com",
+            password="password123",
+            role="student"
+        )
+        Profile.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.options = {}
+        for order in range(30):
+            question = Question.objects.create(text=f"Question {order}", order=order)
+            self.options[question.id] = [
+                Option.objects.create(question=question, text=f"Option {score}", score=score)
+                for score in range(3)
+            ]
+
+    def answers(self, pick=1):
+        return [
+            {"question_id": question_id, "option_id": options[pick].id}
+            for question_id, options in self.options.items()
+        ]
+
+    def test_scores_all_answers_in_constant_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                "/api/analysis/submit/", {"answers": self.answers(pick=2)}, format="json"
+            )
+        statements = [
+            q["sql"] for q in queries.captured_queries
+            if not q["sql"].startswith(("SAVEPOINT", "RELEASE SAVEPOINT"))
+        ]
+        # Options, result upsert (select + insert), profile, user
+        self.assertEqual(len(statements), 5, statements)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["score"], 60)
+        self.assertEqual(response.data["learning_level"], "fast")
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.onboarding_stage, 3)
+        self.assertEqual(self.user.profile.learning_rate, "fast")
+        self.assertEqual(PersonalityResult.objects.get(user=self.user).total_score, 60)
+
+    def test_rejects_invalid_or_incomplete_answers(self):
+        other_question = next(iter(self.options))
+        wrong_option = self.options[other_question + 1][0].id
+
+        cases = [
+            self.answers()[:-1],
+            self.answers() + self.answers()[:1],
+            [{"question_id": other_question, "option_id": wrong_option}] + self.answers()[1:],
+            [{"question_id": other_question, "option_id": 999999}] + self.answers()[1:],
+            [{"question_id": "x"}],
+            "not a list",
+        ]
+        for answers in cases:
+            response = self.client.post("/api/analysis/submit/", {"answers": answers}, format="json")
+            self.assertEqual(response.status_code, 400, answers)
+
+        self.assertFalse(PersonalityResult.objects.exists())
+
+
+class QuestionListAPITests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="learner@example.com",
+            password="password123",
+            role="student"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.question = Question.objects.create(text="How do you learn?", order=1)
+            Option.objects.create(question=self.question, text="Reading", score=1)
+
+    def test_cached_payload_and_conditional_get(self):
+        response = self.client.get("/api/analysis/questions/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]["options"][0]["text"], "Reading")
+        etag = response["ETag"]
+
+        # Only the version row is read
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/analysis/questions/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_admin_edits_invalidate_payload(self):
+        etag = self.client.get("/api/analysis/questions/")["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.question.text = "How do you prefer to learn?"
+            self.question.save()
+
+        response = self.client.get("/api/analysis/questions/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.json()[0]["text"], "How do you prefer to learn?")
+
+    def test_version_bumped_elsewhere_is_seen(self):
+        etag = self.client.get("/api/analysis/questions/")["ETag"]
+
+        # Another worker edits the rows and bumps the version; this process's
+        # memo and cache know nothing about it
+        Question.objects.filter(pk=self.question.pk).update(text="Edited elsewhere")
+        QuestionnaireVersion.objects.filter(pk=1).update(version=F("version") + 1)
+
+        response = self.client.get("/api/analysis/questions/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]["text"], "Edited elsewhere")
+
+
+class RecalibrationTests(TestCase):
+    def create_learner(self, number, score, percentages=()):
+        user = User.objects.create_user(
+            email=f"learner{number}@example.com",
+            password="password123",
+            role="student"
+        )
+        Profile.objects.create(user=user, learning_rate="average")
+        PersonalityResult.objects.create(user=user, total_score=score, learning_level="average")
+        if percentages:
+            module = LearningModule.objects.create(
+                user=user, topic="Topic", difficulty="beginner", content="content"
+            )
+            for percentage in percentages:
+                ModuleTestAttempt.objects.create(
+                    module=module, user=user, score=0, percentage=percentage, passed=False
+                )
+        return user
+
+    def test_levels_follow_thresholds_and_test_results(self):
+        slow = self.create_learner(1, 15)
+        average = self.create_learner(2, 16)
+        fast = self.create_learner(3, 31)
+        promoted = self.create_learner(4, 20, percentages=[80, 100, 90])
+        demoted = self.create_learner(5, 40, percentages=[0, 20, 40])
+        too_few_attempts = self.create_learner(6, 20, percentages=[100])
+
+        result = recalibration.recalibrate()
+        self.assertEqual(recalibration.apply(result), 3)
+
+        levels = dict(Profile.objects.values_list("user_id", "learning_rate"))
+        self.assertEqual(levels[slow.id], "slow")
+        self.assertEqual(levels[average.id], "average")
+        self.assertEqual(levels[fast.id], "fast")
+        self.assertEqual(levels[promoted.id], "fast")
+        self.assertEqual(levels[demoted.id], "average")
+        self.assertEqual(levels[too_few_attempts.id], "average")
+        self.assertEqual(
+            dict(PersonalityResult.objects.values_list("user_id", "learning_level")), levels
+        )
+
+        self.assertEqual(recalibration.apply(recalibration.recalibrate()), 0)
+
+    def test_stale_result_level_is_rewritten(self):
+        learner = self.create_learner(1, 40)
+        Profile.objects.filter(user=learner).update(learning_rate="fast")
+
+        self.assertEqual(recalibration.apply(recalibration.recalibrate()), 1)
+        self.assertEqual(PersonalityResult.objects.get(user=learner).learning_level, "fast")
+
+    def test_quantile_thresholds(self):
+        for number, score in enumerate(range(0, 30, 3)):
+            self.create_learner(number, score)
+
+        result = recalibration.recalibrate(quantiles=[0.3, 0.7], use_tests=False)
+        self.assertEqual(result.distribution(result.levels), {"slow": 3, "average": 4, "fast": 3})
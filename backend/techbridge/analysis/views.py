@@ -1,51 +1,62 @@
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 
-from .models import Question, Option, PersonalityResult
-from .serializers import QuestionSerializer
-from .services import calculate_learning_level
+from accounts.models import Profile
+from . import questionnaire
+from .models import PersonalityResult
+from .services import InvalidAnswers, calculate_learning_level, score_answers
 
 
 class QuestionListAPI(APIView):
+    """Serve the pre-rendered questionnaire, or 304 if the client's copy is current."""
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        questions = Question.objects.prefetch_related("options").order_by("order")
-        serializer = QuestionSerializer(questions, many=True)
-        return Response(serializer.data)
+        payload = questionnaire.get_payload()
+
+        if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+        if payload.etag in if_none_match or f"W/{payload.etag}" in if_none_match or "*" in if_none_match:
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(payload.body, content_type="application/json")
+        response["ETag"] = payload.etag
+        response["Cache-Control"] = "private, no-cache"
+        return response
 
 
 class SubmitPersonalityTestAPI(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
-        answers = request.data.get("answers", [])
-        total_score = 0
-
-        for ans in answers:
-            option = Option.objects.get(
-                id=ans["option_id"],
-                question_id=ans["question_id"]
+        try:
+            total_score = score_answers(request.data.get("answers", []))
+        except InvalidAnswers as e:
+            return Response(
+                {"error": str(e)},
+                status=status.HTTP_400_BAD_REQUEST
             )
-            total_score += option.score
 
         learning_level = calculate_learning_level(total_score)
 
-        PersonalityResult.objects.update_or_create(
-            user=request.user,
-            defaults={
-                "total_score": total_score,
-                "learning_level": learning_level
-            }
-        )
+        with transaction.atomic():
+            PersonalityResult.objects.update_or_create(
+                user=request.user,
+                defaults={
+                    "total_score": total_score,
+                    "learning_level": learning_level
+                }
+            )
 
-        profile = request.user.profile
-        profile.learning_rate = learning_level
-        profile.save()
+            Profile.objects.filter(user=request.user).update(learning_rate=learning_level)
 
-        request.user.onboarding_stage = 3
-        request.user.save()
+            request.user.onboarding_stage = 3
+            request.user.save(update_fields=["onboarding_stage"])
 
         return Response({
             "message": "Test submitted successfully",
@@ -75,15 +86,25 @@ class UserProgressAPI(APIView):
         
         # Get learning modules (Phase 2)
         from modules.models import LearningModule, ModuleTestAttempt
-        
-        modules = LearningModule.objects.filter(user=user).order_by('-created_at')
+
+        # Latest attempt per module is resolved in the same query
+        latest_attempt = ModuleTestAttempt.objects.filter(
+            module=OuterRef("pk"), user=user
+        ).order_by("-created_at")
+
+        modules = list(
+            LearningModule.objects.filter(user=user)
+            .only("id", "topic", "difficulty", "is_completed", "retry_count", "created_at")
+            .annotate(
+                latest_score=Subquery(latest_attempt.values("score")[:1]),
+                latest_percentage=Subquery(latest_attempt.values("percentage")[:1]),
+                latest_passed=Subquery(latest_attempt.values("passed")[:1]),
+                latest_date=Subquery(latest_attempt.values("created_at")[:1]),
+            )
+            .order_by('-created_at')
+        )
         modules_data = []
         for module in modules:
-            # Get latest test attempt for this module
-            latest_attempt = ModuleTestAttempt.objects.filter(
-                module=module, user=user
-            ).order_by('-created_at').first()
-            
             modules_data.append({
                 "id": module.id,
                 "topic": module.topic,
@@ -92,11 +113,11 @@ class UserProgressAPI(APIView):
                 "retry_count": module.retry_count,
                 "created_at": module.created_at.isoformat(),
                 "latest_test": {
-                    "score": latest_attempt.score if latest_attempt else None,
-                    "percentage": latest_attempt.percentage if latest_attempt else None,
-                    "passed": latest_attempt.passed if latest_attempt else None,
-                    "date": latest_attempt.created_at.isoformat() if latest_attempt else None
-                } if latest_attempt else None
+                    "score": module.latest_score,
+                    "percentage": module.latest_percentage,
+                    "passed": module.latest_passed,
+                    "date": module.latest_date.isoformat()
+                } if module.latest_date is not None else None
             })
         
         # Get recent activity (last 10 events)
@@ -121,7 +142,12 @@ class UserProgressAPI(APIView):
             })
         
         # Add test attempts to activity
-        all_attempts = ModuleTestAttempt.objects.filter(user=user).order_by('-created_at')[:5]
+        all_attempts = (
+            ModuleTestAttempt.objects.filter(user=user)
+            .select_related("module")
+            .only("passed", "percentage", "created_at", "module__topic")
+            .order_by('-created_at')[:5]
+        )
         for attempt in all_attempts:
             recent_activity.append({
                 "type": "test_attempt",
@@ -1,3 +1,25 @@
 from django.contrib import admin
+from .models import GenerationCacheEntry, GenerationJob, QuestionBankItem
 
-# Register your models here.
+
+@admin.register(GenerationCacheEntry)
+class GenerationCacheEntryAdmin(admin.ModelAdmin):
+    list_display = ("topic", "kind", "difficulty", "model_name", "hit_count", "last_used_at", "expires_at")
+    list_filter = ("kind", "difficulty", "model_name")
+    search_fields = ("topic",)
+    readonly_fields = ("key", "created_at")
+
+
+@admin.register(GenerationJob)
+class GenerationJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "kind", "topic", "status", "progress", "attempts", "created_at")
+    list_filter = ("kind", "status")
+    search_fields = ("topic", "user__email")
+
+
+@admin.register(QuestionBankItem)
+class QuestionBankItemAdmin(admin.ModelAdmin):
+    list_display = ("question", "topic_key", "difficulty", "correct_answer", "created_at")
+    list_filter = ("difficulty",)
+    search_fields = ("topic_key", "question")
+    readonly_fields = ("fingerprint",)
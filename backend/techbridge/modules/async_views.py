@@ -0,0 +1,108 @@
+"""
+ASGI-native module views.
+
+These run on the event loop when served through ``techbridge.asgi`` and
+offload the blocking Gemini calls to worker threads, so the content and
+test for a module are generated concurrently and no server worker is tied
+up while waiting on the model.
+"""
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.db import connections
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from accounts import throttling
+
+from .serializers import LearningModuleSerializer, ModuleTestSerializer
+from .services import difficulty_for_profile, create_module_with_test
+from .gemini import generate_module_content
+from .question_bank import draw_questions
+from .topics import canonical_topic
+
+
+def _in_worker_thread(func):
+    """Run a blocking call off the event loop and release any DB connection it opened."""
+    def run(*args):
+        try:
+            return func(*args)
+        finally:
+            connections.close_all()
+
+    return sync_to_async(run, thread_sensitive=False)
+
+
+def _authenticate(request):
+    result = JWTAuthentication().authenticate(request)
+    return result[0] if result else None
+
+
+def _difficulty_for(user):
+    return difficulty_for_profile(user.profile)
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class GenerateModuleAsyncAPI(View):
+    """Async counterpart of GenerateModuleAPI."""
+
+    # Queries run on worker threads, out of MetricsMiddleware's sight
+    db_queries_on_request_thread = False
+
+    async def post(self, request):
+        try:
+            user = await sync_to_async(_authenticate)(request)
+        except AuthenticationFailed as e:
+            detail = e.detail if isinstance(e.detail, dict) else {"detail": e.detail}
+            return JsonResponse(detail, status=401)
+
+        if user is None:
+            return JsonResponse(
+                {"detail": "Authentication credentials were not provided."},
+                status=401
+            )
+
+        rate = throttling.rate_for("generation")
+        if rate is not None:
+            decision = await sync_to_async(throttling.hit)("generation", f"user:{user.pk}", *rate)
+            if not decision.allowed:
+                response = JsonResponse(
+                    {"detail": f"Request was throttled. Expected available in {decision.retry_after} seconds."},
+                    status=429
+                )
+                response["Retry-After"] = str(decision.retry_after)
+                return response
+
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError:
+            return JsonResponse({"error": "Invalid JSON body"}, status=400)
+
+        topic = data.get("topic") if isinstance(data, dict) else None
+        if not topic:
+            return JsonResponse({"error": "Topic is required"}, status=400)
+
+        topic = await sync_to_async(canonical_topic)(topic)
+        difficulty = await sync_to_async(_difficulty_for)(user)
+
+        content, questions = await asyncio.gather(
+            _in_worker_thread(generate_module_content)(topic, difficulty),
+            _in_worker_thread(draw_questions)(user, topic, difficulty),
+        )
+
+        module, test = await sync_to_async(create_module_with_test)(
+            user, topic, difficulty, content, questions
+        )
+
+        return JsonResponse(
+            {
+                "module": LearningModuleSerializer(module).data,
+                "test": ModuleTestSerializer(test).data
+            },
+            status=201
+        )
@@ -0,0 +1,137 @@
+"""
+Persistent cache for generated module content and roadmaps.
+
+Entries are keyed on a fingerprint of the normalized topic, difficulty,
+prompt template version and model name, so a change to any of those
+naturally misses instead of serving stale output. Lookups, stores and
+evictions are counted in ``techbridge.metrics`` (``generation_cache_*``).
+
+Reads stay reads: hits are counted in memory and written back together
+with ``last_used_at`` at most once per ``GENERATION_CACHE_TOUCH_INTERVAL``
+per entry. Eviction runs from ``manage.py generation_cache evict`` and,
+at most once per ``GENERATION_CACHE_EVICT_INTERVAL``, after a store.
+"""
+import hashlib
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from techbridge import metrics
+
+from .models import GenerationCacheEntry
+
+# Hits not yet written back, by cache key
+_pending_hits = {}
+_pending_lock = threading.Lock()
+_last_evicted = None
+
+
+def normalize_topic(topic):
+    return " ".join(str(topic).split()).casefold()
+
+
+def make_key(kind, topic, difficulty, prompt_version, model_name):
+    raw = "\x1f".join([
+        kind,
+        normalize_topic(topic),
+        (difficulty or "").strip().lower(),
+        str(prompt_version),
+        model_name,
+    ])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def get(key, kind=""):
+    """Return cached content for ``key`` or None on a miss."""
+    now = timezone.now()
+    entry = (
+        GenerationCacheEntry.objects
+        .filter(key=key, expires_at__gt=now)
+        .only("id", "content", "last_used_at")
+        .first()
+    )
+    if entry is None:
+        metrics.GENERATION_CACHE_LOOKUPS.inc(kind=kind, result="miss")
+        return None
+
+    touch_before = now - timedelta(seconds=settings.GENERATION_CACHE_TOUCH_INTERVAL)
+    with _pending_lock:
+        hits = _pending_hits.pop(key, 0) + 1
+        if entry.last_used_at > touch_before:
+            _pending_hits[key] = hits
+            hits = 0
+    if hits:
+        GenerationCacheEntry.objects.filter(pk=entry.pk).update(
+            hit_count=F("hit_count") + hits,
+            last_used_at=now
+        )
+    metrics.GENERATION_CACHE_LOOKUPS.inc(kind=kind, result="hit")
+    return entry.content
+
+
+def store(key, content, *, kind, topic, difficulty, prompt_version, model_name):
+    now = timezone.now()
+    GenerationCacheEntry.objects.update_or_create(
+        key=key,
+        defaults={
+            "kind": kind,
+            "topic": " ".join(str(topic).split())[:255],
+            "difficulty": difficulty or "",
+            "prompt_version": prompt_version,
+            "model_name": model_name,
+            "content": content,
+            "last_used_at": now,
+            "expires_at": now + timedelta(seconds=settings.GENERATION_CACHE_TTL),
+        }
+    )
+    metrics.GENERATION_CACHE_STORES.inc(kind=kind)
+    _evict_if_due()
+
+
+def _evict_if_due():
+    global _last_evicted
+    with _pending_lock:
+        due = (
+            _last_evicted is None
+            or time.monotonic() - _last_evicted >= settings.GENERATION_CACHE_EVICT_INTERVAL
+        )
+        if due:
+            _last_evicted = time.monotonic()
+    if due:
+        evict()
+
+
+def evict():
+    """Drop expired entries, then the least recently used beyond the size cap."""
+    removed, _ = GenerationCacheEntry.objects.filter(
+        expires_at__lte=timezone.now()
+    ).delete()
+
+    overflow = list(
+        GenerationCacheEntry.objects
+        .order_by("-last_used_at")
+        .values_list("id", flat=True)[settings.GENERATION_CACHE_MAX_ENTRIES:]
+    )
+    if overflow:
+        extra, _ = GenerationCacheEntry.objects.filter(id__in=overflow).delete()
+        removed += extra
+
+    if removed:
+        metrics.GENERATION_CACHE_EVICTIONS.inc(removed)
+    return removed
+
+
+def purge(kind=None, topic=None, expired_only=False):
+    entries = GenerationCacheEntry.objects.all()
+    if kind:
+        entries = entries.filter(kind=kind)
+    if topic:
+        entries = entries.filter(topic__iexact=" ".join(topic.split()))
+    if expired_only:
+        entries = entries.filter(expires_at__lte=timezone.now())
+    removed, _ = entries.delete()
+    return removed
@@ -0,0 +1,116 @@
+"""
+zlib compression of generated Markdown with a shared preset dictionary.
+
+Every roadmap and module repeats the same headings and phrasing, which a
+small document alone cannot exploit; priming zlib with that vocabulary
+(``zdict``) lets even the first occurrence be encoded as a back-reference.
+Compressed values start with a one-byte dictionary version so the
+dictionary can be retrained without rewriting existing rows.
+
+Dictionaries are files named ``v<version>.zdict`` in
+``settings.COMPRESSION_DICTIONARY_DIR``: v1 is a hand-picked seed, later
+versions are written by ``manage.py train_compression_dictionary``. New
+values use ``settings.COMPRESSION_DICTIONARY_VERSION``; any version with a
+file can be read.
+"""
+import re
+import zlib
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+
+# Version 0 marks data compressed without a dictionary
+_NO_DICTIONARY = 0
+
+_FILE_NAME = re.compile(r"^v(\d+)\.zdict$")
+
+
+def current_version():
+    return settings.COMPRESSION_DICTIONARY_VERSION
+
+
+def available_versions(directory=None):
+    directory = Path(directory or settings.COMPRESSION_DICTIONARY_DIR)
+    if not directory.is_dir():
+        return []
+    return sorted(
+        int(match.group(1))
+        for match in map(_FILE_NAME.match, (path.name for path in directory.iterdir()))
+        if match
+    )
+
+
+@lru_cache(maxsize=None)
+def _load(directory, version):
+    try:
+        return (Path(directory) / f"v{version}.zdict").read_bytes()
+    except FileNotFoundError:
+        raise ValueError(f"No compression dictionary v{version} in {directory}") from None
+
+
+def dictionary(version):
+    return _load(settings.COMPRESSION_DICTIONARY_DIR, version)
+
+
+def install_dictionary(data, directory=None):
+    """Save ``data`` as the next dictionary version and return that version."""
+    directory = Path(directory or settings.COMPRESSION_DICTIONARY_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    version = max(available_versions(directory), default=0) + 1
+    if version > 255:
+        raise ValueError("Dictionary versions are stored in one byte; no versions left")
+    # Exclusive create, so two concurrent installs can't overwrite each other
+    with open(directory / f"v{version}.zdict", "xb") as f:
+        f.write(data)
+    return version
+
+
+def compress(text, version=None, level=9):
+    if version is None:
+        version = current_version()
+    if version == _NO_DICTIONARY:
+        compressor = zlib.compressobj(level)
+    else:
+        compressor = zlib.compressobj(level, zdict=dictionary(version))
+    body = compressor.compress(text.encode("utf-8")) + compressor.flush()
+    return bytes([version]) + body
+
+
+def decompress(data):
+    data = bytes(data)
+    version = data[0]
+    if version == _NO_DICTIONARY:
+        decompressor = zlib.decompressobj()
+    else:
+        decompressor = zlib.decompressobj(zdict=dictionary(version))
+    return (decompressor.decompress(data[1:]) + decompressor.flush()).decode("utf-8")
+
+
+def train_dictionary(samples, size=32 * 1024, min_count=2):
+    """
+    Build a candidate preset dictionary from a corpus of documents.
+
+    Lines that recur across documents are ranked by how many bytes they
+    would save (length x document frequency) and packed, most valuable
+    last, into at most ``size`` bytes.
+    """
+    frequency = Counter()
+    for sample in samples:
+        frequency.update({line.strip() for line in sample.splitlines() if len(line.strip()) > 3})
+
+    ranked = sorted(
+        (line for line, count in frequency.items() if count >= min_count),
+        key=lambda line: len(line.encode("utf-8")) * frequency[line]
+    )
+
+    chosen = []
+    used = 0
+    for line in reversed(ranked):
+        encoded = line.encode("utf-8") + b"\n"
+        if used + len(encoded) > size:
+            continue
+        chosen.append(encoded)
+        used += len(encoded)
+    return b"".join(reversed(chosen))
@@ -0,0 +1,64 @@
+from django.db import models
+from django.db.models.query_utils import DeferredAttribute
+
+from .compression import compress, decompress
+
+
+class CompressedTextDescriptor(DeferredAttribute):
+    """
+    Keep the compressed bytes loaded from the database on the instance and
+    only decompress them the first time the attribute is read.
+    """
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        value = super().__get__(instance, cls)
+        if isinstance(value, (bytes, memoryview)):
+            value = decompress(value)
+            instance.__dict__[self.field.attname] = value
+        return value
+
+    def __set__(self, instance, value):
+        # Defining __set__ makes this a data descriptor, so __get__ still
+        # runs once the raw value is in the instance __dict__
+        instance.__dict__[self.field.attname] = value
+
+
+class CompressedTextField(models.BinaryField):
+    """
+    Text stored compressed (see ``modules.compression``).
+
+    Reads and writes ``str`` like a ``TextField``; rows that are loaded but
+    whose value is never touched are not decompressed at all.
+    """
+
+    descriptor_class = CompressedTextDescriptor
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("editable", True)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if kwargs.get("editable") is True:
+            del kwargs["editable"]
+        else:
+            kwargs["editable"] = False
+        return name, path, args, kwargs
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if isinstance(value, str):
+            value = compress(value)
+        return super().get_db_prep_value(value, connection, prepared)
+
+    def to_python(self, value):
+        if isinstance(value, (bytes, memoryview)):
+            return decompress(value)
+        return value
+
+    def value_to_string(self, obj):
+        return self.value_from_object(obj)
+
+    def formfield(self, **kwargs):
+        return models.TextField().formfield(**kwargs)
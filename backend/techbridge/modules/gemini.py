@@ -1,39 +1,62 @@
-import google.generativeai as genai
-from django.conf import settings
 import json
 import re
 import logging
+import time
 
-logger = logging.getLogger(__name__)
+from techbridge import metrics
 
-genai.configure(api_key=settings.GEMINI_API_KEY)
+from . import cache as generation_cache
+from .llm import get_provider
+from .singleflight import coalesce
 
-# SDK usually handles the 'models/' prefix automatically
-MODEL_NAME = "gemini-2.5-flash"
+logger = logging.getLogger(__name__)
 
+# Bump whenever a prompt template below changes so cached output is not reused
+PROMPT_VERSION = 1
 
-def generate_module_content(topic, difficulty):
-    prompt = f"""
-    Create a {difficulty} level learning module on "{topic}"
 
-    Rules:
-    - Step-by-step explanation
-    - Examples
-    - Clear headings
-    - Plain text
-    """
+def _cache_key(kind, topic, difficulty=""):
+    return generation_cache.make_key(
+        kind, topic, difficulty, PROMPT_VERSION, get_provider().model_name
+    )
+
 
+def _cache_store(key, content, kind, topic, difficulty=""):
     try:
-        print(f"DEBUG: Generating module content for {topic} using {MODEL_NAME}")
-        model = genai.GenerativeModel(MODEL_NAME)
-        response = model.generate_content(prompt)
-        print(f"DEBUG: Successfully generated module content")
-        return response.text
+        generation_cache.store(
+            key,
+            content,
+            kind=kind,
+            topic=topic,
+            difficulty=difficulty,
+            prompt_version=PROMPT_VERSION,
+            model_name=get_provider().model_name
+        )
     except Exception as e:
-        print(f"DEBUG: Gemini API error for module content: {str(e)}")
-        logger.error(f"Gemini API error: {str(e)}")
-        # Return a fallback content if API fails
-        return f"""# Learning Module: {topic}
+        logger.error(f"Generation cache store failed: {str(e)}")
+
+
+def _call_model(provider, prompt, purpose, function):
+    """``provider.generate`` with call duration and estimated token counts recorded."""
+    if not metrics.enabled():
+        return provider.generate(prompt, purpose=purpose)
+
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        text = provider.generate(prompt, purpose=purpose)
+        outcome = "success"
+    finally:
+        metrics.LLM_CALL_DURATION.observe(
+            time.perf_counter() - started, function=function, outcome=outcome
+        )
+    metrics.LLM_TOKENS.inc(metrics.estimate_tokens(prompt), function=function, direction="prompt")
+    metrics.LLM_TOKENS.inc(metrics.estimate_tokens(text), function=function, direction="completion")
+    return text
+
+
+def _module_fallback(topic, difficulty):
+    return f"""# Learning Module: {topic}
 
 ## Introduction
 This is a {difficulty} level module on {topic}.
@@ -50,9 +73,76 @@ Please refresh the page or try again later for AI-generated content.
 """
 
 
-def generate_test(topic, difficulty):
-    prompt = f"""
-    Create 5 MCQ questions on "{topic}" at {difficulty} level.
+def _module_prompt(topic, difficulty):
+    return f"""
+    Create a {difficulty} level learning module on "{topic}"
+
+    Rules:
+    - Step-by-step explanation
+    - Examples
+    - Clear headings
+    - Plain text
+    """
+
+
+@metrics.GENERATION_DURATION.time(function="generate_module_content")
+def generate_module_content(topic, difficulty, fallback=True):
+    """
+    Module body for ``topic``. If the model call fails, returns placeholder
+    text, or with ``fallback=False`` raises so the caller can retry.
+    """
+    cache_key = _cache_key("module", topic, difficulty)
+    cached = generation_cache.get(cache_key, "module")
+    if cached is not None:
+        return cached
+
+    try:
+        # Identical concurrent requests share one model call
+        return coalesce(
+            cache_key,
+            lambda: _generate_module_content(topic, difficulty, cache_key),
+            lookup=lambda: generation_cache.get(cache_key, "module")
+        )
+    except Exception as e:
+        if not fallback:
+            raise
+        logger.error(f"Gemini API error: {str(e)}")
+        metrics.GENERATION_FALLBACKS.inc(function="generate_module_content")
+        # Return a fallback content if API fails
+        return _module_fallback(topic, difficulty)
+
+
+def _generate_module_content(topic, difficulty, cache_key):
+    provider = get_provider()
+    logger.debug("Generating module content", extra={
+        "topic": topic, "difficulty": difficulty, "model": provider.model_name
+    })
+    text = _call_model(provider, _module_prompt(topic, difficulty), "module", "generate_module_content")
+    logger.debug("Generated module content", extra={"topic": topic, "chars": len(text)})
+    _cache_store(cache_key, text, "module", topic, difficulty)
+    return text
+
+
+@metrics.GENERATION_DURATION.time(function="generate_test")
+def generate_test(topic, difficulty, fallback=True):
+    """Five MCQs on ``topic``; generic questions if the model call fails, unless ``fallback=False``."""
+    try:
+        # Tests are not cached, so only identical calls within this process coalesce
+        return coalesce(
+            _cache_key("test", topic, difficulty),
+            lambda: generate_question_pool(topic, difficulty, 5)
+        )
+    except Exception as e:
+        if not fallback:
+            raise
+        logger.error(f"Gemini API error for test generation: {str(e)}")
+        metrics.GENERATION_FALLBACKS.inc(function="generate_test")
+        return _test_fallback(topic)
+
+
+def _test_prompt(topic, difficulty, count):
+    return f"""
+    Create {count} MCQ questions on "{topic}" at {difficulty} level.
 
     Output STRICT JSON (no markdown, no code blocks, just raw JSON):
     [
@@ -70,86 +160,96 @@ def generate_test(topic, difficulty):
     ]
     """
 
-    try:
-        print(f"DEBUG: Generating test for {topic} using {MODEL_NAME}")
-        model = genai.GenerativeModel(MODEL_NAME)
-        response = model.generate_content(prompt)
-        
-        # Clean the response - remove markdown code blocks if present
-        text = response.text.strip()
-        if text.startswith("```"):
-            # Remove markdown code block markers
-            text = re.sub(r'^```(?:json)?\n?', '', text)
-            text = re.sub(r'\n?```$', '', text)
-        
-        print(f"DEBUG: Successfully generated test")
-        return json.loads(text)
-    except Exception as e:
-        print(f"DEBUG: Gemini API error for test generation: {str(e)}")
-        logger.error(f"Gemini API error for test generation: {str(e)}")
-        # Return fallback test questions
-        return [
-            {
-                "id": 1,
-                "question": f"What is a key concept in {topic}?",
-                "options": {
-                    "A": "Understanding fundamentals",
-                    "B": "Ignoring basics",
-                    "C": "Skipping practice",
-                    "D": "None of the above"
-                },
-                "correct_answer": "A"
+
+def generate_question_pool(topic, difficulty, count):
+    """Generate ``count`` MCQs in one model call; raises if the output is unusable."""
+    provider = get_provider()
+    logger.debug("Generating questions", extra={
+        "topic": topic, "difficulty": difficulty, "count": count, "model": provider.model_name
+    })
+    text = _call_model(provider, _test_prompt(topic, difficulty, count), "test", "generate_test")
+
+    # Clean the response - remove markdown code blocks if present
+    text = text.strip()
+    if text.startswith("```"):
+        # Remove markdown code block markers
+        text = re.sub(r'^```(?:json)?\n?', '', text)
+        text = re.sub(r'\n?```$', '', text)
+
+    questions = json.loads(text)
+    if not isinstance(questions, list):
+        raise ValueError("Expected a JSON list of questions")
+
+    logger.debug("Generated questions", extra={"topic": topic, "count": len(questions)})
+    return questions
+
+
+def _test_fallback(topic):
+    return [
+        {
+            "id": 1,
+            "question": f"What is a key concept in {topic}?",
+            "options": {
+                "A": "Understanding fundamentals",
+                "B": "Ignoring basics",
+                "C": "Skipping practice",
+                "D": "None of the above"
             },
-            {
-                "id": 2,
-                "question": f"Why is learning {topic} important?",
-                "options": {
-                    "A": "It has no value",
-                    "B": "Career advancement",
-                    "C": "Time waste",
-                    "D": "Not recommended"
-                },
-                "correct_answer": "B"
+            "correct_answer": "A"
+        },
+        {
+            "id": 2,
+            "question": f"Why is learning {topic} important?",
+            "options": {
+                "A": "It has no value",
+                "B": "Career advancement",
+                "C": "Time waste",
+                "D": "Not recommended"
             },
-            {
-                "id": 3,
-                "question": "What is the best approach to learning?",
-                "options": {
-                    "A": "Skip theory",
-                    "B": "Only memorize",
-                    "C": "Practice regularly",
-                    "D": "Avoid examples"
-                },
-                "correct_answer": "C"
+            "correct_answer": "B"
+        },
+        {
+            "id": 3,
+            "question": "What is the best approach to learning?",
+            "options": {
+                "A": "Skip theory",
+                "B": "Only memorize",
+                "C": "Practice regularly",
+                "D": "Avoid examples"
             },
-            {
-                "id": 4,
-                "question": "How should you handle challenges?",
-                "options": {
-                    "A": "Give up quickly",
-                    "B": "Persist and learn",
-                    "C": "Avoid them",
-                    "D": "Ignore errors"
-                },
-                "correct_answer": "B"
+            "correct_answer": "C"
+        },
+        {
+            "id": 4,
+            "question": "How should you handle challenges?",
+            "options": {
+                "A": "Give up quickly",
+                "B": "Persist and learn",
+                "C": "Avoid them",
+                "D": "Ignore errors"
             },
-            {
-                "id": 5,
-                "question": "What helps reinforce learning?",
-                "options": {
-                    "A": "Never reviewing",
-                    "B": "Passive reading",
-                    "C": "Active practice",
-                    "D": "Multitasking"
-                },
-                "correct_answer": "C"
-            }
-        ]
-
-
-def generate_detailed_roadmap(topic):
-    """Generates a comprehensive learning roadmap for a specific topic."""
-    prompt = f"""
+            "correct_answer": "B"
+        },
+        {
+            "id": 5,
+            "question": "What helps reinforce learning?",
+            "options": {
+                "A": "Never reviewing",
+                "B": "Passive reading",
+                "C": "Active practice",
+                "D": "Multitasking"
+            },
+            "correct_answer": "C"
+        }
+    ]
+
+
+def _roadmap_fallback(topic):
+    return f"# Learning Roadmap: {topic}\n\nOur AI-guided learning service is currently experiencing high load. Please try again in 1 minute."
+
+
+def _roadmap_prompt(topic):
+    return f"""
     Create a professional, highly structured, and comprehensive learning roadmap for "{topic}".
     
     The output MUST be formatted in clean Markdown and include these exact sections:
@@ -191,14 +291,82 @@ def generate_detailed_roadmap(topic):
     - Use Syntax Highlighting (```code) for any code examples.
     """
 
+
+@metrics.GENERATION_DURATION.time(function="generate_detailed_roadmap")
+def generate_detailed_roadmap(topic, fallback=True):
+    """Generates a comprehensive learning roadmap for a specific topic."""
+    cache_key = _cache_key("roadmap", topic)
+    cached = generation_cache.get(cache_key, "roadmap")
+    if cached is not None:
+        return cached
+
     try:
-        print(f"DEBUG: Generating detailed roadmap for {topic} using {MODEL_NAME}")
-        model = genai.GenerativeModel(MODEL_NAME)
-        response = model.generate_content(prompt)
-        print(f"DEBUG: Successfully generated detailed roadmap")
-        return response.text
+        return coalesce(
+            cache_key,
+            lambda: _generate_detailed_roadmap(topic, cache_key),
+            lookup=lambda: generation_cache.get(cache_key, "roadmap")
+        )
     except Exception as e:
-        print(f"DEBUG: Gemini API error for roadmap generation: {str(e)}")
+        if not fallback:
+            raise
         logger.error(f"Gemini API error for roadmap generation: {str(e)}")
-        return f"# Learning Roadmap: {topic}\n\nOur AI-guided learning service is currently experiencing high load. Please try again in 1 minute."
+        metrics.GENERATION_FALLBACKS.inc(function="generate_detailed_roadmap")
+        return _roadmap_fallback(topic)
+
+
+def _generate_detailed_roadmap(topic, cache_key):
+    provider = get_provider()
+    logger.debug("Generating roadmap", extra={"topic": topic, "model": provider.model_name})
+    text = _call_model(provider, _roadmap_prompt(topic), "roadmap", "generate_detailed_roadmap")
+    logger.debug("Generated roadmap", extra={"topic": topic, "chars": len(text)})
+    _cache_store(cache_key, text, "roadmap", topic)
+    return text
+
+
+def _stream_content(prompt, cache_key, kind, topic, difficulty, fallback):
+    """Yield text chunks as the model produces them, caching the assembled output."""
+    cached = generation_cache.get(cache_key, kind)
+    if cached is not None:
+        yield cached
+        return
+
+    parts = []
+    try:
+        provider = get_provider()
+        logger.debug("Streaming generation", extra={"kind": kind, "topic": topic, "model": provider.model_name})
+        for text in provider.stream(prompt, purpose=kind):
+            parts.append(text)
+            yield text
+    except Exception as e:
+        logger.error(f"Gemini API error while streaming {kind}: {str(e)}")
+        if not parts:
+            yield fallback
+        else:
+            yield "\n\n> Generation was interrupted. Please try again later for the full content."
+        return
+
+    logger.debug("Streamed generation", extra={"kind": kind, "topic": topic, "chars": sum(map(len, parts))})
+    _cache_store(cache_key, "".join(parts), kind, topic, difficulty)
+
+
+def stream_module_content(topic, difficulty):
+    return _stream_content(
+        _module_prompt(topic, difficulty),
+        _cache_key("module", topic, difficulty),
+        "module",
+        topic,
+        difficulty,
+        _module_fallback(topic, difficulty)
+    )
+
 
+def stream_detailed_roadmap(topic):
+    """Streaming variant of generate_detailed_roadmap."""
+    return _stream_content(
+        _roadmap_prompt(topic),
+        _cache_key("roadmap", topic),
+        "roadmap",
+        topic,
+        "",
+        _roadmap_fallback(topic)
+    )
@@ -0,0 +1,263 @@
+"""
+DB-backed queue for LLM generation jobs.
+
+Views enqueue a ``GenerationJob`` and return immediately; ``Worker``
+instances (started by ``manage.py run_generation_workers``) claim queued
+rows with a conditional UPDATE, so any number of worker processes can
+share the table without an external broker.
+
+While a job runs, its worker refreshes ``locked_at`` (a heartbeat) well
+within ``GENERATION_JOB_LOCK_TIMEOUT``; only jobs whose heartbeat stopped
+are taken back by ``requeue_stale``. Every write a run makes is fenced on
+the ``locked_by``/``attempts`` pair of its claim, so a run that lost its
+job stops instead of saving a second module.
+"""
+import logging
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import F
+from django.utils import timezone
+
+from .models import GenerationJob, LearningModule
+from .services import create_module_with_test
+from .gemini import (
+    generate_module_content,
+    generate_detailed_roadmap
+)
+from .question_bank import draw_questions
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue(user, kind, topic, difficulty):
+    job = GenerationJob.objects.create(
+        user=user,
+        kind=kind,
+        topic=topic,
+        difficulty=difficulty,
+        max_attempts=settings.GENERATION_JOB_MAX_ATTEMPTS
+    )
+    if settings.GENERATION_JOBS_EAGER:
+        # No worker will pick up a retry, so use every attempt now
+        while True:
+            claimed = claim(job.pk, "eager")
+            if claimed is None:
+                break
+            run_job(claimed)
+        job.refresh_from_db()
+    return job
+
+
+def claim(job_id, worker_id):
+    """Atomically move a queued job to running; returns None if another worker won."""
+    now = timezone.now()
+    claimed = GenerationJob.objects.filter(
+        pk=job_id,
+        status=GenerationJob.STATUS_QUEUED
+    ).update(
+        status=GenerationJob.STATUS_RUNNING,
+        locked_by=worker_id,
+        locked_at=now,
+        attempts=F("attempts") + 1,
+        updated_at=now
+    )
+    if not claimed:
+        return None
+    return GenerationJob.objects.select_related("user").get(pk=job_id)
+
+
+def claim_next(worker_id):
+    candidates = GenerationJob.objects.filter(
+        status=GenerationJob.STATUS_QUEUED,
+        available_at__lte=timezone.now()
+    ).order_by("available_at", "id").values_list("id", flat=True)[:10]
+
+    for job_id in candidates:
+        job = claim(job_id, worker_id)
+        if job is not None:
+            return job
+    return None
+
+
+def requeue_stale():
+    """
+    Return jobs whose worker stopped heartbeating to the queue, or fail them
+    once they have used every attempt; returns how many jobs were touched.
+
+    The staleness test is part of each UPDATE, so a job whose heartbeat
+    lands first is left alone.
+    """
+    now = timezone.now()
+    stale = GenerationJob.objects.filter(
+        status=GenerationJob.STATUS_RUNNING,
+        locked_at__lt=now - timedelta(seconds=settings.GENERATION_JOB_LOCK_TIMEOUT)
+    )
+    released = {"locked_by": "", "locked_at": None, "updated_at": now}
+    failed = stale.filter(attempts__gte=F("max_attempts")).update(
+        status=GenerationJob.STATUS_FAILED,
+        error="Worker stopped responding",
+        **released
+    )
+    requeued = stale.filter(attempts__lt=F("max_attempts")).update(
+        status=GenerationJob.STATUS_QUEUED,
+        available_at=now,
+        **released
+    )
+    return failed + requeued
+
+
+class _LockLost(Exception):
+    pass
+
+
+def _owned(job):
+    # Matches only while this run's claim still holds the job
+    return GenerationJob.objects.filter(
+        pk=job.pk,
+        status=GenerationJob.STATUS_RUNNING,
+        locked_by=job.locked_by,
+        attempts=job.attempts
+    )
+
+
+def heartbeat(job, **fields):
+    """Refresh the job's lock (and ``fields``); False if the job was taken away."""
+    now = timezone.now()
+    return bool(_owned(job).update(locked_at=now, updated_at=now, **fields))
+
+
+class _Heartbeat(threading.Thread):
+    """Beats for a job while its model calls run, which can take minutes."""
+
+    def __init__(self, job):
+        super().__init__(name=f"heartbeat-{job.pk}", daemon=True)
+        self.job = job
+        self._stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self._stopped.wait(settings.GENERATION_JOB_LOCK_TIMEOUT / 3):
+                if not heartbeat(self.job):
+                    break
+        finally:
+            connections.close_all()
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+def _set_progress(job, progress):
+    job.progress = progress
+    if not heartbeat(job, progress=progress):
+        raise _LockLost
+
+
+def _execute(job):
+    # Without fallbacks a failed model call raises, so the job is retried
+    # instead of saving placeholder content as the learner's module
+    if job.kind == "module":
+        content = generate_module_content(job.topic, job.difficulty, fallback=False)
+        _set_progress(job, 50)
+        questions = draw_questions(job.user, job.topic, job.difficulty, fallback=False)
+        _set_progress(job, 90)
+        module, _ = create_module_with_test(
+            job.user, job.topic, job.difficulty, content, questions
+        )
+        return module
+
+    if job.kind == "roadmap":
+        content = generate_detailed_roadmap(job.topic, fallback=False)
+        _set_progress(job, 90)
+        return LearningModule.objects.create(
+            user=job.user,
+            topic=job.topic,
+            difficulty=job.difficulty,
+            content=content
+        )
+
+    raise ValueError(f"Unknown job kind: {job.kind}")
+
+
+def retry_delay(attempts):
+    """Exponential backoff: base, 2x base, 4x base ... capped."""
+    delay = settings.GENERATION_JOB_RETRY_BACKOFF * (2 ** max(attempts - 1, 0))
+    return min(delay, settings.GENERATION_JOB_RETRY_BACKOFF_MAX)
+
+
+def run_job(job):
+    beat = _Heartbeat(job)
+    beat.start()
+    try:
+        module = _execute(job)
+    except _LockLost:
+        logger.warning(f"Generation job {job.pk} was taken over during attempt {job.attempts}; abandoning it")
+        return None
+    except Exception as e:
+        logger.exception(f"Generation job {job.pk} failed on attempt {job.attempts}")
+        fields = {"locked_by": "", "locked_at": None, "error": str(e), "updated_at": timezone.now()}
+        if job.attempts < job.max_attempts:
+            fields["status"] = GenerationJob.STATUS_QUEUED
+            fields["available_at"] = timezone.now() + timedelta(seconds=retry_delay(job.attempts))
+        else:
+            fields["status"] = GenerationJob.STATUS_FAILED
+        _owned(job).update(**fields)
+        return None
+    finally:
+        beat.stop()
+
+    _owned(job).update(
+        status=GenerationJob.STATUS_SUCCEEDED,
+        progress=100,
+        module=module,
+        error="",
+        locked_by="",
+        locked_at=None,
+        updated_at=timezone.now()
+    )
+    return module
+
+
+class Worker:
+    """Polls the queue and runs up to ``concurrency`` jobs at once on a thread pool."""
+
+    def __init__(self, concurrency=None, poll_interval=1.0, name=None):
+        self.concurrency = concurrency or settings.GENERATION_WORKER_CONCURRENCY
+        self.poll_interval = poll_interval
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self._slots = threading.BoundedSemaphore(self.concurrency)
+        self._stopping = threading.Event()
+
+    def stop(self):
+        self._stopping.set()
+
+    def _run_and_release(self, job):
+        try:
+            run_job(job)
+        finally:
+            connections.close_all()
+            self._slots.release()
+
+    def run(self, once=False):
+        """Process jobs until stopped; with ``once``, exit when the queue is drained."""
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="generation") as pool:
+            while not self._stopping.is_set():
+                requeue_stale()
+
+                # Blocks while every slot is busy, capping in-flight jobs
+                self._slots.acquire()
+                job = claim_next(self.name)
+                if job is None:
+                    self._slots.release()
+                    if once:
+                        break
+                    self._stopping.wait(self.poll_interval)
+                    continue
+
+                pool.submit(self._run_and_release, job)
@@ -0,0 +1,258 @@
+"""
+LLM provider backends used by ``modules.gemini``.
+
+``settings.LLM_PROVIDER`` selects the backend: ``gemini`` talks to the
+Gemini API, ``fake`` returns deterministic canned output with simulated
+latency, jitter and errors so the API can be load tested offline.
+"""
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+import google.ai.generativelanguage as glm
+import google.generativeai as genai
+from google.ai.generativelanguage_v1beta.services.generative_service.transports.grpc import (
+    GenerativeServiceGrpcTransport
+)
+from google.auth import api_key as api_key_credentials
+from google.generativeai.types import generation_types
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from techbridge import metrics
+
+
+class LLMError(Exception):
+    pass
+
+
+class LLMProvider:
+    """Interface for text generation backends."""
+
+    model_name = ""
+
+    def generate(self, prompt, purpose=""):
+        """Return the full completion for ``prompt``."""
+        raise NotImplementedError
+
+    def stream(self, prompt, purpose=""):
+        """Yield the completion in chunks; backends without streaming yield it whole."""
+        yield self.generate(prompt, purpose)
+
+
+class GeminiClientPool:
+    """
+    Process-wide pool of long-lived Gemini gRPC clients.
+
+    Each client owns one HTTP/2 channel with keep-alive pings, so connection
+    setup happens once per process instead of on the request path. Calls are
+    spread round-robin across the clients and a semaphore caps how many are
+    in flight at once, so a traffic spike queues here instead of upstream.
+    In-flight calls, queue wait and rejections are recorded in
+    ``techbridge.metrics`` (``llm_pool_*``).
+    """
+
+    def __init__(self, api_key, size=1, max_in_flight=16, acquire_timeout=30.0, keepalive_ms=30000):
+        self.api_key = api_key
+        self.size = max(size, 1)
+        self.max_in_flight = max_in_flight
+        self.acquire_timeout = acquire_timeout
+        self.keepalive_ms = keepalive_ms
+
+        self._clients = []
+        self._next = itertools.count()
+        self._lock = threading.Lock()
+        self._semaphore = threading.BoundedSemaphore(max_in_flight)
+        self._in_flight = 0
+
+    def _build_client(self):
+        channel = GenerativeServiceGrpcTransport.create_channel(
+            credentials=api_key_credentials.Credentials(self.api_key),
+            options=[
+                ("grpc.max_send_message_length", -1),
+                ("grpc.max_receive_message_length", -1),
+                ("grpc.keepalive_time_ms", self.keepalive_ms),
+                ("grpc.keepalive_timeout_ms", 20000),
+                ("grpc.keepalive_permit_without_calls", 1),
+                ("grpc.http2.max_pings_without_data", 0),
+            ]
+        )
+        return glm.GenerativeServiceClient(
+            transport=GenerativeServiceGrpcTransport(channel=channel)
+        )
+
+    def _client(self):
+        index = next(self._next) % self.size
+        with self._lock:
+            while len(self._clients) <= index:
+                self._clients.append(self._build_client())
+            return self._clients[index]
+
+    @contextmanager
+    def lease(self):
+        """Wait for a free slot and yield a client to make one call with."""
+        started = time.monotonic()
+        acquired = self._semaphore.acquire(timeout=self.acquire_timeout)
+        waited = time.monotonic() - started
+        if not acquired:
+            metrics.LLM_POOL_REJECTED.inc()
+            raise LLMError(f"No Gemini client free after {waited:.1f}s")
+        metrics.LLM_POOL_QUEUE_WAIT.observe(waited)
+
+        self._track_in_flight(1)
+        try:
+            yield self._client()
+        finally:
+            self._track_in_flight(-1)
+            self._semaphore.release()
+
+    def _track_in_flight(self, delta):
+        with self._lock:
+            self._in_flight += delta
+            metrics.LLM_POOL_IN_FLIGHT.set(self._in_flight)
+
+
+class GeminiProvider(LLMProvider):
+    def __init__(self, api_key, model_name, pool=None, timeout=60.0):
+        self.model_name = model_name
+        self.timeout = timeout
+        self.pool = pool or GeminiClientPool(api_key)
+        # Only used to build requests; calls go through the pooled clients
+        self._model = genai.GenerativeModel(model_name)
+
+    def generate(self, prompt, purpose=""):
+        request = self._model._prepare_request(contents=prompt)
+        with self.pool.lease() as client:
+            response = client.generate_content(request, timeout=self.timeout)
+        return generation_types.GenerateContentResponse.from_response(response).text
+
+    def stream(self, prompt, purpose=""):
+        request = self._model._prepare_request(contents=prompt)
+        with self.pool.lease() as client:
+            with generation_types.rewrite_stream_error():
+                iterator = client.stream_generate_content(request, timeout=self.timeout)
+            for chunk in generation_types.GenerateContentResponse.from_iterator(iterator):
+                text = chunk.text
+                if text:
+                    yield text
+
+
+class FakeProvider(LLMProvider):
+    """
+    Deterministic offline backend for load tests.
+
+    Output depends only on the prompt; each call sleeps for ``latency``
+    plus or minus ``jitter`` seconds and fails with ``error_rate`` probability.
+    """
+
+    model_name = "fake"
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, seed=None, chunk_size=200):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.chunk_size = chunk_size
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _simulate_call(self):
+        with self._lock:
+            delay = self.latency + self._random.uniform(-self.jitter, self.jitter)
+            failed = self._random.random() < self.error_rate
+        if delay > 0:
+            time.sleep(delay)
+        if failed:
+            raise LLMError("Simulated LLM provider failure")
+
+    @staticmethod
+    def _topic(prompt):
+        match = re.search(r'"([^"]+)"', prompt)
+        return match.group(1) if match else "the topic"
+
+    def _canned(self, prompt, purpose):
+        topic = self._topic(prompt)
+        if purpose == "test":
+            match = re.search(r"Create (\d+) MCQ", prompt)
+            count = int(match.group(1)) if match else 5
+            return json.dumps([
+                {
+                    "id": i,
+                    "question": f"Sample question {i} about {topic}?",
+                    "options": {
+                        "A": f"Correct statement about {topic}",
+                        "B": "Distractor one",
+                        "C": "Distractor two",
+                        "D": "Distractor three"
+                    },
+                    "correct_answer": "A"
+                }
+                for i in range(1, count + 1)
+            ])
+
+        sections = "\n\n".join(
+            f"## Section {i}\n" + (f"Explanation of part {i} of {topic}. " * 20)
+            for i in range(1, 7)
+        )
+        title = "Learning Roadmap" if purpose == "roadmap" else "Learning Module"
+        return f"# {title}: {topic}\n\n{sections}\n"
+
+    def generate(self, prompt, purpose=""):
+        self._simulate_call()
+        return self._canned(prompt, purpose)
+
+    def stream(self, prompt, purpose=""):
+        self._simulate_call()
+        text = self._canned(prompt, purpose)
+        for start in range(0, len(text), self.chunk_size):
+            yield text[start:start + self.chunk_size]
+
+
+def _build_provider():
+    name = settings.LLM_PROVIDER
+    if name == "gemini":
+        pool = GeminiClientPool(
+            settings.GEMINI_API_KEY,
+            size=settings.LLM_POOL_SIZE,
+            max_in_flight=settings.LLM_MAX_CONCURRENCY,
+            acquire_timeout=settings.LLM_POOL_ACQUIRE_TIMEOUT,
+            keepalive_ms=settings.LLM_KEEPALIVE_MS
+        )
+        return GeminiProvider(
+            settings.GEMINI_API_KEY,
+            settings.LLM_MODEL_NAME,
+            pool=pool,
+            timeout=settings.LLM_REQUEST_TIMEOUT
+        )
+    if name == "fake":
+        return FakeProvider(
+            latency=settings.LLM_FAKE_LATENCY_MS / 1000,
+            jitter=settings.LLM_FAKE_JITTER_MS / 1000,
+            error_rate=settings.LLM_FAKE_ERROR_RATE,
+            seed=settings.LLM_FAKE_SEED
+        )
+    raise ValueError(f"Unknown LLM_PROVIDER: {name!r}")
+
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_provider():
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = _build_provider()
+    return _provider
+
+
+@receiver(setting_changed)
+def _reset_provider(setting, **kwargs):
+    global _provider
+    if setting.startswith("LLM_") or setting == "GEMINI_API_KEY":
+        _provider = None
@@ -0,0 +1,359 @@
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from accounts.models import User
+from modules.models import LearningModule
+from techbridge.benchmarks import summarize
+
+from .seed_benchmark_data import TOPICS
+
+DEFAULT_MIX = "login=1,progress=3,history=4,search=2,module=3,test=2,submit=2,questions=1,generate=1"
+
+# What the in-process settings overrides below amount to for a separate server.
+# Empty THROTTLE_RATE_* values turn those scopes off (settings.THROTTLE_RATES).
+REMOTE_SERVER_ENV = (
+    "LLM_PROVIDER=fake THROTTLE_RATE_LOGIN= THROTTLE_RATE_REGISTER= THROTTLE_RATE_GENERATION="
+)
+
+
+class InProcessTransport:
+    """Requests go through the full Django stack in this process; queries are counted."""
+
+    counts_queries = True
+
+    def __init__(self, host):
+        self.host = host
+        self._local = threading.local()
+
+    def _client(self):
+        if not hasattr(self._local, "client"):
+            # Server errors are reported as 500s, not raised into the benchmark
+            self._local.client = Client(HTTP_HOST=self.host, raise_request_exception=False)
+        return self._local.client
+
+    def request(self, method, path, data=None, token=None):
+        headers = {"HTTP_AUTHORIZATION": f"Bearer {token}"} if token else {}
+        client = self._client()
+        with CaptureQueriesContext(connection) as queries:
+            if method == "POST":
+                response = client.post(path, data or {}, content_type="application/json", **headers)
+            else:
+                response = client.get(path, data or {}, **headers)
+            body = response.content if not response.streaming else b"".join(response.streaming_content)
+        query_count = sum(
+            1 for q in queries.captured_queries
+            if not q["sql"].startswith(("SAVEPOINT", "RELEASE SAVEPOINT"))
+        )
+        return response.status_code, body, query_count
+
+    def close(self):
+        connection.close()
+
+
+class HttpTransport:
+    """Requests go to a running server; query counts are not available."""
+
+    counts_queries = False
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+
+    def request(self, method, path, data=None, token=None):
+        headers = {"Content-Type": "application/json"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        url = self.base_url + path
+        payload = None
+        if method == "POST":
+            payload = json.dumps(data or {}).encode()
+        elif data:
+            url += "?" + urllib.parse.urlencode(data)
+        request = urllib.request.Request(url, data=payload, headers=headers, method=method)
+        try:
+            with urllib.request.urlopen(request, timeout=120) as response:
+                return response.status, response.read(), None
+        except urllib.error.HTTPError as e:
+            return e.code, e.read(), None
+
+    def close(self):
+        pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a scripted, weighted workload against the REST API with the fake LLM "
+        "and report throughput, latency percentiles and queries per request. "
+        "Seed data first with seed_benchmark_data. With --url the fake LLM and "
+        "unthrottled settings are not applied to the server; start it with "
+        f"{REMOTE_SERVER_ENV}."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500, help="Measured requests in total")
+        parser.add_argument("--warmup", type=int, default=50, help="Unmeasured requests first")
+        parser.add_argument("--concurrency", type=int, default=1)
+        parser.add_argument("--sessions", type=int, default=20, help="Logged-in users to spread requests over")
+        parser.add_argument("--mix", default=DEFAULT_MIX, help="Comma-separated endpoint=weight pairs")
+        parser.add_argument("--prefix", default="bench")
+        parser.add_argument("--password", default="benchmark-password")
+        parser.add_argument("--llm-latency-ms", type=float, default=0.0)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--host", default="localhost", help="Host header for in-process requests")
+        parser.add_argument(
+            "--url",
+            help=f"Benchmark a running server at this base URL instead (start it with {REMOTE_SERVER_ENV})"
+        )
+        parser.add_argument("--json", dest="json_output", help="Also write the results to this file")
+        parser.add_argument("--baseline", help="Results file from an earlier run to compare against")
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.25,
+            help="Allowed relative p95 increase over the baseline before failing"
+        )
+
+    def handle(self, *args, **options):
+        self.mix = self._parse_mix(options["mix"])
+        self.options = options
+        transport = HttpTransport(options["url"]) if options["url"] else InProcessTransport(options["host"])
+        if options["url"]:
+            self.stderr.write(self.style.WARNING(
+                "The fake LLM and throttling overrides only apply in this process. Unless "
+                f"{options['url']} was started with {REMOTE_SERVER_ENV}, it calls the real "
+                "LLM and throttles the benchmark users."
+            ))
+
+        # In-process only: these don't reach a server given by --url
+        with override_settings(
+            LLM_PROVIDER="fake",
+            LLM_FAKE_LATENCY_MS=options["llm_latency_ms"],
+            LLM_FAKE_JITTER_MS=0,
+            LLM_FAKE_ERROR_RATE=0,
+            THROTTLE_RATES={}
+        ):
+            sessions = self._sessions(transport, options)
+            self._run(transport, sessions, options["warmup"], options["concurrency"], options["seed"] + 1000)
+            samples, elapsed = self._run(
+                transport, sessions, options["requests"], options["concurrency"], options["seed"]
+            )
+
+        results = self._results(samples, elapsed, transport.counts_queries)
+        self._print(results)
+        if options["json_output"]:
+            with open(options["json_output"], "w") as f:
+                json.dump(results, f, indent=2)
+        if options["baseline"]:
+            self._compare(results, options["baseline"], options["tolerance"])
+
+    @staticmethod
+    def _parse_mix(mix):
+        weights = {}
+        for part in mix.split(","):
+            name, _, weight = part.partition("=")
+            if name.strip() not in OPERATIONS:
+                raise CommandError(f"Unknown endpoint {name!r}; choose from {', '.join(OPERATIONS)}")
+            weights[name.strip()] = float(weight or 1)
+        return weights
+
+    def _sessions(self, transport, options):
+        prefix = options["prefix"]
+        users = list(
+            User.objects.filter(email__startswith=f"{prefix}-", email__endswith="@example.invalid")
+            .order_by("id")
+            .values_list("id", "email")[:options["sessions"]]
+        )
+        if not users:
+            raise CommandError(f"No '{prefix}-' users found; run seed_benchmark_data first")
+
+        modules = {}
+        for module_id, user_id in LearningModule.objects.filter(
+            user_id__in=[user_id for user_id, _ in users], moduletest__isnull=False
+        ).values_list("id", "user_id"):
+            modules.setdefault(user_id, []).append(module_id)
+
+        sessions = []
+        for user_id, email in users:
+            status, body, _ = transport.request(
+                "POST", "/api/accounts/login/", {"email": email, "password": options["password"]}
+            )
+            if status != 200:
+                raise CommandError(f"Login failed for {email} ({status}): {body[:200]!r}")
+            sessions.append({
+                "email": email,
+                "token": json.loads(body)["data"]["tokens"]["access"],
+                "modules": modules.get(user_id, []),
+            })
+        return sessions
+
+    def _run(self, transport, sessions, count, concurrency, seed):
+        names = list(self.mix)
+        weights = [self.mix[name] for name in names]
+        shares = [count // concurrency + (1 if i < count % concurrency else 0) for i in range(concurrency)]
+
+        def worker(index):
+            rng = random.Random(seed * 1000 + index)
+            samples = []
+            try:
+                for _ in range(shares[index]):
+                    name = rng.choices(names, weights)[0]
+                    session = rng.choice(sessions)
+                    method, path, data = OPERATIONS[name](self, session, rng)
+                    started = time.perf_counter()
+                    status, _, queries = transport.request(method, path, data, session["token"])
+                    samples.append((name, status, time.perf_counter() - started, queries))
+            finally:
+                if concurrency > 1:
+                    # Worker threads opened their own database connections
+                    transport.close()
+            return samples
+
+        started = time.perf_counter()
+        if concurrency == 1:
+            samples = worker(0)
+        else:
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                samples = [s for batch in pool.map(worker, range(concurrency)) for s in batch]
+        return samples, time.perf_counter() - started
+
+    # Operations return (method, path, data) for one request of each kind
+
+    def _login(self, session, rng):
+        return "POST", "/api/accounts/login/", {"email": session["email"], "password": self.options["password"]}
+
+    def _progress(self, session, rng):
+        return "GET", "/api/analysis/progress/", None
+
+    def _questions(self, session, rng):
+        return "GET", "/api/analysis/questions/", None
+
+    def _history(self, session, rng):
+        return "GET", "/api/modules/history/", None
+
+    def _search(self, session, rng):
+        return "GET", "/api/modules/history/search/", {"q": rng.choice(TOPICS).split()[0]}
+
+    def _module(self, session, rng):
+        return "GET", f"/api/modules/{self._module_id(session, rng)}/", None
+
+    def _test(self, session, rng):
+        return "GET", f"/api/modules/{self._module_id(session, rng)}/test/", None
+
+    def _submit(self, session, rng):
+        answers = {str(i): rng.choice("ABCD") for i in range(1, 6)}
+        return "POST", f"/api/modules/{self._module_id(session, rng)}/test/submit/", {"answers": answers}
+
+    def _generate(self, session, rng):
+        return "POST", "/api/modules/generate/", {"topic": rng.choice(TOPICS)}
+
+    @staticmethod
+    def _module_id(session, rng):
+        # Users without modules hit a 404, which shows up as errors in the report
+        return rng.choice(session["modules"]) if session["modules"] else 0
+
+    def _results(self, samples, elapsed, counts_queries):
+        endpoints = {}
+        for name in self.mix:
+            rows = [s for s in samples if s[0] == name]
+            if not rows:
+                continue
+            summary = summarize([s[2] for s in rows])
+            endpoints[name] = {
+                "count": len(rows),
+                "errors": sum(1 for s in rows if s[1] >= 400),
+                "throttled": sum(1 for s in rows if s[1] == 429),
+                "p50_ms": round(summary["p50"] * 1000, 3),
+                "p95_ms": round(summary["p95"] * 1000, 3),
+                "p99_ms": round(summary["p99"] * 1000, 3),
+                "mean_ms": round(summary["mean"] * 1000, 3),
+                "queries_per_request": (
+                    round(sum(s[3] for s in rows) / len(rows), 2) if counts_queries else None
+                ),
+            }
+        overall = summarize([s[2] for s in samples])
+        return {
+            "requests": len(samples),
+            "concurrency": self.options["concurrency"],
+            "elapsed_s": round(elapsed, 3),
+            "throughput_rps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": round(overall["p50"] * 1000, 3),
+            "p99_ms": round(overall["p99"] * 1000, 3),
+            "endpoints": endpoints,
+        }
+
+    def _print(self, results):
+        self.stdout.write(
+            f"{results['requests']} requests in {results['elapsed_s']:.2f}s with concurrency "
+            f"{results['concurrency']}: {results['throughput_rps']:.1f} req/s, "
+            f"p50 {results['p50_ms']:.2f}ms, p99 {results['p99_ms']:.2f}ms\n"
+        )
+        self.stdout.write(
+            f"  {'endpoint':<10} {'count':>6} {'errors':>6} {'p50 ms':>9} {'p95 ms':>9} "
+            f"{'p99 ms':>9} {'queries':>8}"
+        )
+        for name, row in results["endpoints"].items():
+            queries = "-" if row["queries_per_request"] is None else f"{row['queries_per_request']:.1f}"
+            self.stdout.write(
+                f"  {name:<10} {row['count']:>6} {row['errors']:>6} {row['p50_ms']:>9.2f} "
+                f"{row['p95_ms']:>9.2f} {row['p99_ms']:>9.2f} {queries:>8}"
+            )
+        throttled = sum(row["throttled"] for row in results["endpoints"].values())
+        if throttled:
+            self.stdout.write(self.style.WARNING(
+                f"\n{throttled} requests were throttled (429); their latencies are not "
+                f"representative. Run the server with {REMOTE_SERVER_ENV}."
+            ))
+
+    def _compare(self, results, baseline_path, tolerance):
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        if baseline["concurrency"] != results["concurrency"]:
+            raise CommandError(
+                f"Baseline ran with concurrency {baseline['concurrency']}, this run with "
+                f"{results['concurrency']}; latencies are not comparable"
+            )
+
+        regressions = []
+        for name, before in baseline["endpoints"].items():
+            after = results["endpoints"].get(name)
+            if after is None:
+                continue
+            if after["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+                regressions.append(f"{name}: p95 {before['p95_ms']:.2f}ms -> {after['p95_ms']:.2f}ms")
+            if (
+                before["queries_per_request"] is not None
+                and after["queries_per_request"] is not None
+                and after["queries_per_request"] > before["queries_per_request"] + 0.5
+            ):
+                regressions.append(
+                    f"{name}: queries/request {before['queries_per_request']} -> {after['queries_per_request']}"
+                )
+            if after["errors"] > before["errors"]:
+                regressions.append(f"{name}: errors {before['errors']} -> {after['errors']}")
+
+        if regressions:
+            raise CommandError("Regressions against baseline:\n  " + "\n  ".join(regressions))
+        self.stdout.write(self.style.SUCCESS(f"\nNo regressions against {baseline_path}"))
+
+
+OPERATIONS = {
+    "login": Command._login,
+    "progress": Command._progress,
+    "questions": Command._questions,
+    "history": Command._history,
+    "search": Command._search,
+    "module": Command._module,
+    "test": Command._test,
+    "submit": Command._submit,
+    "generate": Command._generate,
+}
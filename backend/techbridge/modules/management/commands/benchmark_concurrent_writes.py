@@ -0,0 +1,125 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import User
+from modules.models import LearningModule
+from techbridge.benchmarks import format_timings
+
+from .benchmark_api import InProcessTransport
+
+
+class Command(BaseCommand):
+    help = (
+        "Submit module tests from many threads at once and report write throughput, "
+        "latency and failed submissions for the configured database. "
+        "Seed data first with seed_benchmark_data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            default="1,2,4,8,16",
+            help="Comma-separated numbers of parallel submitters to try"
+        )
+        parser.add_argument("--submissions", type=int, default=50, help="Submissions per submitter")
+        parser.add_argument("--prefix", default="bench")
+        parser.add_argument("--host", default="localhost", help="Host header for in-process requests")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        levels = [int(level) for level in options["concurrency"].split(",")]
+        submitters = self._submitters(options["prefix"], max(levels))
+        transport = InProcessTransport(options["host"])
+
+        self._describe_database()
+        for level in levels:
+            self._run(transport, submitters[:level], options["submissions"], options["seed"])
+
+    @staticmethod
+    def _submitters(prefix, count):
+        users = list(
+            User.objects.filter(email__startswith=f"{prefix}-", email__endswith="@example.invalid")
+            .order_by("id")[:count]
+        )
+        modules = {}
+        for module_id, user_id in LearningModule.objects.filter(
+            user__in=users, moduletest__isnull=False
+        ).values_list("id", "user_id"):
+            modules.setdefault(user_id, []).append(module_id)
+
+        submitters = [
+            (str(RefreshToken.for_user(user).access_token), modules[user.id])
+            for user in users if user.id in modules
+        ]
+        if len(submitters) < count:
+            raise CommandError(
+                f"Need {count} '{prefix}-' users with modules, found {len(submitters)}; "
+                f"run seed_benchmark_data --users {count}"
+            )
+        return submitters
+
+    def _describe_database(self):
+        settings_dict = connection.settings_dict
+        self.stdout.write(f"Database: {connection.vendor} {settings_dict['NAME']}")
+        if connection.vendor == "sqlite":
+            with connection.cursor() as cursor:
+                pragmas = []
+                for pragma in ("journal_mode", "synchronous", "busy_timeout"):
+                    cursor.execute(f"PRAGMA {pragma}")
+                    pragmas.append(f"{pragma}={cursor.fetchone()[0]}")
+            transaction_mode = settings_dict["OPTIONS"].get("transaction_mode") or "DEFERRED"
+            self.stdout.write(f"  {' '.join(pragmas)} transaction_mode={transaction_mode}")
+        elif connection.vendor == "postgresql":
+            pool = settings_dict["OPTIONS"].get("pool")
+            self.stdout.write(f"  CONN_MAX_AGE={settings_dict['CONN_MAX_AGE']} pool={pool or 'off'}")
+        connection.close()
+
+    def _run(self, transport, submitters, submissions, seed):
+        start = threading.Barrier(len(submitters))
+
+        def submitter(index):
+            token, module_ids = submitters[index]
+            rng = random.Random(seed * 1000 + index)
+            timings, failures = [], {}
+            try:
+                start.wait()
+                for _ in range(submissions):
+                    answers = {str(i): rng.choice("ABCD") for i in range(1, 6)}
+                    started = time.perf_counter()
+                    status, _, _ = transport.request(
+                        "POST",
+                        f"/api/modules/{rng.choice(module_ids)}/test/submit/",
+                        {"answers": answers},
+                        token
+                    )
+                    timings.append(time.perf_counter() - started)
+                    if status != 200:
+                        failures[status] = failures.get(status, 0) + 1
+            finally:
+                transport.close()
+            return timings, failures
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(submitters)) as pool:
+            results = list(pool.map(submitter, range(len(submitters))))
+        elapsed = time.perf_counter() - started
+
+        timings = [t for result, _ in results for t in result]
+        failures = {}
+        for _, result in results:
+            for code, count in result.items():
+                failures[code] = failures.get(code, 0) + count
+        succeeded = len(timings) - sum(failures.values())
+        failed = ", ".join(f"{count}x{code}" for code, count in sorted(failures.items())) or "none"
+
+        self.stdout.write(
+            f"\n{len(submitters):>3} submitters: {succeeded / elapsed:.1f} successful submissions/s, "
+            f"failed: {failed}"
+        )
+        self.stdout.write(f"    {format_timings(timings)}")
@@ -0,0 +1,130 @@
+import time
+import zlib
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from accounts.models import User
+from modules import compression
+from modules.gemini import _roadmap_prompt
+from modules.llm import FakeProvider
+from modules.models import LearningModule, ModuleContent
+from techbridge.benchmarks import format_timings
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Compare storage size and read latency of module content with and without compression."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--samples",
+            type=int,
+            default=200,
+            help="Documents to measure (stored module bodies first, then synthetic roadmaps)"
+        )
+
+    def handle(self, *args, **options):
+        samples = self._samples(options["samples"])
+        self.stdout.write(f"Measuring {len(samples)} documents")
+
+        self._report_sizes(samples)
+        self._report_decode(samples)
+        self._report_queries(samples)
+
+    def _samples(self, count):
+        samples = [content.body for content in ModuleContent.objects.order_by("-id")[:count]]
+        if len(samples) < count:
+            provider = FakeProvider(seed=0)
+            samples += [
+                provider.generate(_roadmap_prompt(f"Synthetic topic {i}"), purpose="roadmap")
+                for i in range(count - len(samples))
+            ]
+        return samples
+
+    def _report_sizes(self, samples):
+        raw = sum(len(text.encode("utf-8")) for text in samples)
+        plain = sum(len(zlib.compress(text.encode("utf-8"), 9)) for text in samples)
+        shared = sum(len(compression.compress(text)) for text in samples)
+
+        self.stdout.write("\nStorage")
+        self.stdout.write(f"  uncompressed          {raw:>12,} bytes")
+        self.stdout.write(f"  zlib                  {plain:>12,} bytes ({raw / max(plain, 1):.2f}x)")
+        self.stdout.write(
+            f"  zlib + dictionary v{compression.current_version()}  {shared:>12,} bytes ({raw / max(shared, 1):.2f}x)"
+        )
+
+        if len(samples) >= 2:
+            # Train on one half and measure on the other so the ratio isn't flattered
+            training, holdout = samples[::2], samples[1::2]
+            dictionary = compression.train_dictionary(training)
+            holdout_raw = sum(len(text.encode("utf-8")) for text in holdout)
+            trained = 0
+            for text in holdout:
+                compressor = zlib.compressobj(9, zdict=dictionary)
+                trained += len(compressor.compress(text.encode("utf-8")) + compressor.flush()) + 1
+            self.stdout.write(
+                f"  zlib + trained dictionary ({len(dictionary):,} bytes) on held-out half: "
+                f"{holdout_raw / max(trained, 1):.2f}x"
+            )
+            self.stdout.write("  Install one with `manage.py train_compression_dictionary`")
+
+    def _report_decode(self, samples):
+        encoded = [text.encode("utf-8") for text in samples]
+        compressed = [compression.compress(text) for text in samples]
+
+        before, after = [], []
+        for raw, packed in zip(encoded, compressed):
+            started = time.perf_counter()
+            raw.decode("utf-8")
+            before.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            compression.decompress(packed)
+            after.append(time.perf_counter() - started)
+
+        self.stdout.write("\nDecode per document")
+        self.stdout.write(f"  uncompressed  {format_timings(before, 'us')}")
+        self.stdout.write(f"  compressed    {format_timings(after, 'us')}")
+
+    def _report_queries(self, samples, rounds=20):
+        # Rows are inserted in a transaction that is rolled back afterwards
+        try:
+            with transaction.atomic():
+                user = User.objects.create_user(
+                    email="content-benchmark@example.invalid",
+                    password=None,
+                    role="student"
+                )
+                LearningModule.objects.bulk_create([
+                    LearningModule(
+                        user=user,
+                        topic=f"Benchmark {i}",
+                        difficulty="beginner",
+                        module_content=ModuleContent.intern(text)
+                    )
+                    for i, text in enumerate(samples)
+                ])
+                modules = LearningModule.objects.filter(user=user).select_related("module_content")
+
+                untouched, touched = [], []
+                for _ in range(rounds):
+                    started = time.perf_counter()
+                    for module in modules.all():
+                        module.topic
+                    untouched.append(time.perf_counter() - started)
+
+                    started = time.perf_counter()
+                    for module in modules.all():
+                        module.content
+                    touched.append(time.perf_counter() - started)
+
+                self.stdout.write(f"\nLoad {len(samples)} modules from the database")
+                self.stdout.write(f"  content not read  {format_timings(untouched)}")
+                self.stdout.write(f"  content read      {format_timings(touched)}")
+                raise _Rollback
+        except _Rollback:
+            pass
@@ -0,0 +1,172 @@
+import os
+import random
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import OuterRef, Subquery
+
+from accounts.models import User
+from modules.models import LearningModule, ModuleContent, ModuleTestAttempt
+from techbridge.benchmarks import format_timings
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a synthetic dataset and report EXPLAIN plans and latency of the hot "
+        "module/attempt queries without and with the composite indexes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=500)
+        parser.add_argument("--modules-per-user", type=int, default=40)
+        parser.add_argument("--attempts-per-module", type=int, default=3)
+        parser.add_argument("--iterations", type=int, default=200, help="Timed runs per query")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--allow-index-drop", action="store_true",
+            help="Run even though the database does not look like a scratch or test database"
+        )
+
+    def handle(self, *args, **options):
+        # DROP INDEX locks the tables until the rollback, so stay off shared databases
+        name = str(connection.settings_dict["NAME"])
+        scratch = os.path.basename(name).startswith("test") or (
+            connection.vendor == "sqlite" and connection.is_in_memory_db()
+        )
+        if not scratch and not options["allow_index_drop"]:
+            raise CommandError(
+                f"Refusing to drop indexes on database {name!r}: point the command at a "
+                "scratch database or pass --allow-index-drop"
+            )
+
+        self.random = random.Random(options["seed"])
+        # Everything, including dropping the indexes, happens in a transaction
+        # that is rolled back, so the database is left as it was
+        try:
+            with transaction.atomic():
+                users = self._seed(options)
+                indexes = self._indexes()
+                self._analyze()
+
+                for _, index in indexes:
+                    self._execute(f"DROP INDEX {connection.ops.quote_name(index.name)}")
+                self._analyze()
+                self._report("Without composite indexes", users, options["iterations"])
+
+                for index_model, index in indexes:
+                    self._execute(index.create_sql(index_model, connection.schema_editor()))
+                self._analyze()
+                self._report("With composite indexes", users, options["iterations"])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _seed(self, options):
+        started = time.perf_counter()
+        password = make_password(None)
+        users = User.objects.bulk_create([
+            User(email=f"query-benchmark-{i}@example.invalid", password=password, role="student")
+            for i in range(options["users"])
+        ])
+        content = ModuleContent.intern("Synthetic module body used by benchmark_queries.")
+
+        modules = LearningModule.objects.bulk_create(
+            [
+                LearningModule(
+                    user=user,
+                    topic=f"Topic {self.random.randrange(1000)}",
+                    difficulty="beginner",
+                    module_content=content
+                )
+                for user in users
+                for _ in range(options["modules_per_user"])
+            ],
+            batch_size=1000
+        )
+        ModuleTestAttempt.objects.bulk_create(
+            [
+                ModuleTestAttempt(
+                    module=module, user_id=module.user_id, score=3, percentage=60.0, passed=True
+                )
+                for module in modules
+                for _ in range(options["attempts_per_module"])
+            ],
+            batch_size=1000
+        )
+        self.stdout.write(
+            f"Seeded {len(users):,} users, {len(modules):,} modules and "
+            f"{len(modules) * options['attempts_per_module']:,} attempts "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+        return users
+
+    @staticmethod
+    def _indexes():
+        return [
+            (model, index)
+            for model in (LearningModule, ModuleTestAttempt)
+            for index in model._meta.indexes
+        ]
+
+    @staticmethod
+    def _execute(statement):
+        with connection.cursor() as cursor:
+            cursor.execute(str(statement))
+
+    @staticmethod
+    def _analyze():
+        with connection.cursor() as cursor:
+            for model in (LearningModule, ModuleTestAttempt):
+                cursor.execute(f"ANALYZE {model._meta.db_table}")
+
+    def _queries(self, user, module_id):
+        """The queries behind each view, for one user."""
+        latest_attempt = ModuleTestAttempt.objects.filter(
+            module=OuterRef("pk"), user=user
+        ).order_by("-created_at")
+        return {
+            "history (first page)": (
+                LearningModule.objects.filter(user=user)
+                .only("id", "topic", "difficulty", "is_completed", "created_at")
+                .order_by("-created_at")[:20]
+            ),
+            "module detail": (
+                LearningModule.objects.select_related("module_content").filter(id=module_id, user=user)
+            ),
+            "progress modules + latest attempt": (
+                LearningModule.objects.filter(user=user)
+                .only("id", "topic", "difficulty", "is_completed", "retry_count", "created_at")
+                .annotate(latest_score=Subquery(latest_attempt.values("score")[:1]))
+                .order_by("-created_at")
+            ),
+            "progress recent attempts": (
+                ModuleTestAttempt.objects.filter(user=user)
+                .select_related("module")
+                .only("passed", "percentage", "created_at", "module__topic")
+                .order_by("-created_at")[:5]
+            ),
+        }
+
+    def _report(self, title, users, iterations):
+        self.stdout.write(f"\n{title}")
+        samples = {}
+        for _ in range(iterations):
+            user = self.random.choice(users)
+            module_id = LearningModule.objects.filter(user=user).values_list("id", flat=True).first()
+            for name, queryset in self._queries(user, module_id).items():
+                started = time.perf_counter()
+                list(queryset)
+                samples.setdefault(name, []).append(time.perf_counter() - started)
+
+        user = users[0]
+        module_id = LearningModule.objects.filter(user=user).values_list("id", flat=True).first()
+        for name, queryset in self._queries(user, module_id).items():
+            self.stdout.write(f"  {name}: {format_timings(samples[name])}")
+            for line in queryset.explain().splitlines():
+                self.stdout.write(f"      {line}")
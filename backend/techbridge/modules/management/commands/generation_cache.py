@@ -0,0 +1,105 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Sum
+
+from modules import cache as generation_cache
+from modules.gemini import (
+    generate_module_content,
+    generate_detailed_roadmap,
+    _cache_key
+)
+from modules.models import GenerationCacheEntry
+from modules.topics import canonical_topic
+
+
+class Command(BaseCommand):
+    help = "Warm, purge or inspect the generated content cache."
+
+    def add_arguments(self, parser):
+        subparsers = parser.add_subparsers(dest="action", required=True)
+
+        warm = subparsers.add_parser("warm", help="Generate and cache content for topics")
+        warm.add_argument("topics", nargs="+")
+        warm.add_argument(
+            "--difficulty",
+            action="append",
+            choices=["beginner", "intermediate", "advanced"],
+            help="Difficulty to warm module content for (repeatable, default: all)"
+        )
+        warm.add_argument("--no-roadmap", action="store_true", help="Skip roadmap warming")
+        warm.add_argument("--no-module", action="store_true", help="Skip module content warming")
+
+        purge = subparsers.add_parser("purge", help="Delete cache entries")
+        purge.add_argument("--kind", choices=["module", "roadmap"])
+        purge.add_argument("--topic")
+        purge.add_argument("--expired", action="store_true", help="Only delete expired entries")
+
+        subparsers.add_parser("evict", help="Delete expired and least recently used entries")
+        subparsers.add_parser("stats", help="Show cache size and hit counts")
+
+    def handle(self, *args, **options):
+        action = options["action"]
+        if action == "warm":
+            self.warm(options)
+        elif action == "purge":
+            removed = generation_cache.purge(
+                kind=options["kind"],
+                topic=options["topic"],
+                expired_only=options["expired"]
+            )
+            self.stdout.write(self.style.SUCCESS(f"Purged {removed} cache entries"))
+        elif action == "evict":
+            removed = generation_cache.evict()
+            self.stdout.write(self.style.SUCCESS(f"Evicted {removed} cache entries"))
+        elif action == "stats":
+            self.stats()
+        else:
+            raise CommandError(f"Unknown action: {action}")
+
+    def warm(self, options):
+        difficulties = options["difficulty"] or ["beginner", "intermediate", "advanced"]
+        for topic in options["topics"]:
+            # Warm under the same name the API will look the topic up by
+            topic = canonical_topic(topic)
+            if not options["no_module"]:
+                for difficulty in difficulties:
+                    self._warm_one(
+                        _cache_key("module", topic, difficulty),
+                        lambda: generate_module_content(topic, difficulty),
+                        f"module {topic!r} ({difficulty})"
+                    )
+            if not options["no_roadmap"]:
+                self._warm_one(
+                    _cache_key("roadmap", topic),
+                    lambda: generate_detailed_roadmap(topic),
+                    f"roadmap {topic!r}"
+                )
+
+    def _warm_one(self, key, generate, label):
+        if GenerationCacheEntry.objects.filter(key=key).exists():
+            self.stdout.write(f"Already cached: {label}")
+            return
+        generate()
+        if GenerationCacheEntry.objects.filter(key=key).exists():
+            self.stdout.write(self.style.SUCCESS(f"Cached {label}"))
+        else:
+            self.stdout.write(self.style.WARNING(f"Generation failed, nothing cached for {label}"))
+
+    def stats(self):
+        totals = GenerationCacheEntry.objects.aggregate(
+            entries=Count("id"),
+            hits=Sum("hit_count")
+        )
+        self.stdout.write(f"Entries: {totals['entries']}")
+        self.stdout.write(f"Lifetime hits: {totals['hits'] or 0}")
+        for row in (
+            GenerationCacheEntry.objects
+            .values("kind")
+            .annotate(entries=Count("id"), hits=Sum("hit_count"))
+            .order_by("kind")
+        ):
+            self.stdout.write(f"  {row['kind']}: {row['entries']} entries, {row['hits'] or 0} hits")
+        # Misses have no row to count on; each server process counts its lookups
+        self.stdout.write(
+            "Hit/miss rates per server process: generation_cache_lookups_total at /metrics/ "
+            "(METRICS_ENABLED=True)"
+        )
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from modules.models import ModuleContent
+
+
+class Command(BaseCommand):
+    help = "Delete stored module bodies that no learning module references any more."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        deleted = ModuleContent.prune(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} unreferenced module bodies"))
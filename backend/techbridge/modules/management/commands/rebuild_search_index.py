@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from modules import search
+from modules.models import LearningModule, ModuleContent
+
+
+class Command(BaseCommand):
+    help = "Re-index every module body and topic for full-text search (e.g. after bulk imports)."
+
+    def handle(self, *args, **options):
+        backend = search.get_backend()
+        contents = modules = 0
+        with transaction.atomic(), connection.cursor() as cursor:
+            backend.clear(cursor)
+            for content in ModuleContent.objects.only("id", "body").iterator(chunk_size=500):
+                backend.index_content(cursor, content)
+                contents += 1
+            for module in LearningModule.objects.only("id", "topic").iterator(chunk_size=500):
+                backend.index_module(cursor, module)
+                modules += 1
+        self.stdout.write(self.style.SUCCESS(f"Indexed {contents} bodies and {modules} topics"))
@@ -0,0 +1,44 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from modules.jobs import Worker
+
+
+class Command(BaseCommand):
+    help = "Run a pool of workers that execute queued module and roadmap generation jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            help="Jobs to run in parallel (default: GENERATION_WORKER_CONCURRENCY)"
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait between polls when the queue is empty"
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once the queue is drained instead of polling forever"
+        )
+
+    def handle(self, *args, **options):
+        worker = Worker(
+            concurrency=options["concurrency"],
+            poll_interval=options["poll_interval"]
+        )
+
+        def shutdown(signum, frame):
+            self.stdout.write("Shutting down after in-flight jobs finish...")
+            worker.stop()
+
+        signal.signal(signal.SIGINT, shutdown)
+        signal.signal(signal.SIGTERM, shutdown)
+
+        self.stdout.write(f"Worker {worker.name} started with concurrency {worker.concurrency}")
+        worker.run(once=options["once"])
+        self.stdout.write(self.style.SUCCESS("Worker stopped"))
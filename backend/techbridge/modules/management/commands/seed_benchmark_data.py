@@ -0,0 +1,168 @@
+import json
+import random
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from accounts.models import Profile, User
+from analysis.models import PersonalityResult
+from modules import search
+from modules.gemini import _module_prompt, _test_prompt
+from modules.llm import FakeProvider
+from modules.models import LearningModule, ModuleContent, ModuleTest, ModuleTestAttempt
+
+TOPICS = [
+    "Python", "Docker", "Kubernetes", "React", "Django", "PostgreSQL", "Rust", "Go",
+    "Machine Learning", "Data Structures", "Algorithms", "Linux", "Git", "TypeScript",
+    "GraphQL", "Redis", "AWS", "Networking", "Operating Systems", "System Design",
+]
+DIFFICULTIES = ["beginner", "intermediate", "advanced"]
+LEVELS = {"slow": (5, 15), "average": (16, 30), "fast": (31, 45)}
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed verified users with profiles, assessments, modules, tests and attempts "
+        "for benchmark_api. Users are named <prefix>-<n>@example.invalid."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--modules-per-user", type=int, default=20)
+        parser.add_argument("--attempts-per-module", type=int, default=2)
+        parser.add_argument("--prefix", default="bench")
+        parser.add_argument("--password", default="benchmark-password")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Delete existing users with this prefix (and their data) first"
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        prefix = options["prefix"]
+        started = time.perf_counter()
+
+        with transaction.atomic():
+            if options["clear"]:
+                deleted = self._clear(prefix)
+                self.stdout.write(f"Removed {deleted} existing benchmark users")
+
+            users = self._users(options, prefix)
+            self._profiles(users, rng)
+            contents, questions = self._generated_material()
+            modules = self._modules(users, options["modules_per_user"], contents, rng)
+            self._tests_and_attempts(modules, questions, options["attempts_per_module"], rng)
+            self._index(modules)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(users)} users and {len(modules)} modules "
+            f"in {time.perf_counter() - started:.1f}s (password: {options['password']!r})"
+        ))
+
+    @staticmethod
+    def _clear(prefix):
+        users = User.objects.filter(email__startswith=f"{prefix}-", email__endswith="@example.invalid")
+        user_ids = list(users.values_list("id", flat=True))
+        module_ids = LearningModule.objects.filter(user_id__in=user_ids).values_list("id", flat=True)
+        for module_id in module_ids:
+            search.remove_module(module_id)
+        users.delete()
+        return len(user_ids)
+
+    @staticmethod
+    def _users(options, prefix):
+        # One hash for everybody: hashing per user would dominate seeding time
+        password = make_password(options["password"])
+        start = User.objects.filter(email__startswith=f"{prefix}-").count()
+        return User.objects.bulk_create([
+            User(
+                email=f"{prefix}-{i}@example.invalid",
+                password=password,
+                role="student",
+                verified=True,
+                onboarding_stage=3
+            )
+            for i in range(start, start + options["users"])
+        ])
+
+    @staticmethod
+    def _profiles(users, rng):
+        profiles, results = [], []
+        for user in users:
+            level = rng.choice(list(LEVELS))
+            profiles.append(Profile(user=user, learning_rate=level))
+            results.append(PersonalityResult(
+                user=user, total_score=rng.randint(*LEVELS[level]), learning_level=level
+            ))
+        Profile.objects.bulk_create(profiles)
+        PersonalityResult.objects.bulk_create(results)
+
+    @staticmethod
+    def _generated_material():
+        """Module bodies and test questions from the fake LLM, one per topic and difficulty."""
+        provider = FakeProvider(seed=0)
+        contents, questions = {}, {}
+        for topic in TOPICS:
+            for difficulty in DIFFICULTIES:
+                key = (topic, difficulty)
+                contents[key] = ModuleContent.intern(
+                    provider.generate(_module_prompt(topic, difficulty), purpose="module")
+                )
+                questions[key] = json.loads(
+                    provider.generate(_test_prompt(topic, difficulty, 5), purpose="test")
+                )
+        return contents, questions
+
+    @staticmethod
+    def _modules(users, per_user, contents, rng):
+        return LearningModule.objects.bulk_create(
+            [
+                LearningModule(
+                    user=user,
+                    topic=topic,
+                    difficulty=difficulty,
+                    module_content=contents[(topic, difficulty)],
+                    is_completed=rng.random() < 0.4
+                )
+                for user in users
+                for topic, difficulty in (
+                    (rng.choice(TOPICS), rng.choice(DIFFICULTIES)) for _ in range(per_user)
+                )
+            ],
+            batch_size=1000
+        )
+
+    @staticmethod
+    def _tests_and_attempts(modules, questions, per_module, rng):
+        ModuleTest.objects.bulk_create(
+            [
+                ModuleTest(module=module, questions=questions[(module.topic, module.difficulty)])
+                for module in modules
+            ],
+            batch_size=1000
+        )
+        attempts = []
+        for module in modules:
+            for _ in range(per_module):
+                score = rng.randint(0, 5)
+                attempts.append(ModuleTestAttempt(
+                    module=module,
+                    user_id=module.user_id,
+                    score=score,
+                    percentage=score * 20.0,
+                    passed=score >= 3
+                ))
+        ModuleTestAttempt.objects.bulk_create(attempts, batch_size=1000)
+
+    @staticmethod
+    def _index(modules):
+        # bulk_create sends no post_save, so index topics for search here;
+        # bodies were indexed when ModuleContent.intern created them
+        backend = search.get_backend()
+        with connection.cursor() as cursor:
+            for module in modules:
+                backend.index_module(cursor, module)
@@ -0,0 +1,61 @@
+import zlib
+
+from django.core.management.base import BaseCommand, CommandError
+
+from modules import compression
+from modules.models import ModuleContent
+
+
+def _compressed_size(samples, dictionary):
+    total = 0
+    for text in samples:
+        compressor = zlib.compressobj(9, zdict=dictionary) if dictionary else zlib.compressobj(9)
+        total += len(compressor.compress(text.encode("utf-8")) + compressor.flush()) + 1
+    return total
+
+
+class Command(BaseCommand):
+    help = (
+        "Train a compression dictionary on stored module bodies and save it as the next "
+        "version in COMPRESSION_DICTIONARY_DIR."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--samples", type=int, default=1000, help="Most recent module bodies to train on")
+        parser.add_argument("--size", type=int, default=32 * 1024, help="Maximum dictionary size in bytes")
+        parser.add_argument("--min-count", type=int, default=2, help="Documents a line must appear in")
+        parser.add_argument("--dry-run", action="store_true", help="Report the gain without saving")
+
+    def handle(self, *args, **options):
+        samples = [
+            content.body
+            for content in ModuleContent.objects.order_by("-id").only("body")[:options["samples"]]
+        ]
+        if len(samples) < 2:
+            raise CommandError("Need at least two stored module bodies to train on")
+
+        # Train on one half and measure on the other so the ratio isn't flattered
+        training, holdout = samples[::2], samples[1::2]
+        candidate = compression.train_dictionary(training, options["size"], options["min_count"])
+        if not candidate:
+            raise CommandError("No lines recur across the samples; nothing to train on")
+
+        current = compression.current_version()
+        raw = sum(len(text.encode("utf-8")) for text in holdout)
+        before = _compressed_size(holdout, compression.dictionary(current) if current else None)
+        after = _compressed_size(holdout, candidate)
+        self.stdout.write(
+            f"Held-out {len(holdout)} bodies, {raw:,} bytes: dictionary v{current} {raw / before:.2f}x, "
+            f"trained ({len(candidate):,} bytes) {raw / after:.2f}x"
+        )
+
+        if options["dry_run"]:
+            return
+        # Train the saved dictionary on every sample
+        version = compression.install_dictionary(
+            compression.train_dictionary(samples, options["size"], options["min_count"])
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Saved dictionary v{version}. Deploy the file to every server, then set "
+            f"COMPRESSION_DICTIONARY_VERSION={version}; existing rows keep their version."
+        ))
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:00
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('modules', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GenerationCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('kind', models.CharField(choices=[('module', 'Module content'), ('roadmap', 'Detailed roadmap')], max_length=20)),
+                ('topic', models.CharField(max_length=255)),
+                ('difficulty', models.CharField(blank=True, max_length=20)),
+                ('prompt_version', models.PositiveIntegerField()),
+                ('model_name', models.CharField(max_length=100)),
+                ('content', models.TextField()),
+                ('hit_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('modules', '0003_generationjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GenerationLock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('owner', models.CharField(max_length=200)),
+                ('expires_at', models.DateTimeField()),
+            ],
+        ),
+    ]
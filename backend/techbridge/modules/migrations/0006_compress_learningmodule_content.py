@@ -0,0 +1,163 @@
+# Generated by Django 5.2.5 on 2026-10-18 21:02
+
+import zlib
+
+from django.db import migrations, models
+
+import modules.fields
+
+BATCH_SIZE = 500
+
+# Frozen copy of modules.compression as of this migration: the format is a
+# version byte followed by a zlib stream primed with that version's
+# dictionary, and rows are written with v1, which is embedded below so that
+# retraining or removing dictionaries later can't change what this writes
+DICTIONARY_VERSION = 1
+DICTIONARY_V1 = (
+    b'Advanced certifications or specializations\n'
+    b'Where this technology is heading\n'
+    b'## 6. Future Trends & Next Steps\n'
+    b'Top 3 official documentations or repositories\n'
+    b'Checklist of skills acquired\n'
+    b"## 5. Master's Checklist & Resources\n"
+    b'- **Project C (Advanced)**: Scale or optimize\n'
+    b'- **Project B (Intermediate)**: Implement a core feature\n'
+    b'- **Project A (Beginner)**: Build something simple\n'
+    b'## 4. Hands-on Milestone Projects\n'
+    b'Foundational concepts needed\n'
+    b'Recommended tools/software\n'
+    b'## 2. Learning Prerequisites\n'
+    b"Why it's important in the current tech landscape\n"
+    b'Career prospects\n'
+    b'## 1. Executive Summary\n'
+    b'# Learning Roadmap: \n'
+    b'# Learning Module: \n'
+    b'## Introduction\n'
+    b'## Overview\n'
+    b'## Key Concepts\n'
+    b'## Examples\n'
+    b'## Summary\n'
+    b'Step-by-step explanation\n'
+    b'Best practices\n'
+    b'Practical applications\n'
+    b'```python\n'
+    b'\n'
+    b'```javascript\n'
+    b'\n'
+    b'```bash\n'
+    b'\n'
+    b'```\n'
+    b'\n'
+    b'> **Note:** \n'
+    b'> **Warning:** \n'
+    b'## 3. The Roadmap (Stage-by-Stage)\n'
+    b'### Stage \n'
+    b'- **Key Concepts**: \n'
+    b'- **Deep Dive**: \n'
+    b'- **Pro Tip**: \n'
+    b'- **Resource Indicator**: [Video] [Doc] [Book]\n'
+    b'\xf0\x9f\x9a\x80 \xf0\x9f\x93\x98 \xf0\x9f\x9b\xa0\xef\xb8\x8f \xe2\x9c\x85 \xf0\x9f\x92\xa1 \xf0\x9f\x8e\xaf \n'
+    b'\n'
+    b'---\n'
+    b'\n'
+    b'## \n'
+    b'\n'
+    b'\n'
+    b'### \n'
+    b'\n'
+    b'*   **\n'
+    b'\n'
+    b'- **\n'
+    b'**: \n'
+    b' the \n'
+    b' and \n'
+    b' to \n'
+    b' of \n'
+    b' in \n'
+    b' for \n'
+    b' with \n'
+    b' is '
+)
+
+
+def compress(text):
+    compressor = zlib.compressobj(9, zdict=DICTIONARY_V1)
+    body = compressor.compress(text.encode("utf-8")) + compressor.flush()
+    return bytes([DICTIONARY_VERSION]) + body
+
+
+def decompress(data):
+    data = bytes(data)
+    if data[0] == 0:
+        decompressor = zlib.decompressobj()
+    elif data[0] == DICTIONARY_VERSION:
+        decompressor = zlib.decompressobj(zdict=DICTIONARY_V1)
+    else:
+        # Written after this migration with a later dictionary
+        from modules.compression import decompress as decompress_later
+
+        return decompress_later(data)
+    return (decompressor.decompress(data[1:]) + decompressor.flush()).decode("utf-8")
+
+
+def compress_content(apps, schema_editor):
+    LearningModule = apps.get_model("modules", "LearningModule")
+    batch = []
+    for module in LearningModule.objects.only("id", "content").iterator(chunk_size=BATCH_SIZE):
+        module.content_compressed = compress(module.content)
+        batch.append(module)
+        if len(batch) >= BATCH_SIZE:
+            LearningModule.objects.bulk_update(batch, ["content_compressed"])
+            batch = []
+    if batch:
+        LearningModule.objects.bulk_update(batch, ["content_compressed"])
+
+
+def decompress_content(apps, schema_editor):
+    LearningModule = apps.get_model("modules", "LearningModule")
+    batch = []
+    # values_list hands back the stored bytes, which the frozen helper decodes
+    rows = LearningModule.objects.values_list("id", "content_compressed")
+    for pk, data in rows.iterator(chunk_size=BATCH_SIZE):
+        batch.append(LearningModule(id=pk, content=decompress(data)))
+        if len(batch) >= BATCH_SIZE:
+            LearningModule.objects.bulk_update(batch, ["content"])
+            batch = []
+    if batch:
+        LearningModule.objects.bulk_update(batch, ["content"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('modules', '0005_question_bank'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='learningmodule',
+            name='content_compressed',
+            field=modules.fields.CompressedTextField(null=True),
+        ),
+        # Nullable first so that unapplying can re-add the column before refilling it
+        migrations.AlterField(
+            model_name='learningmodule',
+            name='content',
+            field=models.TextField(null=True),
+        ),
+        migrations.RunPython(compress_content, decompress_content),
+        migrations.RemoveField(
+            model_name='learningmodule',
+            name='content',
+        ),
+        migrations.RenameField(
+            model_name='learningmodule',
+            old_name='content_compressed',
+            new_name='content',
+        ),
+        migrations.AlterField(
+            model_name='learningmodule',
+            name='content',
+            field=modules.fields.CompressedTextField(),
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 5.2.5 on 2026-10-18 21:40
+
+import hashlib
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+import modules.fields
+
+BATCH_SIZE = 500
+
+
+def share_content(apps, schema_editor):
+    LearningModule = apps.get_model("modules", "LearningModule")
+    ModuleContent = apps.get_model("modules", "ModuleContent")
+
+    content_ids = {}
+    batch = []
+    for module in LearningModule.objects.only("id", "content").iterator(chunk_size=BATCH_SIZE):
+        digest = hashlib.sha256(module.content.encode("utf-8")).hexdigest()
+        if digest not in content_ids:
+            content_ids[digest] = ModuleContent.objects.create(digest=digest, body=module.content).id
+        module.module_content_id = content_ids[digest]
+        batch.append(module)
+        if len(batch) >= BATCH_SIZE:
+            LearningModule.objects.bulk_update(batch, ["module_content"])
+            batch = []
+    if batch:
+        LearningModule.objects.bulk_update(batch, ["module_content"])
+
+
+def copy_content_back(apps, schema_editor):
+    LearningModule = apps.get_model("modules", "LearningModule")
+    batch = []
+    modules = LearningModule.objects.select_related("module_content").only(
+        "id", "module_content__body"
+    )
+    for module in modules.iterator(chunk_size=BATCH_SIZE):
+        module.content = module.module_content.body
+        batch.append(module)
+        if len(batch) >= BATCH_SIZE:
+            LearningModule.objects.bulk_update(batch, ["content"])
+            batch = []
+    if batch:
+        LearningModule.objects.bulk_update(batch, ["content"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('modules', '0006_compress_learningmodule_content'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModuleContent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(max_length=64, unique=True)),
+                ('body', modules.fields.CompressedTextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='learningmodule',
+            name='module_content',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='modules', to='modules.modulecontent'),
+        ),
+        # Nullable first so that unapplying can re-add the column before refilling it
+        migrations.AlterField(
+            model_name='learningmodule',
+            name='content',
+            field=modules.fields.CompressedTextField(null=True),
+        ),
+        migrations.RunPython(share_content, copy_content_back),
+        migrations.RemoveField(
+            model_name='learningmodule',
+            name='content',
+        ),
+        migrations.AlterField(
+            model_name='learningmodule',
+            name='module_content',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='modules', to='modules.modulecontent'),
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.5 on 2026-10-18 22:30
+
+from django.db import migrations
+
+SQLITE_TABLE = "modules_learningmodule_fts"
+POSTGRES_TABLE = "modules_learningmodule_search"
+
+
+def create_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {SQLITE_TABLE} USING fts5("
+            "topic, content, user_id UNINDEXED, "
+            "tokenize = 'porter unicode61 remove_diacritics 2')"
+        )
+        insert = f"INSERT INTO {SQLITE_TABLE} (rowid, topic, content, user_id) VALUES (%s, %s, %s, %s)"
+    elif vendor == "postgresql":
+        schema_editor.execute(
+            f"""
+            CREATE TABLE {POSTGRES_TABLE} (
+                module_id bigint PRIMARY KEY
+                    REFERENCES modules_learningmodule (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED,
+                user_id bigint NOT NULL,
+                topic text NOT NULL,
+                content text NOT NULL,
+                document tsvector GENERATED ALWAYS AS (
+                    setweight(to_tsvector('english', topic), 'A') ||
+                    setweight(to_tsvector('english', content), 'B')
+                ) STORED
+            )
+            """
+        )
+        schema_editor.execute(
+            f"CREATE INDEX {POSTGRES_TABLE}_document ON {POSTGRES_TABLE} USING GIN (document)"
+        )
+        schema_editor.execute(
+            f"CREATE INDEX {POSTGRES_TABLE}_user ON {POSTGRES_TABLE} (user_id)"
+        )
+        insert = f"INSERT INTO {POSTGRES_TABLE} (module_id, topic, content, user_id) VALUES (%s, %s, %s, %s)"
+    else:
+        return
+
+    LearningModule = apps.get_model("modules", "LearningModule")
+    modules = LearningModule.objects.select_related("module_content").only(
+        "id", "topic", "user_id", "module_content__body"
+    )
+    with schema_editor.connection.cursor() as cursor:
+        for module in modules.iterator(chunk_size=500):
+            cursor.execute(insert, [module.id, module.topic, module.module_content.body, module.user_id])
+
+
+def drop_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {SQLITE_TABLE}")
+    elif vendor == "postgresql":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {POSTGRES_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('modules', '0008_canonicaltopic'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('modules', '0009_module_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='learningmodule',
+            index=models.Index(fields=['user', '-created_at'], name='modules_lm_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='moduletestattempt',
+            index=models.Index(fields=['module', 'user', '-created_at'], name='modules_mta_module_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='moduletestattempt',
+            index=models.Index(fields=['user', '-created_at'], name='modules_mta_user_created_idx'),
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 5.2.5 on 2026-10-18 20:20
+
+from importlib import import_module
+
+from django.db import migrations
+
+OLD_SQLITE_TABLE = "modules_learningmodule_fts"
+OLD_POSTGRES_TABLE = "modules_learningmodule_search"
+
+SQLITE_TOPIC_TABLE = "modules_learningmodule_topic_fts"
+SQLITE_CONTENT_TABLE = "modules_modulecontent_fts"
+POSTGRES_CONTENT_TABLE = "modules_modulecontent_search"
+
+TOKENIZE = "tokenize = 'porter unicode61 remove_diacritics 2'"
+
+
+def create_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {OLD_SQLITE_TABLE}")
+        schema_editor.execute(f"CREATE VIRTUAL TABLE {SQLITE_TOPIC_TABLE} USING fts5(topic, {TOKENIZE})")
+        # Contentless: only the index is stored, never a copy of the body
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {SQLITE_CONTENT_TABLE} USING fts5(body, content='', {TOKENIZE})"
+        )
+        insert_content = f"INSERT INTO {SQLITE_CONTENT_TABLE} (rowid, body) VALUES (%s, %s)"
+    elif vendor == "postgresql":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {OLD_POSTGRES_TABLE}")
+        schema_editor.execute(
+            f"""
+            CREATE TABLE {POSTGRES_CONTENT_TABLE} (
+                content_id bigint PRIMARY KEY
+                    REFERENCES modules_modulecontent (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED,
+                document tsvector NOT NULL
+            )
+            """
+        )
+        insert_content = (
+            f"INSERT INTO {POSTGRES_CONTENT_TABLE} (content_id, document) "
+            "VALUES (%s, setweight(to_tsvector('english', %s), 'B'))"
+        )
+    else:
+        return
+
+    ModuleContent = apps.get_model("modules", "ModuleContent")
+    LearningModule = apps.get_model("modules", "LearningModule")
+    with schema_editor.connection.cursor() as cursor:
+        for content in ModuleContent.objects.only("id", "body").iterator(chunk_size=500):
+            cursor.execute(insert_content, [content.id, str(content.body)])
+        if vendor == "sqlite":
+            for module in LearningModule.objects.only("id", "topic").iterator(chunk_size=500):
+                cursor.execute(
+                    f"INSERT INTO {SQLITE_TOPIC_TABLE} (rowid, topic) VALUES (%s, %s)",
+                    [module.id, module.topic]
+                )
+
+
+def drop_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {SQLITE_TOPIC_TABLE}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {SQLITE_CONTENT_TABLE}")
+    elif vendor == "postgresql":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {POSTGRES_CONTENT_TABLE}")
+    import_module("modules.migrations.0009_module_search_index").create_index(apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('modules', '0010_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -1,6 +1,58 @@
-from django.db import models
+import hashlib
+
+from django.db import models, transaction
+from django.utils import timezone
 from accounts.models import User
 
+from .fields import CompressedTextField
+
+
+class ModuleContent(models.Model):
+    """Generated module body, stored once per distinct text and shared between modules."""
+    digest = models.CharField(max_length=64, unique=True)
+    body = CompressedTextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    @staticmethod
+    def digest_for(body):
+        return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def intern(cls, body):
+        """
+        Return the row holding ``body``, creating it if this text is new.
+
+        Call it in the transaction that saves the module referencing the row:
+        the row stays locked until then, so ``prune`` can't delete it first.
+        """
+        digest = cls.digest_for(body)
+        with transaction.atomic():
+            content = cls.objects.select_for_update(no_key=True).filter(digest=digest).first()
+            if content is None:
+                content, _ = cls.objects.get_or_create(digest=digest, defaults={"body": body})
+        return content
+
+    @classmethod
+    def prune(cls, batch_size=1000):
+        """Delete bodies no module references any more; returns how many were deleted."""
+        unreferenced = ~models.Exists(LearningModule.objects.filter(module_content=models.OuterRef("pk")))
+        total = 0
+        while True:
+            with transaction.atomic():
+                # Rows being interned right now are locked and skipped
+                ids = list(
+                    cls.objects.filter(unreferenced)
+                    .select_for_update(skip_locked=True)
+                    .values_list("id", flat=True)[:batch_size]
+                )
+                deleted, _ = cls.objects.filter(unreferenced, id__in=ids).delete()
+            total += deleted
+            if len(ids) < batch_size:
+                return total
+
+    def __str__(self):
+        return self.digest[:12]
+
 
 class LearningModule(models.Model):
     DIFFICULTY_CHOICES = (
@@ -12,13 +64,47 @@ class LearningModule(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     topic = models.CharField(max_length=255)
     difficulty = models.CharField(max_length=20, choices=DIFFICULTY_CHOICES)
-    content = models.TextField()
+    module_content = models.ForeignKey(
+        ModuleContent,
+        on_delete=models.PROTECT,
+        related_name="modules"
+    )
 
     is_completed = models.BooleanField(default=False)
     retry_count = models.IntegerField(default=0)
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    @property
+    def content(self):
+        pending = getattr(self, "_pending_content", None)
+        if pending is not None:
+            return pending
+        if self.module_content_id is None:
+            return None
+        return self.module_content.body
+
+    @content.setter
+    def content(self, value):
+        # Interned into ModuleContent by save(); assigning runs no queries
+        self._pending_content = value
+
+    def save(self, *args, **kwargs):
+        pending = getattr(self, "_pending_content", None)
+        if pending is None:
+            return super().save(*args, **kwargs)
+        with transaction.atomic():
+            # Identical bodies resolve to the same ModuleContent row
+            self.module_content = ModuleContent.intern(pending)
+            super().save(*args, **kwargs)
+        self._pending_content = None
+
+    class Meta:
+        indexes = [
+            # History, progress and search fallback: a user's modules, newest first
+            models.Index(fields=["user", "-created_at"], name="modules_lm_user_created_idx"),
+        ]
+
     def __str__(self):
         return f"{self.topic} - {self.user.email}"
 
@@ -41,3 +127,138 @@ class ModuleTestAttempt(models.Model):
     passed = models.BooleanField()
 
     created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Latest attempt per module (progress subqueries)
+            models.Index(fields=["module", "user", "-created_at"], name="modules_mta_module_user_idx"),
+            # A user's recent attempts (activity feed)
+            models.Index(fields=["user", "-created_at"], name="modules_mta_user_created_idx"),
+        ]
+
+
+class CanonicalTopic(models.Model):
+    """A distinct learning topic; free-text requests are mapped onto these (modules.topics)."""
+    key = models.CharField(max_length=255, unique=True)  # sorted normalized tokens
+    name = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+
+class GenerationCacheEntry(models.Model):
+    """Generated LLM output keyed on a normalized request fingerprint."""
+
+    KIND_CHOICES = (
+        ("module", "Module content"),
+        ("roadmap", "Detailed roadmap"),
+    )
+
+    key = models.CharField(max_length=64, unique=True)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    topic = models.CharField(max_length=255)
+    difficulty = models.CharField(max_length=20, blank=True)
+    prompt_version = models.PositiveIntegerField()
+    model_name = models.CharField(max_length=100)
+    content = models.TextField()
+
+    hit_count = models.PositiveIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.kind}: {self.topic} ({self.difficulty or '-'})"
+
+
+class GenerationJob(models.Model):
+    """A queued LLM generation, executed by ``manage.py run_generation_workers``."""
+
+    KIND_CHOICES = (
+        ("module", "Learning module"),
+        ("roadmap", "Learning roadmap"),
+    )
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_SUCCEEDED = "succeeded"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = (
+        (STATUS_QUEUED, "Queued"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_SUCCEEDED, "Succeeded"),
+        (STATUS_FAILED, "Failed"),
+    )
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    topic = models.CharField(max_length=255)
+    difficulty = models.CharField(max_length=20, choices=LearningModule.DIFFICULTY_CHOICES)
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    progress = models.PositiveSmallIntegerField(default=0)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    error = models.TextField(blank=True)
+
+    available_at = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+
+    module = models.ForeignKey(LearningModule, null=True, blank=True, on_delete=models.SET_NULL)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "available_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} job for {self.topic} ({self.status})"
+
+
+class GenerationLock(models.Model):
+    """Cross-process lease on a generation key, used to coalesce identical requests."""
+
+    key = models.CharField(max_length=64, unique=True)
+    owner = models.CharField(max_length=200)
+    expires_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.key} held by {self.owner}"
+
+
+class QuestionBankItem(models.Model):
+    """A generated MCQ, pooled per normalized topic and difficulty."""
+
+    topic_key = models.CharField(max_length=255)
+    difficulty = models.CharField(max_length=20, choices=LearningModule.DIFFICULTY_CHOICES)
+    fingerprint = models.CharField(max_length=64, unique=True)
+
+    question = models.TextField()
+    options = models.JSONField()
+    correct_answer = models.CharField(max_length=1)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["topic_key", "difficulty"]),
+        ]
+
+    def __str__(self):
+        return self.question[:50]
+
+
+class SeenQuestion(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    item = models.ForeignKey(QuestionBankItem, on_delete=models.CASCADE, related_name="seen_by")
+    seen_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "item"], name="unique_seen_question"),
+        ]
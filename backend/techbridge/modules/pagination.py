@@ -0,0 +1,68 @@
+from rest_framework.pagination import BasePagination, CursorPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def _positive_int(value, default):
+    try:
+        return max(int(value), 1)
+    except (TypeError, ValueError):
+        return default
+
+
+class LearningHistoryPagination(CursorPagination):
+    """Newest-first cursor pagination; stable under concurrent inserts."""
+
+    ordering = "-created_at"
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class SearchResultsPagination(BasePagination):
+    """
+    Page-number pagination for ranked search results.
+
+    Fetches one extra hit to tell whether there is a next page instead of
+    running a COUNT over the match set.
+    """
+
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    page_query_param = "page"
+
+    def paginate_hits(self, request, search):
+        """Call ``search(limit, offset)`` for the requested page and return its hits."""
+        self.request = request
+        self.page = _positive_int(request.query_params.get(self.page_query_param), 1)
+        self.page_size_for_request = min(
+            _positive_int(request.query_params.get(self.page_size_query_param), self.page_size),
+            self.max_page_size
+        )
+
+        hits = search(self.page_size_for_request + 1, (self.page - 1) * self.page_size_for_request)
+        self.has_next = len(hits) > self.page_size_for_request
+        return hits[:self.page_size_for_request]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.page_query_param, self.page + 1
+        )
+
+    def get_previous_link(self):
+        if self.page == 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.page == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, self.page - 1)
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
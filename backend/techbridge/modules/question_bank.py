@@ -0,0 +1,112 @@
+"""
+Per-topic pool of generated MCQs.
+
+Questions are generated in batches of ``QUESTION_BANK_BATCH_SIZE`` and
+stored once; tests are drawn from the pool, skipping questions the user
+has already seen, so creating or regenerating a test is usually a pure
+database read.
+"""
+import hashlib
+import logging
+import random
+
+from django.conf import settings
+
+from .cache import normalize_topic
+from .gemini import generate_question_pool, generate_test
+from .models import QuestionBankItem, SeenQuestion
+from .singleflight import coalesce
+
+logger = logging.getLogger(__name__)
+
+QUESTIONS_PER_TEST = 5
+
+
+def _fingerprint(topic_key, difficulty, question):
+    raw = "\x1f".join([topic_key, difficulty, " ".join(question.split()).casefold()])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _is_valid(question):
+    return (
+        isinstance(question, dict)
+        and isinstance(question.get("question"), str)
+        and question["question"].strip()
+        and isinstance(question.get("options"), dict)
+        and question.get("correct_answer") in question["options"]
+    )
+
+
+def refill(topic, difficulty, count=None):
+    """Generate a batch of questions in one call and add the new ones to the bank."""
+    topic_key = normalize_topic(topic)
+    questions = generate_question_pool(
+        topic, difficulty, count or settings.QUESTION_BANK_BATCH_SIZE
+    )
+    items = [
+        QuestionBankItem(
+            topic_key=topic_key,
+            difficulty=difficulty,
+            fingerprint=_fingerprint(topic_key, difficulty, q["question"]),
+            question=q["question"].strip(),
+            options=q["options"],
+            correct_answer=q["correct_answer"]
+        )
+        for q in questions if _is_valid(q)
+    ]
+    QuestionBankItem.objects.bulk_create(items, ignore_conflicts=True)
+    return len(items)
+
+
+def _sample(user, topic_key, difficulty, count):
+    bank = QuestionBankItem.objects.filter(topic_key=topic_key, difficulty=difficulty)
+    ids = list(bank.exclude(seen_by__user=user).values_list("id", flat=True))
+    if len(ids) < count:
+        return None
+    return random.sample(ids, count)
+
+
+def draw_questions(user, topic, difficulty, count=QUESTIONS_PER_TEST, fallback=True):
+    """
+    Return ``count`` questions ``user`` has not seen, topping up the bank if
+    needed. ``fallback`` is passed on to ``generate_test`` for when the bank
+    can't supply enough questions at all.
+    """
+    topic_key = normalize_topic(topic)
+
+    ids = _sample(user, topic_key, difficulty, count)
+    if ids is None:
+        try:
+            # Concurrent draws for the same topic share one refill
+            coalesce(f"bank:{difficulty}:{topic_key}", lambda: refill(topic, difficulty))
+        except Exception as e:
+            logger.error(f"Question bank refill failed for {topic}: {str(e)}")
+        ids = _sample(user, topic_key, difficulty, count)
+
+    if ids is None:
+        # Refill failed or only produced duplicates: allow repeats
+        ids = list(
+            QuestionBankItem.objects
+            .filter(topic_key=topic_key, difficulty=difficulty)
+            .order_by("?")
+            .values_list("id", flat=True)[:count]
+        )
+        if len(ids) < count:
+            return generate_test(topic, difficulty, fallback=fallback)
+
+    items = QuestionBankItem.objects.in_bulk(ids)
+    SeenQuestion.objects.bulk_create(
+        [SeenQuestion(user=user, item_id=item_id) for item_id in ids],
+        ignore_conflicts=True
+    )
+
+    return [
+        {
+            "id": number,
+            "bank_id": items[item_id].id,
+            "question": items[item_id].question,
+            "options": items[item_id].options,
+            "correct_answer": items[item_id].correct_answer
+        }
+        for number, item_id in enumerate(ids, start=1)
+    ]
@@ -0,0 +1,290 @@
+"""
+Full-text search over a user's modules.
+
+Module bodies are shared between modules (``ModuleContent``), so each body
+is indexed once, by content id, and a module's topic is indexed by module
+id. Neither index keeps a copy of the body text. A search starts from the
+user's own modules and probes the indexes for each of them, so its cost
+follows the size of that user's history, not of the whole corpus. The
+backend follows the database:
+
+* SQLite: FTS5 tables ranked with bm25; the body table is contentless
+* PostgreSQL: a stored ``tsvector`` per body, ranked with ``ts_rank_cd``
+  together with the module's topic
+* anything else: a plain ``icontains`` match on the topic
+
+Snippets are cut from the body in Python for the returned page only. The
+text is HTML-escaped before matched words are wrapped in ``<mark>``, so
+generated content can never inject markup.
+
+The tables are created by migration 0011 and kept up to date by
+``modules.signals``.
+"""
+import html
+import re
+
+from django.db import connection
+
+SQLITE_TOPIC_TABLE = "modules_learningmodule_topic_fts"
+SQLITE_CONTENT_TABLE = "modules_modulecontent_fts"
+POSTGRES_CONTENT_TABLE = "modules_modulecontent_search"
+
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_STOP = "</mark>"
+SNIPPET_WORDS = 24
+MAX_QUERY_WORDS = 8
+
+# Topic matches count this many times more than body matches
+TOPIC_WEIGHT = 5.0
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+_SUFFIXES = ("ing", "es", "ed", "s")
+
+
+class SearchHit:
+    def __init__(self, module_id, snippet, rank):
+        self.module_id = module_id
+        self.snippet = snippet
+        self.rank = rank
+
+
+class SQLiteBackend:
+    def index_module(self, cursor, module):
+        cursor.execute(f"DELETE FROM {SQLITE_TOPIC_TABLE} WHERE rowid = %s", [module.id])
+        cursor.execute(
+            f"INSERT INTO {SQLITE_TOPIC_TABLE} (rowid, topic) VALUES (%s, %s)",
+            [module.id, module.topic]
+        )
+
+    def remove_module(self, cursor, module_id):
+        cursor.execute(f"DELETE FROM {SQLITE_TOPIC_TABLE} WHERE rowid = %s", [module_id])
+
+    def index_content(self, cursor, content):
+        cursor.execute(
+            f"INSERT INTO {SQLITE_CONTENT_TABLE} (rowid, body) VALUES (%s, %s)",
+            [content.id, str(content.body)]
+        )
+
+    def remove_content(self, cursor, content):
+        # A contentless table can only forget a row given the text it indexed
+        cursor.execute(
+            f"INSERT INTO {SQLITE_CONTENT_TABLE} ({SQLITE_CONTENT_TABLE}, rowid, body) "
+            "VALUES ('delete', %s, %s)",
+            [content.id, str(content.body)]
+        )
+
+    def clear(self, cursor):
+        cursor.execute(f"DELETE FROM {SQLITE_TOPIC_TABLE}")
+        cursor.execute(
+            f"INSERT INTO {SQLITE_CONTENT_TABLE} ({SQLITE_CONTENT_TABLE}) VALUES ('delete-all')"
+        )
+
+    @staticmethod
+    def _match_terms(query):
+        # Quote every word so FTS5 syntax in user input is matched literally;
+        # the last word is a prefix so results follow typing
+        words = _WORD.findall(query)[:MAX_QUERY_WORDS]
+        terms = [f'"{word}"' for word in words]
+        if terms:
+            terms[-1] += "*"
+        return terms
+
+    def search(self, cursor, user_id, query, limit, offset):
+        terms = self._match_terms(query)
+        if not terms:
+            return []
+        # Every word must appear in the topic or the body, like a single
+        # document; each of the user's modules probes both indexes by rowid
+        word_matches = " AND ".join(
+            f"""
+            (EXISTS (SELECT 1 FROM {SQLITE_TOPIC_TABLE}
+                     WHERE {SQLITE_TOPIC_TABLE}.rowid = m.id AND {SQLITE_TOPIC_TABLE} MATCH %s)
+             OR EXISTS (SELECT 1 FROM {SQLITE_CONTENT_TABLE}
+                        WHERE {SQLITE_CONTENT_TABLE}.rowid = m.module_content_id
+                          AND {SQLITE_CONTENT_TABLE} MATCH %s))
+            """
+            for _ in terms
+        )
+        any_word = " OR ".join(terms)
+        # The CTE is materialized so the rank probes run once per module
+        cursor.execute(
+            f"""
+            WITH ranks AS MATERIALIZED (
+                SELECT m.id,
+                       (SELECT bm25({SQLITE_TOPIC_TABLE}) FROM {SQLITE_TOPIC_TABLE}
+                        WHERE {SQLITE_TOPIC_TABLE}.rowid = m.id
+                          AND {SQLITE_TOPIC_TABLE} MATCH %s) AS topic_rank,
+                       (SELECT bm25({SQLITE_CONTENT_TABLE}) FROM {SQLITE_CONTENT_TABLE}
+                        WHERE {SQLITE_CONTENT_TABLE}.rowid = m.module_content_id
+                          AND {SQLITE_CONTENT_TABLE} MATCH %s) AS body_rank
+                FROM modules_learningmodule m
+                WHERE m.user_id = %s AND {word_matches}
+            )
+            SELECT id, -(%s * IFNULL(topic_rank, 0) + IFNULL(body_rank, 0)) AS rank
+            FROM ranks
+            ORDER BY rank DESC, id DESC
+            LIMIT %s OFFSET %s
+            """,
+            [any_word, any_word, user_id, *[t for term in terms for t in (term, term)],
+             TOPIC_WEIGHT, limit, offset]
+        )
+        # bm25 is lower-is-better; the sign is flipped so higher rank means a better match
+        return cursor.fetchall()
+
+
+class PostgresBackend:
+    def index_module(self, cursor, module):
+        # Topics are short and vectorised at query time
+        pass
+
+    def remove_module(self, cursor, module_id):
+        pass
+
+    def index_content(self, cursor, content):
+        cursor.execute(
+            f"""
+            INSERT INTO {POSTGRES_CONTENT_TABLE} (content_id, document)
+            VALUES (%s, setweight(to_tsvector('english', %s), 'B'))
+            ON CONFLICT (content_id) DO NOTHING
+            """,
+            [content.id, str(content.body)]
+        )
+
+    def remove_content(self, cursor, content):
+        cursor.execute(f"DELETE FROM {POSTGRES_CONTENT_TABLE} WHERE content_id = %s", [content.id])
+
+    def clear(self, cursor):
+        cursor.execute(f"DELETE FROM {POSTGRES_CONTENT_TABLE}")
+
+    def search(self, cursor, user_id, query, limit, offset):
+        cursor.execute(
+            f"""
+            SELECT d.id, ts_rank_cd(d.document, q) AS rank FROM (
+                SELECT m.id,
+                       setweight(to_tsvector('english', m.topic), 'A')
+                           || coalesce(c.document, ''::tsvector) AS document
+                FROM modules_learningmodule m
+                LEFT JOIN {POSTGRES_CONTENT_TABLE} c ON c.content_id = m.module_content_id
+                WHERE m.user_id = %s
+            ) d, websearch_to_tsquery('english', %s) q
+            WHERE d.document @@ q
+            ORDER BY rank DESC, d.id DESC
+            LIMIT %s OFFSET %s
+            """,
+            [user_id, query, limit, offset]
+        )
+        return cursor.fetchall()
+
+
+class FallbackBackend:
+    def index_module(self, cursor, module):
+        pass
+
+    def remove_module(self, cursor, module_id):
+        pass
+
+    def index_content(self, cursor, content):
+        pass
+
+    def remove_content(self, cursor, content):
+        pass
+
+    def clear(self, cursor):
+        pass
+
+    def search(self, cursor, user_id, query, limit, offset):
+        from .models import LearningModule
+
+        ids = (
+            LearningModule.objects
+            .filter(user_id=user_id, topic__icontains=query.strip())
+            .order_by("-created_at")
+            .values_list("id", flat=True)[offset:offset + limit]
+        )
+        return [(module_id, 0.0) for module_id in ids]
+
+
+_BACKENDS = {
+    "sqlite": SQLiteBackend(),
+    "postgresql": PostgresBackend(),
+}
+
+
+def get_backend(using=None):
+    return _BACKENDS.get((using or connection).vendor, FallbackBackend())
+
+
+def index_module(module):
+    with connection.cursor() as cursor:
+        get_backend().index_module(cursor, module)
+
+
+def remove_module(module_id):
+    with connection.cursor() as cursor:
+        get_backend().remove_module(cursor, module_id)
+
+
+def index_content(content):
+    with connection.cursor() as cursor:
+        get_backend().index_content(cursor, content)
+
+
+def remove_content(content):
+    with connection.cursor() as cursor:
+        get_backend().remove_content(cursor, content)
+
+
+def _stem(word):
+    # Close enough to the indexes' English stemming to find the words they matched
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)]
+    return word
+
+
+def make_snippet(text, query, words=SNIPPET_WORDS):
+    """
+    Escaped excerpt of ``text`` around the first word matching ``query``,
+    with every matching word wrapped in ``HIGHLIGHT_START``/``HIGHLIGHT_STOP``.
+    """
+    stems = tuple({_stem(word) for word in _WORD.findall(query.casefold())})
+    tokens = list(_WORD.finditer(text))
+    if not tokens:
+        return ""
+
+    matches = [bool(stems) and t.group().casefold().startswith(stems) for t in tokens]
+    first = matches.index(True) if True in matches else 0
+    start = max(0, min(first - 3, len(tokens) - words))
+    end = min(len(tokens), start + words)
+
+    parts = ["…"] if start else []
+    position = tokens[start].start()
+    for token, matched in zip(tokens[start:end], matches[start:end]):
+        parts.append(html.escape(text[position:token.start()]))
+        word = html.escape(token.group())
+        parts.append(f"{HIGHLIGHT_START}{word}{HIGHLIGHT_STOP}" if matched else word)
+        position = token.end()
+    if end < len(tokens):
+        parts.append("…")
+    return "".join(parts)
+
+
+def search_modules(user, query, limit=20, offset=0):
+    """Ranked ``SearchHit`` list of ``user``'s modules matching ``query``."""
+    from .models import LearningModule, ModuleContent
+
+    with connection.cursor() as cursor:
+        ranked = get_backend().search(cursor, user.id, query, limit, offset)
+
+    # values_list skips the field's lazy descriptor, so decode the bodies here
+    body_field = ModuleContent._meta.get_field("body")
+    bodies = {
+        module_id: body_field.to_python(body)
+        for module_id, body in LearningModule.objects
+        .filter(id__in=[module_id for module_id, _ in ranked])
+        .values_list("id", "module_content__body")
+    }
+    return [
+        SearchHit(module_id, make_snippet(bodies.get(module_id, ""), query), float(rank))
+        for module_id, rank in ranked
+    ]
@@ -1,14 +1,58 @@
 from rest_framework import serializers
-from .models import LearningModule, ModuleTest
+from .models import LearningModule, ModuleTest, GenerationJob
 
 
 class LearningModuleSerializer(serializers.ModelSerializer):
+    content = serializers.CharField()
+
     class Meta:
         model = LearningModule
-        fields = "__all__"
+        exclude = ["module_content"]
+
+
+class LearningModuleListSerializer(serializers.ModelSerializer):
+    """
+    Lightweight module listing.
+
+    ``content`` is left out unless asked for; pass ``fields`` to project
+    the output down to a subset of ``Meta.fields``.
+    """
+
+    DEFAULT_FIELDS = ["id", "topic", "difficulty", "is_completed", "retry_count", "created_at"]
+
+    content = serializers.CharField()
+
+    class Meta:
+        model = LearningModule
+        fields = ["id", "topic", "difficulty", "content", "is_completed", "retry_count", "created_at"]
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        keep = set(fields or self.DEFAULT_FIELDS)
+        for name in list(self.fields):
+            if name not in keep:
+                self.fields.pop(name)
 
 
 class ModuleTestSerializer(serializers.ModelSerializer):
     class Meta:
         model = ModuleTest
         fields = "__all__"
+
+
+class GenerationJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = GenerationJob
+        fields = [
+            "id",
+            "kind",
+            "topic",
+            "difficulty",
+            "status",
+            "progress",
+            "attempts",
+            "error",
+            "module",
+            "created_at",
+            "updated_at",
+        ]
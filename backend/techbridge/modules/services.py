@@ -1,3 +1,18 @@
+from django.conf import settings
+from django.db import transaction
+
+from accounts.models import Profile
+from .models import LearningModule, ModuleTest
+
+# Elo rating of each difficulty; a learner rated at a difficulty's rating
+# is expected to score 50% on its tests
+DIFFICULTY_RATINGS = {
+    "beginner": 1000.0,
+    "intermediate": 1200.0,
+    "advanced": 1400.0,
+}
+
+
 def map_learning_level_to_difficulty(level):
     return {
         "slow": "beginner",
@@ -6,6 +21,56 @@ def map_learning_level_to_difficulty(level):
     }.get(level, "beginner")
 
 
+def initial_skill_rating(profile):
+    """Starting rating for a learner who has not taken a module test yet."""
+    return DIFFICULTY_RATINGS[map_learning_level_to_difficulty(profile.learning_rate)]
+
+
+def map_skill_rating_to_difficulty(rating):
+    """Difficulty whose rating is closest to ``rating``."""
+    return min(DIFFICULTY_RATINGS, key=lambda d: abs(DIFFICULTY_RATINGS[d] - rating))
+
+
+def difficulty_for_profile(profile):
+    if profile.skill_rating is None:
+        return map_learning_level_to_difficulty(profile.learning_rate)
+    return map_skill_rating_to_difficulty(profile.skill_rating)
+
+
+def expected_score(rating, difficulty):
+    return 1 / (1 + 10 ** ((DIFFICULTY_RATINGS[difficulty] - rating) / 400))
+
+
+def update_skill_rating(user, difficulty, percentage):
+    """
+    Fold one test result into the learner's rating and return the profile.
+
+    The test score (0-1) is the Elo outcome against the module's difficulty
+    rating, so each submission is a constant-time update of the stored
+    rating rather than a pass over the attempt history. Users created
+    outside registration (e.g. ``createsuperuser``) get a profile here.
+    """
+    with transaction.atomic():
+        profile, _ = (
+            Profile.objects.select_for_update()
+            .only("learning_rate", "skill_rating", "rated_attempts")
+            .get_or_create(user=user)
+        )
+        rating = profile.skill_rating
+        if rating is None:
+            rating = initial_skill_rating(profile)
+
+        if profile.rated_attempts < settings.SKILL_RATING_PROVISIONAL_ATTEMPTS:
+            k = settings.SKILL_RATING_K_PROVISIONAL
+        else:
+            k = settings.SKILL_RATING_K
+
+        profile.skill_rating = rating + k * (percentage / 100 - expected_score(rating, difficulty))
+        profile.rated_attempts += 1
+        profile.save(update_fields=["skill_rating", "rated_attempts"])
+    return profile
+
+
 def evaluate_test(questions, user_answers):
     correct = 0
 
@@ -18,3 +83,18 @@ def evaluate_test(questions, user_answers):
     percentage = (correct / total) * 100
 
     return correct, percentage
+
+
+def create_module_with_test(user, topic, difficulty, content, questions):
+    with transaction.atomic():
+        module = LearningModule.objects.create(
+            user=user,
+            topic=topic,
+            difficulty=difficulty,
+            content=content
+        )
+        test = ModuleTest.objects.create(
+            module=module,
+            questions=questions
+        )
+    return module, test
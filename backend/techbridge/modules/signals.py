@@ -0,0 +1,32 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import search
+from .models import LearningModule, ModuleContent
+
+_INDEXED_FIELDS = {"topic"}
+
+
+@receiver(post_save, sender=LearningModule)
+def index_module(sender, instance, update_fields=None, **kwargs):
+    # Saves that only touch progress fields leave the indexed topic unchanged
+    if update_fields is not None and not _INDEXED_FIELDS & set(update_fields):
+        return
+    search.index_module(instance)
+
+
+@receiver(post_delete, sender=LearningModule)
+def unindex_module(sender, instance, **kwargs):
+    search.remove_module(instance.pk)
+
+
+@receiver(post_save, sender=ModuleContent)
+def index_content(sender, instance, created=False, **kwargs):
+    # Bodies never change once stored, so only new rows need indexing
+    if created:
+        search.index_content(instance)
+
+
+@receiver(post_delete, sender=ModuleContent)
+def unindex_content(sender, instance, **kwargs):
+    search.remove_content(instance)
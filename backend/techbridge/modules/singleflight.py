@@ -0,0 +1,115 @@
+"""
+Single-flight coalescing of identical generation requests.
+
+Concurrent calls for the same key share one in-flight computation: threads
+in a process wait on the leader's future, and other processes wait on a
+``GenerationLock`` row and then read the leader's result from the
+generation cache.
+"""
+import os
+import socket
+import threading
+import time
+from concurrent.futures import Future
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import GenerationLock
+
+
+class SingleFlight:
+    """Deduplicate concurrent calls with the same key within one process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+
+_inflight = SingleFlight()
+
+
+def _owner():
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+def _acquire(key, owner):
+    now = timezone.now()
+    GenerationLock.objects.filter(key=key, expires_at__lte=now).delete()
+    try:
+        with transaction.atomic():
+            GenerationLock.objects.create(
+                key=key,
+                owner=owner,
+                expires_at=now + timedelta(seconds=settings.GENERATION_LOCK_TIMEOUT)
+            )
+    except IntegrityError:
+        return False
+    return True
+
+
+def _wait_for_release(key):
+    while GenerationLock.objects.filter(key=key, expires_at__gt=timezone.now()).exists():
+        time.sleep(settings.GENERATION_LOCK_POLL_INTERVAL)
+
+
+def _across_processes(key, compute, lookup):
+    owner = _owner()
+    while True:
+        if _acquire(key, owner):
+            try:
+                # Another process may have finished between our miss and the lease
+                result = lookup()
+                if result is not None:
+                    return result
+                return compute()
+            finally:
+                GenerationLock.objects.filter(key=key, owner=owner).delete()
+
+        _wait_for_release(key)
+        result = lookup()
+        if result is not None:
+            return result
+        # The holder produced nothing cacheable (e.g. a fallback); try to lead
+
+
+def coalesce(key, compute, lookup=None):
+    """
+    Return ``compute()`` for ``key``, running it at most once at a time.
+
+    With ``lookup`` (which should read the shared cache ``compute`` writes
+    to) identical calls are also coalesced across processes; without it
+    only threads in this process share the result.
+    """
+    if lookup is None:
+        return _inflight.do(key, compute)
+    return _inflight.do(key, lambda: _across_processes(key, compute, lookup))
@@ -1,3 +1,1049 @@
-from django.test import TestCase
+import io
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from importlib import import_module
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import User, Profile
+from techbridge import log, metrics
+from . import cache, compression, gemini, jobs, question_bank, search, singleflight
+from .llm import FakeProvider, GeminiClientPool, LLMError, get_provider
+from .models import (
+    CanonicalTopic,
+    GenerationCacheEntry,
+    GenerationJob,
+    GenerationLock,
+    LearningModule,
+    ModuleContent,
+    ModuleTest,
+    QuestionBankItem,
+    SeenQuestion
+)
+from .services import create_module_with_test, difficulty_for_profile
+from .topics import TopicIndex
+
+
+class LearnerMixin:
+    """A student ``self.user`` with a profile, signed in on ``self.client``."""
+
+    learning_rate = "average"
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(
+            email="learner@example.com",
+            password="password123",
+            role="student"
+        )
+        self.profile = Profile.objects.create(user=self.user, learning_rate=self.learning_rate)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+
+class GenerateModuleAsyncAPITests(LearnerMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+
+    async def test_content_and_test_are_generated_concurrently(self):
+        # Neither half returns until both are running on their worker threads
+        barrier = threading.Barrier(2, timeout=5)
+
+        def content(topic, difficulty):
+            barrier.wait()
+            return f"# {topic}"
+
+        def questions(user, topic, difficulty):
+            barrier.wait()
+            return [{"id": 1, "question": "Q?", "options": {"A": "a", "B": "b"}, "correct_answer": "A"}]
+
+        with mock.patch("modules.async_views.generate_module_content", content), \
+                mock.patch("modules.async_views.draw_questions", questions):
+            response = await self.async_client.post(
+                "/api/modules/generate/async/",
+                {"topic": "Docker"},
+                content_type="application/json",
+                headers={"Authorization": f"Bearer {self.token}"}
+            )
+
+        self.assertEqual(response.status_code, 201)
+        body = response.json()
+        self.assertEqual(body["module"]["content"], "# Docker")
+        self.assertEqual(body["test"]["questions"][0]["question"], "Q?")
+        self.assertEqual(await LearningModule.objects.filter(user=self.user).acount(), 1)
+
+    async def test_requires_authentication_and_topic(self):
+        response = await self.async_client.post("/api/modules/generate/async/", {}, content_type="application/json")
+        self.assertEqual(response.status_code, 401)
+
+        response = await self.async_client.post(
+            "/api/modules/generate/async/",
+            {},
+            content_type="application/json",
+            headers={"Authorization": f"Bearer {self.token}"}
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(
+    GENERATION_JOBS_EAGER=False,
+    GENERATION_JOB_MAX_ATTEMPTS=2,
+    GENERATION_JOB_RETRY_BACKOFF=5,
+    GENERATION_JOB_RETRY_BACKOFF_MAX=300
+)
+class GenerationJobTests(LearnerMixin, TestCase):
+    def run_next(self, provider):
+        job = jobs.claim_next("worker-1")
+        with mock.patch.object(gemini, "get_provider", return_value=provider):
+            jobs.run_job(job)
+        job.refresh_from_db()
+        return job
+
+    def test_claim_is_exclusive(self):
+        job = jobs.enqueue(self.user, "module", "Docker", "beginner")
+
+        claimed = jobs.claim(job.pk, "worker-1")
+        self.assertEqual(claimed.status, GenerationJob.STATUS_RUNNING)
+        self.assertEqual(claimed.locked_by, "worker-1")
+        self.assertEqual(claimed.attempts, 1)
+        self.assertIsNone(jobs.claim(job.pk, "worker-2"))
+        self.assertIsNone(jobs.claim_next("worker-2"))
+
+    def test_successful_job_saves_generated_module(self):
+        jobs.enqueue(self.user, "module", "Docker", "beginner")
+        job = self.run_next(FakeProvider())
+
+        self.assertEqual(job.status, GenerationJob.STATUS_SUCCEEDED)
+        self.assertEqual(job.progress, 100)
+        self.assertTrue(job.module.content.startswith("# Learning Module: Docker"))
+        self.assertEqual(len(job.module.moduletest.questions), 5)
+
+    def test_failed_model_call_is_retried_with_backoff(self):
+        jobs.enqueue(self.user, "module", "Docker", "beginner")
+        before = timezone.now()
+        job = self.run_next(FakeProvider(error_rate=1.0))
+
+        # Requeued for later instead of succeeding with placeholder content
+        self.assertEqual(job.status, GenerationJob.STATUS_QUEUED)
+        self.assertIn("Simulated LLM provider failure", job.error)
+        self.assertIsNone(job.module)
+        self.assertFalse(LearningModule.objects.exists())
+        self.assertGreaterEqual(job.available_at, before + timedelta(seconds=5))
+        self.assertIsNone(jobs.claim_next("worker-1"))
+
+        GenerationJob.objects.filter(pk=job.pk).update(available_at=timezone.now())
+        job = self.run_next(FakeProvider())
+        self.assertEqual(job.status, GenerationJob.STATUS_SUCCEEDED)
+        self.assertEqual(job.attempts, 2)
+
+    def test_gives_up_after_max_attempts(self):
+        jobs.enqueue(self.user, "roadmap", "Docker", "beginner")
+        for _ in range(2):
+            GenerationJob.objects.update(available_at=timezone.now())
+            job = self.run_next(FakeProvider(error_rate=1.0))
+
+        self.assertEqual(job.status, GenerationJob.STATUS_FAILED)
+        self.assertEqual(job.attempts, 2)
+        self.assertFalse(LearningModule.objects.exists())
+
+    def test_retry_delay_doubles_up_to_the_cap(self):
+        self.assertEqual([jobs.retry_delay(n) for n in (1, 2, 3)], [5, 10, 20])
+        self.assertEqual(jobs.retry_delay(20), 300)
+
+    @override_settings(GENERATION_JOB_LOCK_TIMEOUT=600)
+    def test_stale_jobs_are_requeued(self):
+        stale = jobs.enqueue(self.user, "module", "Docker", "beginner")
+        running = jobs.enqueue(self.user, "module", "Kubernetes", "beginner")
+        jobs.claim(stale.pk, "dead-worker")
+        jobs.claim(running.pk, "live-worker")
+        GenerationJob.objects.filter(pk=stale.pk).update(locked_at=timezone.now() - timedelta(seconds=601))
+
+        self.assertEqual(jobs.requeue_stale(), 1)
+        stale.refresh_from_db()
+        running.refresh_from_db()
+        self.assertEqual(stale.status, GenerationJob.STATUS_QUEUED)
+        self.assertEqual(stale.locked_by, "")
+        self.assertEqual(running.status, GenerationJob.STATUS_RUNNING)
+
+    def run_slow_job(self, while_generating):
+        """Run a module job whose model call does ``while_generating(job)`` before returning."""
+        jobs.enqueue(self.user, "module", "Docker", "beginner")
+        job = jobs.claim_next("worker-1")
+
+        def slow_generation(topic, difficulty, fallback=True):
+            # The call has been running for longer than the lock timeout
+            GenerationJob.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(seconds=601))
+            while_generating(job)
+            return "# Learning Module: Docker"
+
+        with mock.patch.object(jobs, "generate_module_content", slow_generation), \
+                mock.patch.object(gemini, "get_provider", return_value=FakeProvider()):
+            jobs.run_job(job)
+        job.refresh_from_db()
+        return job
+
+    @override_settings(GENERATION_JOB_LOCK_TIMEOUT=600)
+    def test_heartbeat_keeps_a_running_job_from_being_requeued(self):
+        requeued = []
+
+        def heartbeat_then_requeue(job):
+            self.assertTrue(jobs.heartbeat(job))
+            requeued.append(jobs.requeue_stale())
+
+        job = self.run_slow_job(heartbeat_then_requeue)
+        self.assertEqual(requeued, [0])
+        self.assertEqual(job.status, GenerationJob.STATUS_SUCCEEDED)
+        self.assertEqual(LearningModule.objects.count(), 1)
+
+    @override_settings(GENERATION_JOB_LOCK_TIMEOUT=600)
+    def test_run_that_lost_its_job_saves_nothing(self):
+        def requeue_and_reclaim(job):
+            self.assertEqual(jobs.requeue_stale(), 1)
+            self.assertIsNotNone(jobs.claim(job.pk, "worker-2"))
+
+        job = self.run_slow_job(requeue_and_reclaim)
+        # The second claim owns the job now; the first run wrote nothing
+        self.assertEqual(job.status, GenerationJob.STATUS_RUNNING)
+        self.assertEqual(job.locked_by, "worker-2")
+        self.assertEqual(job.progress, 0)
+        self.assertFalse(LearningModule.objects.exists())
+
+    @override_settings(GENERATION_JOB_LOCK_TIMEOUT=600)
+    def test_stale_job_out_of_attempts_fails(self):
+        job = jobs.enqueue(self.user, "module", "Docker", "beginner")
+        GenerationJob.objects.filter(pk=job.pk).update(attempts=1)
+        jobs.claim(job.pk, "dead-worker")
+        GenerationJob.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(seconds=601))
+
+        self.assertEqual(jobs.requeue_stale(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, GenerationJob.STATUS_FAILED)
+        self.assertEqual(job.error, "Worker stopped responding")
+
+    @override_settings(GENERATION_JOBS_EAGER=True)
+    def test_eager_mode_uses_every_attempt(self):
+        with mock.patch.object(gemini, "get_provider", return_value=FakeProvider(error_rate=1.0)):
+            job = jobs.enqueue(self.user, "module", "Docker", "beginner")
+        self.assertEqual(job.status, GenerationJob.STATUS_FAILED)
+        self.assertEqual(job.attempts, 2)
+
+    def test_direct_calls_still_fall_back(self):
+        with mock.patch.object(gemini, "get_provider", return_value=FakeProvider(error_rate=1.0)):
+            self.assertIn("try again", gemini.generate_module_content("Docker", "beginner"))
+            with self.assertRaises(Exception):
+                gemini.generate_module_content("Docker", "beginner", fallback=False)
+
+
+def _sse_events(response):
+    body = b"".join(response.streaming_content).decode()
+    events = []
+    for block in body.strip().split("\n\n"):
+        event, data = block.split("\n")
+        events.append((event.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+    return events
+
+
+class StreamingGenerationAPITests(LearnerMixin, TestCase):
+    def test_module_is_streamed_then_saved(self):
+        with mock.patch.object(gemini, "get_provider", return_value=FakeProvider(chunk_size=100)):
+            response = self.client.post("/api/modules/generate/stream/", {"topic": "Docker"}, format="json")
+            self.assertEqual(response["Content-Type"], "text/event-stream")
+            events = _sse_events(response)
+
+        chunks = [data["text"] for event, data in events if event == "chunk"]
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(events[-1][0], "done")
+
+        done = events[-1][1]
+        module = LearningModule.objects.get(pk=done["module"]["id"])
+        self.assertEqual(module.content, "".join(chunks))
+        self.assertNotIn("content", done["module"])
+        self.assertEqual(len(done["test"]["questions"]), 5)
+
+    def test_roadmap_stream_is_cached(self):
+        provider = FakeProvider()
+        with mock.patch.object(gemini, "get_provider", return_value=provider), \
+                mock.patch.object(provider, "stream", wraps=provider.stream) as stream:
+            first = _sse_events(self.client.post("/api/modules/search/stream/", {"topic": "Docker"}, format="json"))
+            second = _sse_events(self.client.post("/api/modules/search/stream/", {"topic": "Docker"}, format="json"))
+
+        self.assertEqual(stream.call_count, 1)
+        # A cache hit arrives as one chunk
+        self.assertEqual(len(second), 2)
+        self.assertEqual(
+            "".join(data["text"] for event, data in first if event == "chunk"),
+            second[0][1]["text"]
+        )
+
+    def test_failed_stream_sends_fallback_and_caches_nothing(self):
+        with mock.patch.object(gemini, "get_provider", return_value=FakeProvider(error_rate=1.0)):
+            events = _sse_events(
+                self.client.post("/api/modules/search/stream/", {"topic": "Docker"}, format="json")
+            )
+
+        self.assertEqual(events[0], ("chunk", {"text": gemini._roadmap_fallback("Docker")}))
+        self.assertEqual(events[-1][0], "done")
+        self.assertFalse(GenerationCacheEntry.objects.exists())
+
+    def test_topic_is_required(self):
+        response = self.client.post("/api/modules/generate/stream/", {}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+
+class FakeProviderTests(TestCase):
+    def test_output_depends_only_on_the_prompt(self):
+        prompt = gemini._module_prompt("Docker", "beginner")
+        first = FakeProvider(seed=1).generate(prompt, purpose="module")
+        self.assertEqual(first, FakeProvider(seed=2).generate(prompt, purpose="module"))
+        self.assertTrue(first.startswith("# Learning Module: Docker"))
+
+    def test_stream_matches_generate(self):
+        provider = FakeProvider(chunk_size=50)
+        prompt = gemini._roadmap_prompt("Docker")
+        chunks = list(provider.stream(prompt, purpose="roadmap"))
+        self.assertTrue(all(len(chunk) <= 50 for chunk in chunks))
+        self.assertEqual("".join(chunks), provider.generate(prompt, purpose="roadmap"))
+
+    def test_questions_are_valid_json(self):
+        questions = json.loads(FakeProvider().generate(gemini._test_prompt("Docker", "beginner", 7), purpose="test"))
+        self.assertEqual(len(questions), 7)
+        self.assertTrue(all(q["correct_answer"] in q["options"] for q in questions))
+
+    def test_latency_and_errors(self):
+        with mock.patch("modules.llm.time.sleep") as sleep:
+            FakeProvider(latency=0.2).generate("prompt")
+        sleep.assert_called_once_with(0.2)
+
+        with self.assertRaises(LLMError):
+            FakeProvider(error_rate=1.0).generate("prompt")
+        # Seeded failures are reproducible
+        outcomes = []
+        for _ in range(2):
+            provider = FakeProvider(error_rate=0.5, seed=7)
+            run = []
+            for _ in range(20):
+                try:
+                    provider.generate("prompt")
+                    run.append(True)
+                except LLMError:
+                    run.append(False)
+            outcomes.append(run)
+        self.assertEqual(outcomes[0], outcomes[1])
+        self.assertIn(False, outcomes[0])
+
+    @override_settings(LLM_PROVIDER="fake", LLM_FAKE_LATENCY_MS=0, LLM_FAKE_ERROR_RATE=0)
+    def test_selected_by_setting(self):
+        self.assertIsInstance(get_provider(), FakeProvider)
+        with override_settings(LLM_PROVIDER="other"):
+            with self.assertRaises(ValueError):
+                get_provider()
+
+
+class SingleFlightTests(TestCase):
+    def _concurrently(self, count, fn):
+        start = threading.Barrier(count)
+        results = [None] * count
+
+        def run(index):
+            start.wait()
+            try:
+                results[index] = fn()
+            except Exception as e:
+                results[index] = e
+
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_identical_requests_share_one_model_call(self):
+        provider = FakeProvider(latency=0.3)
+        with mock.patch.object(gemini, "get_provider", return_value=provider), \
+                mock.patch.object(provider, "generate", wraps=provider.generate) as generate:
+            results = self._concurrently(4, lambda: gemini.generate_test("Docker", "beginner"))
+
+        self.assertEqual(generate.call_count, 1)
+        self.assertTrue(all(result == results[0] for result in results))
+        self.assertEqual(singleflight._inflight.in_flight(), 0)
+
+    def test_followers_see_the_leaders_error(self):
+        flight = singleflight.SingleFlight()
+
+        def fail():
+            time.sleep(0.2)
+            raise LLMError("down")
+
+        results = self._concurrently(3, lambda: flight.do("key", fail))
+        self.assertTrue(all(isinstance(result, LLMError) for result in results))
+        self.assertEqual(flight.in_flight(), 0)
+
+    def test_waits_for_another_process_then_reads_its_result(self):
+        GenerationLock.objects.create(
+            key="key", owner="other-host:1:1", expires_at=timezone.now() + timedelta(seconds=60)
+        )
+        cache = {}
+
+        def other_process_finishes(seconds):
+            cache["key"] = "from the other process"
+            GenerationLock.objects.filter(key="key").delete()
+
+        compute = mock.Mock(return_value="computed here")
+        with mock.patch("modules.singleflight.time.sleep", side_effect=other_process_finishes):
+            result = singleflight.coalesce("key", compute, lookup=lambda: cache.get("key"))
+
+        self.assertEqual(result, "from the other process")
+        compute.assert_not_called()
+
+    def test_expired_lease_is_taken_over(self):
+        GenerationLock.objects.create(
+            key="key", owner="dead-host:1:1", expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        result = singleflight.coalesce("key", lambda: "computed here", lookup=lambda: None)
+        self.assertEqual(result, "computed here")
+        self.assertFalse(GenerationLock.objects.exists())
+
+
+@override_settings(QUESTION_BANK_BATCH_SIZE=10)
+class QuestionBankTests(LearnerMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.provider = FakeProvider()
+
+    def draw(self, user=None, topic="Docker"):
+        with mock.patch.object(gemini, "get_provider", return_value=self.provider), \
+                mock.patch.object(self.provider, "generate", wraps=self.provider.generate) as generate:
+            questions = question_bank.draw_questions(user or self.user, topic, "beginner")
+        return questions, generate.call_count
+
+    def test_draws_do_not_repeat_seen_questions(self):
+        first, calls = self.draw()
+        self.assertEqual(calls, 1)
+        self.assertEqual(QuestionBankItem.objects.count(), 10)
+
+        second, calls = self.draw()
+        # Served from the bank without another model call
+        self.assertEqual(calls, 0)
+        self.assertEqual(len(second), 5)
+        self.assertFalse({q["bank_id"] for q in first} & {q["bank_id"] for q in second})
+        self.assertEqual([q["id"] for q in second], [1, 2, 3, 4, 5])
+        self.assertEqual(SeenQuestion.objects.filter(user=self.user).count(), 10)
+
+    def test_bank_is_shared_between_learners(self):
+        self.draw()
+        other = User.objects.create_user(email="other@example.com", password="password123", role="student")
+        questions, calls = self.draw(other)
+        self.assertEqual(calls, 0)
+        self.assertEqual(len(questions), 5)
+
+    def test_exhausted_bank_is_refilled_then_repeats(self):
+        self.draw()
+        self.draw()
+        # The fake backend's refill only produces duplicates, so seen questions come back
+        questions, calls = self.draw()
+        self.assertEqual(calls, 1)
+        self.assertEqual(len(questions), 5)
+        self.assertEqual(QuestionBankItem.objects.count(), 10)
+
+    def test_equivalent_topic_spellings_share_a_bank(self):
+        self.draw(topic="Docker")
+        questions, calls = self.draw(topic="  docker ")
+        self.assertEqual(calls, 0)
+
+    def test_failed_refill_falls_back_to_generated_test(self):
+        self.provider = FakeProvider(error_rate=1.0)
+        questions, _ = self.draw()
+        self.assertEqual(len(questions), 5)
+        self.assertFalse(QuestionBankItem.objects.exists())
+
+    def test_regenerate_endpoint_draws_unseen_questions(self):
+        questions, _ = self.draw()
+        module, test = create_module_with_test(self.user, "Docker", "beginner", "# Docker", questions)
+
+        with mock.patch.object(gemini, "get_provider", return_value=self.provider):
+            response = self.client.post(f"/api/modules/{module.id}/test/regenerate/")
+        self.assertEqual(response.status_code, 200)
+        regenerated = {q["bank_id"] for q in response.data["test"]["questions"]}
+        self.assertFalse(regenerated & {q["bank_id"] for q in questions})
+
+
+class LearningHistoryAPITests(LearnerMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        other = User.objects.create_user(email="other@example.com", password="password123", role="student")
+        LearningModule.objects.create(user=other, topic="Not mine", difficulty="beginner", content="# Other")
+        for i in range(5):
+            LearningModule.objects.create(user=self.user, topic=f"Topic {i}", difficulty="beginner", content=f"# {i}")
+
+    def test_cursor_is_stable_across_pages(self):
+        response = self.client.get("/api/modules/history/", {"page_size": 2})
+        self.assertEqual(response.status_code, 200)
+        topics = [row["topic"] for row in response.data["results"]]
+
+        # A module created while paging doesn't shift the later pages
+        LearningModule.objects.create(user=self.user, topic="New", difficulty="beginner", content="# New")
+        next_url = response.data["next"]
+        while next_url:
+            response = self.client.get(next_url)
+            topics += [row["topic"] for row in response.data["results"]]
+            next_url = response.data["next"]
+
+        self.assertEqual(topics, [f"Topic {i}" for i in range(4, -1, -1)])
+
+    def test_listing_leaves_content_out(self):
+        response = self.client.get("/api/modules/history/")
+        self.assertEqual(
+            set(response.data["results"][0]),
+            {"id", "topic", "difficulty", "is_completed", "retry_count", "created_at"}
+        )
+
+    def test_fields_limits_serialized_keys(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/modules/history/", {"fields": "id,topic"})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(all(set(row) == {"id", "topic"} for row in response.data["results"]))
+        self.assertFalse(any("module_content" in q["sql"] for q in queries.captured_queries))
+
+        response = self.client.get("/api/modules/history/", {"fields": "topic,content"})
+        self.assertEqual(response.data["results"][0], {"topic": "Topic 4", "content": "# 4"})
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get("/api/modules/history/", {"fields": "topic,user"})
+        self.assertEqual(response.status_code, 400)
+
+
+class CompressedContentTests(TestCase):
+    BODY = gemini._roadmap_fallback("Docker") * 20
+
+    def raw_body(self, content):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT body FROM modules_modulecontent WHERE id = %s", [content.pk])
+            return cursor.fetchone()[0]
+
+    def test_round_trip(self):
+        content = ModuleContent.intern(self.BODY)
+        raw = bytes(self.raw_body(content))
+        self.assertEqual(raw[0], compression.current_version())
+        self.assertLess(len(raw), len(self.BODY) // 5)
+        self.assertEqual(ModuleContent.objects.get(pk=content.pk).body, self.BODY)
+
+    def test_legacy_plaintext_rows_read_as_is(self):
+        content = ModuleContent.intern(self.BODY)
+        with connection.cursor() as cursor:
+            cursor.execute("UPDATE modules_modulecontent SET body = %s WHERE id = %s", ["# Plain", content.pk])
+        self.assertEqual(ModuleContent.objects.get(pk=content.pk).body, "# Plain")
+
+    def test_decompressed_only_when_read(self):
+        ModuleContent.intern(self.BODY)
+        with mock.patch("modules.fields.decompress", wraps=compression.decompress) as decompress:
+            content = ModuleContent.objects.get()
+            decompress.assert_not_called()
+            self.assertEqual(content.body, self.BODY)
+            self.assertEqual(content.body, self.BODY)
+            decompress.assert_called_once()
+
+    def test_trained_dictionary_becomes_the_next_version(self):
+        user = User.objects.create_user(email="learner@example.com", password="password123", role="student")
+        for i in range(4):
+            LearningModule.objects.create(
+                user=user, topic=f"Topic {i}", difficulty="beginner", content=f"# Topic {i}\n{self.BODY}"
+            )
+        old = compression.compress(self.BODY)
+
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, "v1.zdict"), "wb") as f:
+                f.write(compression.dictionary(1))
+            with override_settings(COMPRESSION_DICTIONARY_DIR=directory):
+                call_command("train_compression_dictionary", stdout=io.StringIO())
+                self.assertEqual(compression.available_versions(), [1, 2])
+
+                with override_settings(COMPRESSION_DICTIONARY_VERSION=2):
+                    new = compression.compress(self.BODY)
+                self.assertEqual(new[0], 2)
+                # Values written under either version stay readable
+                self.assertEqual(compression.decompress(new), self.BODY)
+                self.assertEqual(compression.decompress(old), self.BODY)
+
+    def test_migration_keeps_its_own_dictionary(self):
+        migration = import_module("modules.migrations.0006_compress_learningmodule_content")
+        data = migration.compress(self.BODY)
+        self.assertEqual(data, compression.compress(self.BODY, version=1))
+
+        # Retraining, or losing the dictionary files, doesn't change what it writes or reads
+        with tempfile.TemporaryDirectory() as directory, \
+                override_settings(COMPRESSION_DICTIONARY_DIR=directory, COMPRESSION_DICTIONARY_VERSION=2):
+            self.assertEqual(migration.compress(self.BODY), data)
+            self.assertEqual(migration.decompress(data), self.BODY)
+
+    @override_settings(COMPRESSION_DICTIONARY_VERSION=9)
+    def test_missing_dictionary_is_an_error(self):
+        with self.assertRaises(ValueError):
+            compression.compress(self.BODY)
+
+
+class SharedModuleContentTests(LearnerMixin, TestCase):
+    def test_assigning_content_runs_no_queries(self):
+        module = LearningModule(user=self.user, topic="Docker", difficulty="beginner")
+        with self.assertNumQueries(0):
+            module.content = "# Docker"
+            self.assertEqual(module.content, "# Docker")
+        self.assertFalse(ModuleContent.objects.exists())
+
+        module.save()
+        self.assertEqual(LearningModule.objects.get(pk=module.pk).content, "# Docker")
+
+    def test_identical_bodies_share_a_row(self):
+        first = LearningModule.objects.create(user=self.user, topic="Docker", difficulty="beginner", content="# Same")
+        second = LearningModule.objects.create(user=self.user, topic="Docker", difficulty="advanced", content="# Same")
+        self.assertEqual(first.module_content_id, second.module_content_id)
+
+        second.content = "# Edited"
+        second.save()
+        self.assertEqual(ModuleContent.objects.count(), 2)
+        self.assertEqual(LearningModule.objects.get(pk=first.pk).content, "# Same")
+
+    def test_prune_deletes_only_unreferenced_bodies(self):
+        kept = LearningModule.objects.create(user=self.user, topic="Docker", difficulty="beginner", content="# Kept")
+        for body in ("# Gone", "# Also gone"):
+            LearningModule.objects.create(user=self.user, topic="Docker", difficulty="beginner", content=body).delete()
+
+        out = io.StringIO()
+        call_command("prune_module_content", batch_size=1, stdout=out)
+        self.assertIn("Deleted 2", out.getvalue())
+        self.assertEqual(list(ModuleContent.objects.values_list("id", flat=True)), [kept.module_content_id])
+
+
+class GenerationCacheTests(TestCase):
+    def setUp(self):
+        cache._pending_hits.clear()
+        cache._last_evicted = None
+
+    def store(self, key, topic="Docker"):
+        cache.store(
+            key, "# Cached", kind="module", topic=topic, difficulty="beginner",
+            prompt_version=1, model_name="fake"
+        )
+
+    def test_hits_are_written_back_once_per_interval(self):
+        self.store("docker")
+        with self.assertNumQueries(3):
+            for _ in range(3):
+                self.assertEqual(cache.get("docker"), "# Cached")
+        self.assertEqual(GenerationCacheEntry.objects.get().hit_count, 0)
+
+        GenerationCacheEntry.objects.update(last_used_at=timezone.now() - timedelta(hours=1))
+        with self.assertNumQueries(2):
+            cache.get("docker")
+        entry = GenerationCacheEntry.objects.get()
+        self.assertEqual(entry.hit_count, 4)
+        self.assertGreater(entry.last_used_at, timezone.now() - timedelta(minutes=1))
+
+    @override_settings(GENERATION_CACHE_MAX_ENTRIES=1)
+    def test_store_evicts_at_most_once_per_interval(self):
+        self.store("docker")
+        self.store("kubernetes", topic="Kubernetes")
+        self.assertEqual(GenerationCacheEntry.objects.count(), 2)
+
+        out = io.StringIO()
+        call_command("generation_cache", "evict", stdout=out)
+        self.assertIn("Evicted 1", out.getvalue())
+        self.assertEqual(list(GenerationCacheEntry.objects.values_list("key", flat=True)), ["kubernetes"])
+
+
+class AdaptiveDifficultyTests(LearnerMixin, TestCase):
+    learning_rate = "slow"
+
+    def submit(self, difficulty, correct):
+        questions = [
+            {"id": i, "question": f"Q{i}", "options": {"A": "a", "B": "b"}, "correct_answer": "A"}
+            for i in range(1, 6)
+        ]
+        module, _ = create_module_with_test(self.user, "Topic", difficulty, "content", questions)
+        answers = {str(i): "A" if i <= correct else "B" for i in range(1, 6)}
+        return self.client.post(
+            f"/api/modules/{module.id}/test/submit/", {"answers": answers}, format="json"
+        )
+
+    def test_unrated_learner_uses_assessment_level(self):
+        self.assertEqual(difficulty_for_profile(self.profile), "beginner")
+
+    def test_learner_without_profile_can_submit(self):
+        self.profile.delete()
+        response = self.submit("beginner", correct=5)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Profile.objects.get(user=self.user).rated_attempts, 1)
+
+    def test_rating_moves_with_results(self):
+        response = self.submit("beginner", correct=5)
+        self.assertEqual(response.status_code, 200)
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.rated_attempts, 1)
+        self.assertGreater(self.profile.skill_rating, 1000)
+
+        for _ in range(20):
+            response = self.submit(response.data["next_difficulty"], correct=5)
+        self.assertEqual(response.data["next_difficulty"], "advanced")
+
+        for _ in range(25):
+            response = self.submit(response.data["next_difficulty"], correct=0)
+        self.assertEqual(response.data["next_difficulty"], "beginner")
+
+    def test_submission_updates_rating_without_reading_history(self):
+        self.submit("beginner", correct=3)
+        module = LearningModule.objects.create(
+            user=self.user, topic="Topic", difficulty="beginner", content="content"
+        )
+        ModuleTest.objects.create(module=module, questions=[
+            {"id": 1, "question": "Q", "options": {"A": "a"}, "correct_answer": "A"}
+        ])
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(f"/api/modules/{module.id}/test/submit/", {"answers": {"1": "A"}}, format="json")
+        statements = [
+            q["sql"] for q in queries.captured_queries
+            if not q["sql"].startswith(("SAVEPOINT", "RELEASE SAVEPOINT"))
+        ]
+        # Module, test, attempt insert, module update, profile read + update
+        self.assertEqual(len(statements), 6, statements)
+
+
+class TopicIndexTests(TestCase):
+    def setUp(self):
+        self.index = TopicIndex()
+
+    def test_equivalent_phrasings_share_a_topic(self):
+        first = self.index.resolve("Python Basics")
+        for phrasing in ["python basics ", "basics of python", "Python  basic", "PYTHON BASICS"]:
+            self.assertEqual(self.index.resolve(phrasing), first, phrasing)
+        self.assertEqual(self.index.resolve("node.js"), self.index.resolve("NodeJS"))
+
+    def test_distinct_topics_stay_apart(self):
+        topics = ["Python", "Python 2", "Python 3", "Java", "JavaScript", "React", "React Native"]
+        ids = {self.index.resolve(topic)[0] for topic in topics}
+        self.assertEqual(len(ids), len(topics))
+
+    def test_similar_topic_reuses_canonical_name(self):
+        _, name = self.index.resolve("machine learning")
+        self.assertEqual(self.index.resolve("learn machine learning")[1], name)
+
+    def test_new_topic_name_is_tidied(self):
+        self.assertEqual(self.index.resolve("  python   basics!! ")[1], "Python Basics")
+        self.assertEqual(self.index.resolve("SQL for beginners")[1], "SQL for Beginners")
+        self.assertEqual(self.index.resolve("KUBERNETES NETWORKING")[1], "Kubernetes Networking")
+
+    def test_database_work_happens_outside_the_lock(self):
+        get_or_create = CanonicalTopic.objects.get_or_create
+        held = []
+
+        def tracking_get_or_create(**kwargs):
+            held.append(self.index._lock.locked())
+            return get_or_create(**kwargs)
+
+        with mock.patch.object(CanonicalTopic.objects, "get_or_create", tracking_get_or_create):
+            self.index.resolve("Rust")
+        self.assertEqual(held, [False])
+
+    def test_index_is_bounded(self):
+        index = TopicIndex(size=2)
+        ids = [index.resolve(topic)[0] for topic in ["Rust", "Haskell", "Erlang"]]
+        self.assertEqual(len(index), 2)
+        # The evicted topic is found again by its key rather than duplicated
+        self.assertEqual(index.resolve("rust")[0], ids[0])
+        self.assertEqual(CanonicalTopic.objects.count(), 3)
+        self.assertEqual(len(index), 2)
+
+
+class LearningHistorySearchAPITests(LearnerMixin, TestCase):
+    def create_module(self, topic, content, user=None):
+        return LearningModule.objects.create(
+            user=user or self.user, topic=topic, difficulty="beginner", content=content
+        )
+
+    def search(self, query, **params):
+        return self.client.get("/api/modules/history/search/", {"q": query, **params})
+
+    def test_ranked_results_with_snippets(self):
+        self.create_module("Cooking", "Knife skills and a little about containers.")
+        docker = self.create_module("Docker", "Containers, images and volumes.")
+        other = User.objects.create_user(email="other@example.com", password="x", role="student")
+        self.create_module("Docker", "Containers", user=other)
+
+        response = self.search("docker containers")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r["id"] for r in response.data["results"]], [docker.id])
+        self.assertIn("<mark>Containers</mark>", response.data["results"][0]["snippet"])
+
+        response = self.search("container")
+        self.assertEqual(response.data["results"][0]["id"], docker.id)
+        self.assertEqual(len(response.data["results"]), 2)
+
+    def test_index_follows_updates_and_deletes(self):
+        module = self.create_module("Rust", "Ownership and borrowing.")
+        module.topic = "Rust ownership"
+        module.save()
+        self.assertEqual(self.search("ownership").data["results"][0]["topic"], "Rust ownership")
+
+        module.delete()
+        self.assertEqual(self.search("ownership").data["results"], [])
+
+    def test_snippet_escapes_generated_text(self):
+        self.create_module("Docker", 'Run <script>alert("x")</script> inside Docker & friends.')
+        snippet = self.search("docker").data["results"][0]["snippet"]
+        self.assertNotIn("<script>", snippet)
+        self.assertIn("&lt;script&gt;", snippet)
+        self.assertIn("<mark>Docker</mark> &amp; friends", snippet)
+
+    def test_shared_body_is_indexed_once(self):
+        other = User.objects.create_user(email="other@example.com", password="x", role="student")
+        mine = self.create_module("Kafka", "Topics and partitions.")
+        theirs = self.create_module("Kafka", "Topics and partitions.", user=other)
+        self.assertEqual(mine.module_content_id, theirs.module_content_id)
+        self.assertEqual([r["id"] for r in self.search("partitions").data["results"]], [mine.id])
+
+        def indexed_bodies():
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"SELECT count(*) FROM {search.SQLITE_CONTENT_TABLE} "
+                    f"WHERE {search.SQLITE_CONTENT_TABLE} MATCH 'partitions'"
+                )
+                return cursor.fetchone()[0]
+
+        if connection.vendor == "sqlite":
+            self.assertEqual(indexed_bodies(), 1)
+        mine.delete()
+        theirs.delete()
+        ModuleContent.prune()
+        if connection.vendor == "sqlite":
+            self.assertEqual(indexed_bodies(), 0)
+
+    def test_pagination_and_query_syntax(self):
+        for i in range(3):
+            self.create_module(f"Python {i}", "Python basics")
+        response = self.search("python", page_size=2)
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertIsNotNone(response.data["next"])
+        response = self.search("python", page_size=2, page=2)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertIsNone(response.data["next"])
+
+        self.assertEqual(self.search('"python AND (').status_code, 200)
+        self.assertEqual(self.client.get("/api/modules/history/search/").status_code, 400)
+
+
+@override_settings(METRICS_ENABLED=True)
+class MetricsTests(LearnerMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        for metric in metrics._registry:
+            metric.clear()
+
+    def test_requests_are_recorded_by_route(self):
+        self.client.get("/api/modules/history/")
+        self.client.get("/api/modules/history/")
+
+        body = self.client.get("/metrics/").content.decode()
+        self.assertIn(
+            'http_request_duration_seconds_count{view="api/modules/history/",method="GET",status="200"} 2',
+            body
+        )
+        self.assertIn('http_request_db_queries_count{view="api/modules/history/"} 2', body)
+
+    def test_streaming_response_is_recorded_when_closed(self):
+        with mock.patch.object(gemini, "get_provider", return_value=FakeProvider()), \
+                CaptureQueriesContext(connection) as queries:
+            response = self.client.post("/api/modules/search/stream/", {"topic": "Docker"}, format="json")
+            self.assertNotIn("http_request_duration_seconds_count", metrics.render())
+            _sse_events(response)
+
+        body = metrics.render()
+        self.assertIn(
+            'http_request_duration_seconds_count{view="api/modules/search/stream/",method="POST",status="200"} 1',
+            body
+        )
+        # Including the module saved at the end of the stream
+        self.assertIn(
+            f'http_request_db_queries_sum{{view="api/modules/search/stream/"}} {len(queries)}',
+            body
+        )
+
+    def test_off_thread_view_is_left_out_of_db_histograms(self):
+        self.client.post("/api/modules/generate/async/", {}, content_type="application/json")
+
+        body = metrics.render()
+        self.assertIn(
+            'http_request_duration_seconds_count{view="api/modules/generate/async/",method="POST",status="401"} 1',
+            body
+        )
+        self.assertNotIn('http_request_db_queries_count{view="api/modules/generate/async/"}', body)
+
+    def test_llm_calls_and_fallbacks(self):
+        with mock.patch.object(gemini, "get_provider", return_value=FakeProvider()):
+            gemini.generate_question_pool("Docker", "beginner", 3)
+        with mock.patch.object(gemini, "get_provider", return_value=FakeProvider(error_rate=1.0)):
+            gemini.generate_test("Docker", "beginner")
+
+        body = metrics.render()
+        self.assertIn('llm_call_duration_seconds_count{function="generate_test",outcome="success"} 1', body)
+        self.assertIn('llm_call_duration_seconds_count{function="generate_test",outcome="error"} 1', body)
+        self.assertIn('generation_fallbacks_total{function="generate_test"} 1', body)
+        self.assertIn('generation_duration_seconds_count{function="generate_test"} 1', body)
+        self.assertIn('llm_tokens_estimated_total{function="generate_test",direction="completion"}', body)
+
+    def test_generation_cache_lookups(self):
+        with mock.patch.object(gemini, "get_provider", return_value=FakeProvider()):
+            gemini.generate_module_content("Docker", "beginner")
+            gemini.generate_module_content("Docker", "beginner")
+
+        body = metrics.render()
+        self.assertIn('generation_cache_lookups_total{kind="module",result="miss"} 2', body)
+        self.assertIn('generation_cache_lookups_total{kind="module",result="hit"} 1', body)
+        self.assertIn('generation_cache_stores_total{kind="module"} 1', body)
+
+    def test_gemini_pool_in_flight_and_queue_wait(self):
+        pool = GeminiClientPool("key", max_in_flight=1, acquire_timeout=0.01)
+        with mock.patch.object(pool, "_build_client", return_value=object()):
+            with pool.lease():
+                self.assertIn("llm_pool_in_flight 1", metrics.render())
+                with self.assertRaises(LLMError):
+                    with pool.lease():
+                        pass
+
+        body = metrics.render()
+        self.assertIn("llm_pool_in_flight 0", body)
+        self.assertIn("llm_pool_queue_wait_seconds_count 1", body)
+        self.assertIn("llm_pool_rejected_total 1", body)
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_disabled(self):
+        self.assertEqual(self.client.get("/metrics/").status_code, 404)
+        metrics.HTTP_REQUEST_DURATION.observe(1.0, view="x", method="GET", status=200)
+        self.assertNotIn('view="x"', metrics.render())
+
+    @override_settings(METRICS_AUTH_TOKEN="secret")
+    def test_scrape_token(self):
+        self.assertEqual(self.client.get("/metrics/").status_code, 401)
+        response = self.client.get("/metrics/", HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(response.status_code, 200)
+
+
+class RequestLoggingTests(LearnerMixin, TestCase):
+    def test_request_id_header(self):
+        response = self.client.get("/api/modules/history/", HTTP_X_REQUEST_ID="abc-123")
+        self.assertEqual(response["X-Request-ID"], "abc-123")
+
+        response = self.client.get("/api/modules/history/", HTTP_X_REQUEST_ID="bad id\n{}")
+        self.assertRegex(response["X-Request-ID"], r"^[0-9a-f]{32}$")
+
+    def test_request_id_is_cleared_after_the_response(self):
+        seen = []
+        handler = logging.Handler()
+        handler.emit = lambda record: seen.append(log.request_id.get())
+        logger = logging.getLogger("django.request")
+        logger.addHandler(handler)
+        try:
+            self.client.get("/api/modules/999999/", HTTP_X_REQUEST_ID="req-404")
+        finally:
+            logger.removeHandler(handler)
+
+        # Django's own 4xx line still carries the id; the thread doesn't keep it
+        self.assertEqual(seen, ["req-404"])
+        self.assertEqual(log.request_id.get(), "-")
+
+    def test_records_carry_request_id_as_json(self):
+        record = logging.LogRecord("modules.gemini", logging.ERROR, __file__, 1, "failed %s", ("x",), None)
+        record.topic = "Docker"
+        token = log.request_id.set("req-1")
+        try:
+            log.RequestIdFilter().filter(record)
+        finally:
+            log.request_id.reset(token)
+
+        entry = json.loads(log.JsonFormatter().format(record))
+        self.assertEqual(entry["message"], "failed x")
+        self.assertEqual(entry["request_id"], "req-1")
+        self.assertEqual(entry["topic"], "Docker")
+
+    def test_debug_sampling_is_per_request(self):
+        sampler = log.DebugSampler(rate=0.5)
+        kept = 0
+        for i in range(1000):
+            records = [
+                logging.LogRecord("modules", level, __file__, 1, "m", (), None)
+                for level in (logging.DEBUG, logging.DEBUG, logging.ERROR)
+            ]
+            for record in records:
+                record.request_id = f"request-{i}"
+            debug = [sampler.filter(record) for record in records[:2]]
+            self.assertEqual(debug[0], debug[1])
+            self.assertTrue(sampler.filter(records[2]))
+            kept += debug[0]
+        self.assertTrue(400 < kept < 600)
+
+
+class BenchmarkHarnessTests(TestCase):
+    def test_query_benchmark_refuses_shared_database(self):
+        settings_dict = {**connection.settings_dict, "NAME": "/srv/techbridge/db.sqlite3"}
+        with mock.patch.object(connection, "settings_dict", settings_dict):
+            with self.assertRaisesMessage(CommandError, "--allow-index-drop"):
+                call_command("benchmark_queries", stdout=io.StringIO())
+
+        out = io.StringIO()
+        call_command("benchmark_queries", users=2, modules_per_user=2, iterations=1, stdout=out)
+        self.assertIn("With composite indexes", out.getvalue())
+        self.assertFalse(User.objects.filter(email__startswith="query-benchmark-").exists())
+
+    def test_remote_run_warns_about_server_settings(self):
+        call_command("seed_benchmark_data", users=1, modules_per_user=1, attempts_per_module=0, stdout=io.StringIO())
+
+        def remote(transport, method, path, data=None, token=None):
+            if path == "/api/accounts/login/":
+                return 200, json.dumps({"data": {"tokens": {"access": "token"}}}).encode(), None
+            return 429, b"", None
+
+        out, err = io.StringIO(), io.StringIO()
+        with mock.patch("modules.management.commands.benchmark_api.HttpTransport.request", remote):
+            call_command(
+                "benchmark_api", requests=5, warmup=0, sessions=1, mix="history=1",
+                url="http://bench.invalid", stdout=out, stderr=err
+            )
+        self.assertIn("THROTTLE_RATE_GENERATION=", err.getvalue())
+        self.assertIn("5 requests were throttled (429)", out.getvalue())
+
+    def test_seed_and_workload(self):
+        call_command(
+            "seed_benchmark_data", users=3, modules_per_user=2, attempts_per_module=1, stdout=io.StringIO()
+        )
+        self.assertEqual(LearningModule.objects.filter(user__email__startswith="bench-").count(), 6)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "results.json")
+            call_command(
+                "benchmark_api", requests=40, warmup=0, sessions=2, host="testserver",
+                json_output=path, stdout=io.StringIO()
+            )
+            with open(path) as f:
+                results = json.load(f)
+
+            self.assertEqual(results["requests"], 40)
+            for name, row in results["endpoints"].items():
+                self.assertEqual(row["errors"], 0, name)
+                self.assertGreater(row["queries_per_request"], 0, name)
+
+            # A run compared against itself has nothing to report
+            call_command(
+                "benchmark_api", requests=40, warmup=0, sessions=2, host="testserver",
+                baseline=path, tolerance=100, stdout=io.StringIO()
+            )
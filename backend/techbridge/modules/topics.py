@@ -0,0 +1,194 @@
+"""
+Mapping of free-text topics onto canonical topics.
+
+A topic is reduced to its sorted set of normalized tokens ("Basics of
+Python" and "python basics " both become ``basic python``). Exact token
+matches are a dictionary lookup; otherwise the topic is compared with
+every known topic through hashed character-trigram vectors held in a
+NumPy matrix, and reuses the closest one when the cosine similarity
+reaches ``TOPIC_SIMILARITY_THRESHOLD``. Unmatched topics become new
+canonical topics named after a tidied copy of the request.
+
+The vectors are small (``DIMENSIONS`` floats) and the matrix has a fixed
+``TOPIC_INDEX_SIZE`` rows, allocated once; when it is full the least
+recently used topic's row is reused, and that topic is found again by its
+key in the database. The index lock only covers in-memory work, never a
+query.
+
+Generation entry points canonicalize the topic before anything else, so
+the content cache, question bank and request coalescing all key on the
+canonical name.
+"""
+import re
+import threading
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+from django.conf import settings
+from django.db import IntegrityError
+
+from .models import CanonicalTopic
+
+# Short topics have a few dozen trigrams, so collisions in this many buckets
+# barely move the cosine while a full index stays at a few megabytes
+DIMENSIONS = 512
+
+_STOPWORDS = frozenset([
+    "a", "an", "and", "the", "of", "for", "to", "in", "on", "with",
+    "about", "into", "using", "how",
+])
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9]+)*")
+
+
+def _stem(token):
+    if len(token) > 3 and token.isalpha() and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokens(topic):
+    # "node.js" and "nodejs" are the same token
+    found = [t.replace(".", "") for t in _TOKEN.findall(str(topic).casefold())]
+    return sorted({_stem(t) for t in found if t not in _STOPWORDS}) or sorted(set(found))
+
+
+def signature(topic):
+    return " ".join(tokens(topic)) or " ".join(str(topic).split()).casefold()
+
+
+def display_name(topic):
+    """Name for a new canonical topic: whitespace collapsed, stray punctuation trimmed."""
+    name = " ".join(str(topic).split()).strip(" .,;:!?\"'")
+    words = name.split()
+    if all(w.isupper() for w in words if any(c.isalpha() for c in w)):
+        words = [w.lower() for w in words]
+    # Lower-case words are capitalized; anything else ("SQL", "iOS") is kept as typed
+    return " ".join(
+        w[:1].upper() + w[1:] if w.islower() and (i == 0 or w not in _STOPWORDS) else w
+        for i, w in enumerate(words)
+    )[:255]
+
+
+def _numbers(words):
+    # Topics that differ only by a version ("python 2" / "python 3") must not merge
+    return zlib.crc32(" ".join(w for w in words if any(c.isdigit() for c in w)).encode("utf-8"))
+
+
+def vectorize(words):
+    vector = np.zeros(DIMENSIONS, dtype=np.float32)
+    for word in words:
+        padded = f"#{word}#"
+        for i in range(len(padded) - 2):
+            vector[zlib.crc32(padded[i:i + 3].encode("utf-8")) % DIMENSIONS] += 1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class TopicIndex:
+    """Bounded in-memory similarity index over ``CanonicalTopic`` rows, refreshed incrementally."""
+
+    def __init__(self, size=None):
+        self._capacity = size or settings.TOPIC_INDEX_SIZE
+        self._lock = threading.Lock()
+        # Allocated once; np.zeros leaves untouched rows unbacked by memory
+        self._matrix = np.zeros((self._capacity, DIMENSIONS), dtype=np.float32)
+        self._numbers = np.zeros(self._capacity, dtype=np.int64)
+        self._ids = [0] * self._capacity
+        self._names = [""] * self._capacity
+        self._rows = OrderedDict()     # canonical key -> matrix row, least recently used first
+        self._aliases = OrderedDict()  # key of a similar phrasing -> (id, name)
+        self._last_id = 0
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _add(self, topic):
+        if topic.key in self._rows:
+            return
+        if len(self._rows) < self._capacity:
+            row = len(self._rows)
+        else:
+            _, row = self._rows.popitem(last=False)
+        words = topic.key.split()
+        self._matrix[row] = vectorize(words)
+        self._numbers[row] = _numbers(words)
+        self._ids[row] = topic.id
+        self._names[row] = topic.name
+        self._rows[topic.key] = row
+        self._last_id = max(self._last_id, topic.id)
+
+    def _lookup(self, key):
+        row = self._rows.get(key)
+        if row is not None:
+            self._rows.move_to_end(key)
+            return self._ids[row], self._names[row]
+        match = self._aliases.get(key)
+        if match is not None:
+            self._aliases.move_to_end(key)
+        return match
+
+    def _fetch_new(self):
+        # Only the newest rows can survive eviction, so don't read the rest
+        new = CanonicalTopic.objects.filter(id__gt=self._last_id).order_by("-id")[:self._capacity]
+        return list(reversed(new))
+
+    def refresh(self):
+        """Load canonical topics created since the last refresh (possibly by other processes)."""
+        topics = self._fetch_new()
+        with self._lock:
+            for topic in topics:
+                self._add(topic)
+
+    def nearest(self, words):
+        """Return ``(id, name, similarity)`` of the closest known topic, or None."""
+        count = len(self._rows)
+        if not count:
+            return None
+        similarity = self._matrix[:count] @ vectorize(words)
+        similarity[self._numbers[:count] != _numbers(words)] = -1.0
+        best = int(np.argmax(similarity))
+        return self._ids[best], self._names[best], float(similarity[best])
+
+    def resolve(self, topic):
+        """Return ``(id, name)`` of the canonical topic for free-text ``topic``."""
+        key = signature(topic)[:255]
+        with self._lock:
+            match = self._lookup(key)
+        if match:
+            return match
+
+        # Database work happens outside the lock so one slow query or write
+        # doesn't hold up every other lookup in the process
+        topics = self._fetch_new()
+        with self._lock:
+            for new in topics:
+                self._add(new)
+            match = self._lookup(key)
+            if match:
+                return match
+
+            match = self.nearest(key.split())
+            if match and match[2] >= settings.TOPIC_SIMILARITY_THRESHOLD:
+                self._aliases[key] = match[:2]
+                if len(self._aliases) > self._capacity:
+                    self._aliases.popitem(last=False)
+                return match[:2]
+
+        try:
+            canonical, _ = CanonicalTopic.objects.get_or_create(
+                key=key, defaults={"name": display_name(topic)}
+            )
+        except IntegrityError:
+            canonical = CanonicalTopic.objects.get(key=key)
+        with self._lock:
+            self._add(canonical)
+        return canonical.id, canonical.name
+
+
+_index = TopicIndex()
+
+
+def canonical_topic(topic):
+    """Canonical display name that requests for ``topic`` should be served under."""
+    return _index.resolve(topic)[1]
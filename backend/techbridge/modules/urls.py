@@ -6,15 +6,25 @@ from .views import (
     SubmitModuleTestAPI,
     RegenerateTestAPI,
     SearchLearningPathAPI,
-    UserLearningHistoryAPI
+    GenerateModuleStreamAPI,
+    SearchLearningPathStreamAPI,
+    UserLearningHistoryAPI,
+    LearningHistorySearchAPI,
+    GenerationJobStatusAPI
 )
+from .async_views import GenerateModuleAsyncAPI
 
 urlpatterns = [
     path("generate/", GenerateModuleAPI.as_view()),
+    path("generate/async/", GenerateModuleAsyncAPI.as_view()),
+    path("generate/stream/", GenerateModuleStreamAPI.as_view()),
     path("<int:module_id>/", ModuleDetailAPI.as_view()),
     path("<int:module_id>/test/", ModuleTestDetailAPI.as_view()),
     path("<int:module_id>/test/submit/", SubmitModuleTestAPI.as_view()),
     path("<int:module_id>/test/regenerate/", RegenerateTestAPI.as_view()),
     path("search/", SearchLearningPathAPI.as_view()),
+    path("search/stream/", SearchLearningPathStreamAPI.as_view()),
     path("history/", UserLearningHistoryAPI.as_view()),
+    path("history/search/", LearningHistorySearchAPI.as_view()),
+    path("jobs/<int:job_id>/", GenerationJobStatusAPI.as_view()),
 ]
@@ -1,31 +1,75 @@
+import json
+
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 
+from accounts.throttling import SlidingWindowThrottle
+
 from .models import (
     LearningModule,
     ModuleTest,
-    ModuleTestAttempt
+    ModuleTestAttempt,
+    GenerationJob
 )
+from .pagination import LearningHistoryPagination, SearchResultsPagination
 from .serializers import (
     LearningModuleSerializer,
-    ModuleTestSerializer
+    LearningModuleListSerializer,
+    ModuleTestSerializer,
+    GenerationJobSerializer
 )
 from .services import (
-    map_learning_level_to_difficulty,
-    evaluate_test
+    difficulty_for_profile,
+    evaluate_test,
+    create_module_with_test,
+    update_skill_rating
 )
 from .gemini import (
-    generate_module_content,
-    generate_test,
-    generate_detailed_roadmap
+    stream_module_content,
+    stream_detailed_roadmap
 )
+from .question_bank import draw_questions
+from .search import search_modules
+from .topics import canonical_topic
+from . import jobs
+
+
+def _sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _event_stream_response(events):
+    response = StreamingHttpResponse(events, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # Stop nginx from buffering the stream
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+def _module_summary(module):
+    serializer = LearningModuleSerializer(module)
+    # Drop the field before serializing so the body is never loaded
+    serializer.fields.pop("content")
+    return serializer.data
+
+
+def _learner_difficulty(user):
+    # Determine difficulty based on learner profile
+    try:
+        return difficulty_for_profile(user.profile)
+    except Exception:
+        return "intermediate"
 
 
 class GenerateModuleAPI(APIView):
    
     permission_classes = [IsAuthenticated]
+    throttle_classes = [SlidingWindowThrottle]
+    throttle_scope = "generation"
 
     def post(self, request):
         topic = request.data.get("topic")
@@ -36,33 +80,17 @@ class GenerateModuleAPI(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        profile = request.user.profile
-        learning_level = profile.learning_rate
+        # Equivalent phrasings share cached content and question banks
+        topic = canonical_topic(topic)
 
-        difficulty = map_learning_level_to_difficulty(learning_level)
+        # Adaptive: follows the learner's test results once they have any
+        difficulty = difficulty_for_profile(request.user.profile)
 
-        content = generate_module_content(topic, difficulty)
-
-        module = LearningModule.objects.create(
-            user=request.user,
-            topic=topic,
-            difficulty=difficulty,
-            content=content
-        )
-
-        questions = generate_test(topic, difficulty)
-
-        test = ModuleTest.objects.create(
-            module=module,
-            questions=questions
-        )
+        job = jobs.enqueue(request.user, "module", topic, difficulty)
 
         return Response(
-            {
-                "module": LearningModuleSerializer(module).data,
-                "test": ModuleTestSerializer(test).data
-            },
-            status=status.HTTP_201_CREATED
+            {"job": GenerationJobSerializer(job).data},
+            status=status.HTTP_202_ACCEPTED
         )
 
 
@@ -72,7 +100,7 @@ class ModuleDetailAPI(APIView):
 
     def get(self, request, module_id):
         try:
-            module = LearningModule.objects.get(
+            module = LearningModule.objects.select_related("module_content").get(
                 id=module_id,
                 user=request.user
             )
@@ -139,20 +167,23 @@ class SubmitModuleTestAPI(APIView):
 
         passed = percentage >= test.pass_percentage
 
-        ModuleTestAttempt.objects.create(
-            module=module,
-            user=request.user,
-            score=score,
-            percentage=percentage,
-            passed=passed
-        )
+        with transaction.atomic():
+            ModuleTestAttempt.objects.create(
+                module=module,
+                user=request.user,
+                score=score,
+                percentage=percentage,
+                passed=passed
+            )
+
+            if passed:
+                module.is_completed = True
+            else:
+                module.retry_count += 1
 
-        if passed:
-            module.is_completed = True
-        else:
-            module.retry_count += 1
+            module.save(update_fields=["is_completed", "retry_count"])
 
-        module.save()
+            profile = update_skill_rating(request.user, module.difficulty, percentage)
 
         return Response(
             {
@@ -160,7 +191,9 @@ class SubmitModuleTestAPI(APIView):
                 "score": score,
                 "percentage": percentage,
                 "retry_count": module.retry_count,
-                "module_completed": module.is_completed
+                "module_completed": module.is_completed,
+                "skill_rating": round(profile.skill_rating),
+                "next_difficulty": difficulty_for_profile(profile)
             },
             status=status.HTTP_200_OK
         )
@@ -169,6 +202,8 @@ class SubmitModuleTestAPI(APIView):
 class RegenerateTestAPI(APIView):
    
     permission_classes = [IsAuthenticated]
+    throttle_classes = [SlidingWindowThrottle]
+    throttle_scope = "generation"
 
     def post(self, request, module_id):
         try:
@@ -183,7 +218,9 @@ class RegenerateTestAPI(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        new_questions = generate_test(
+        # Served from the question bank, skipping questions already shown
+        new_questions = draw_questions(
+            request.user,
             module.topic,
             module.difficulty
         )
@@ -203,6 +240,8 @@ class RegenerateTestAPI(APIView):
 class SearchLearningPathAPI(APIView):
     """API for searching and generating a detailed learning roadmap."""
     permission_classes = [IsAuthenticated]
+    throttle_classes = [SlidingWindowThrottle]
+    throttle_scope = "generation"
 
     def post(self, request):
         topic = request.data.get("topic")
@@ -211,45 +250,179 @@ class SearchLearningPathAPI(APIView):
                 {"error": "Topic is required"},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        # Equivalent phrasings share cached content and question banks
+        topic = canonical_topic(topic)
 
-        # Generate comprehensive content
-        content = generate_detailed_roadmap(topic)
+        difficulty = _learner_difficulty(request.user)
 
-        # Determine difficulty based on learner profile
-        difficulty = "intermediate"
-        try:
-            profile = request.user.profile
-            difficulty = map_learning_level_to_difficulty(profile.learning_rate)
-        except Exception:
-            pass
-
-        # Save to database so user can revisit
-        module = LearningModule.objects.create(
-            user=request.user,
-            topic=topic,
-            difficulty=difficulty,
-            content=content
-        )
+        # Roadmap is generated and saved by a worker so the user can revisit it
+        job = jobs.enqueue(request.user, "roadmap", topic, difficulty)
 
         return Response(
             {
-                "message": "Learning roadmap generated successfully",
-                "module": LearningModuleSerializer(module).data
+                "message": "Learning roadmap generation started",
+                "job": GenerationJobSerializer(job).data
             },
-            status=status.HTTP_201_CREATED
+            status=status.HTTP_202_ACCEPTED
         )
 
 
+class GenerateModuleStreamAPI(APIView):
+    """Stream module content as server-sent events, then create the module and its test."""
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [SlidingWindowThrottle]
+    throttle_scope = "generation"
+
+    def post(self, request):
+        topic = request.data.get("topic")
+        if not topic:
+            return Response(
+                {"error": "Topic is required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        # Equivalent phrasings share cached content and question banks
+        topic = canonical_topic(topic)
+
+        user = request.user
+        difficulty = difficulty_for_profile(user.profile)
+
+        def events():
+            parts = []
+            for text in stream_module_content(topic, difficulty):
+                parts.append(text)
+                yield _sse_event("chunk", {"text": text})
+
+            questions = draw_questions(user, topic, difficulty)
+            module, test = create_module_with_test(
+                user, topic, difficulty, "".join(parts), questions
+            )
+            yield _sse_event("done", {
+                "module": _module_summary(module),
+                "test": ModuleTestSerializer(test).data
+            })
+
+        return _event_stream_response(events())
+
+
+class SearchLearningPathStreamAPI(APIView):
+    """Stream a detailed learning roadmap as server-sent events and save it once complete."""
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [SlidingWindowThrottle]
+    throttle_scope = "generation"
+
+    def post(self, request):
+        topic = request.data.get("topic")
+        if not topic:
+            return Response(
+                {"error": "Topic is required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        # Equivalent phrasings share cached content and question banks
+        topic = canonical_topic(topic)
+
+        user = request.user
+        difficulty = _learner_difficulty(user)
+
+        def events():
+            parts = []
+            for text in stream_detailed_roadmap(topic):
+                parts.append(text)
+                yield _sse_event("chunk", {"text": text})
+
+            module = LearningModule.objects.create(
+                user=user,
+                topic=topic,
+                difficulty=difficulty,
+                content="".join(parts)
+            )
+            yield _sse_event("done", {"module": _module_summary(module)})
+
+        return _event_stream_response(events())
+
+
 class UserLearningHistoryAPI(APIView):
-    """API to fetch user's previous learning path modules."""
+    """API to fetch user's previous learning path modules, newest first, one page at a time."""
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        modules = LearningModule.objects.filter(
-            user=request.user
-        ).order_by('-created_at')
-        
-        return Response(
-            LearningModuleSerializer(modules, many=True).data,
-            status=status.HTTP_200_OK
+        fields = LearningModuleListSerializer.DEFAULT_FIELDS
+        if request.query_params.get("fields"):
+            fields = [f.strip() for f in request.query_params["fields"].split(",") if f.strip()]
+            unknown = set(fields) - set(LearningModuleListSerializer.Meta.fields)
+            if unknown:
+                return Response(
+                    {"error": f"Unknown fields: {', '.join(sorted(unknown))}"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        # Only load requested columns; created_at is needed for the cursor
+        columns = {"id", "created_at", *fields}
+        modules = LearningModule.objects.filter(user=request.user)
+        if "content" in columns:
+            # Bodies live in ModuleContent; join them into the same query
+            columns.discard("content")
+            columns.add("module_content__body")
+            modules = modules.select_related("module_content")
+        modules = modules.only(*columns)
+
+        paginator = LearningHistoryPagination()
+        page = paginator.paginate_queryset(modules, request, view=self)
+        return paginator.get_paginated_response(
+            LearningModuleListSerializer(page, many=True, fields=fields).data
         )
+
+
+class LearningHistorySearchAPI(APIView):
+    """Full-text search over the user's modules, best match first, with highlighted snippets."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            return Response(
+                {"error": "Query parameter 'q' is required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        paginator = SearchResultsPagination()
+        hits = paginator.paginate_hits(
+            request,
+            lambda limit, offset: search_modules(request.user, query, limit, offset)
+        )
+
+        modules = LearningModule.objects.only(
+            "id", "topic", "difficulty", "is_completed", "created_at"
+        ).in_bulk([hit.module_id for hit in hits])
+
+        results = [
+            {
+                "id": hit.module_id,
+                "topic": modules[hit.module_id].topic,
+                "difficulty": modules[hit.module_id].difficulty,
+                "is_completed": modules[hit.module_id].is_completed,
+                "created_at": modules[hit.module_id].created_at,
+                "snippet": hit.snippet,
+                "rank": hit.rank
+            }
+            for hit in hits if hit.module_id in modules
+        ]
+        return paginator.get_paginated_response(results)
+
+
+class GenerationJobStatusAPI(APIView):
+    """Poll the status of a queued module or roadmap generation."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id):
+        try:
+            job = GenerationJob.objects.get(
+                id=job_id,
+                user=request.user
+            )
+        except GenerationJob.DoesNotExist:
+            return Response(
+                {"error": "Job not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        return Response(GenerationJobSerializer(job).data)
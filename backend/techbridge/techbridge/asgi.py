@@ -3,6 +3,9 @@ ASGI config for techbridge project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve it with an ASGI server (e.g. ``uvicorn techbridge.asgi:application``)
+so async views such as ``modules.async_views`` run on the event loop.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
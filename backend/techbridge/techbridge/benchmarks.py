@@ -0,0 +1,38 @@
+"""Small helpers shared by the ``benchmark_*`` management commands."""
+import math
+import statistics
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of ``samples`` (``pct`` in 0-100)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def summarize(samples):
+    """Return count, mean, p50, p95, p99 and max of a list of timings."""
+    return {
+        "count": len(samples),
+        "mean": statistics.fmean(samples) if samples else 0.0,
+        "p50": percentile(samples, 50),
+        "p95": percentile(samples, 95),
+        "p99": percentile(samples, 99),
+        "max": max(samples) if samples else 0.0,
+    }
+
+
+def format_timings(samples, unit="ms"):
+    """One-line summary of timings given in seconds."""
+    scale = {"s": 1, "ms": 1000, "us": 1000000}[unit]
+    summary = summarize(samples)
+    return (
+        f"n={summary['count']} "
+        f"mean={summary['mean'] * scale:.2f}{unit} "
+        f"p50={summary['p50'] * scale:.2f}{unit} "
+        f"p95={summary['p95'] * scale:.2f}{unit} "
+        f"p99={summary['p99'] * scale:.2f}{unit} "
+        f"max={summary['max'] * scale:.2f}{unit}"
+    )
@@ -0,0 +1,119 @@
+"""
+Structured, non-blocking logging.
+
+Request threads only put records on a bounded queue; a ``QueueListener``
+thread formats them as one JSON object per line and writes them out.
+Every record carries the id of the request it was logged from
+(``RequestIdMiddleware``) and DEBUG records are sampled per request.
+Wired up by ``LOGGING`` in settings.
+"""
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import queue
+import zlib
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+request_id = contextvars.ContextVar("request_id", default="-")
+
+# Attributes every LogRecord has; anything else came in through ``extra=``
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {
+    "message", "asctime", "request_id", "taskName"
+}
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp records with the current request id."""
+
+    def filter(self, record):
+        record.request_id = request_id.get()
+        return True
+
+
+class DebugSampler(logging.Filter):
+    """
+    Keep roughly ``rate`` of DEBUG records; other levels always pass.
+
+    The decision is derived from the request id, so a sampled request keeps
+    all of its debug lines and the others drop all of theirs.
+    """
+
+    def __init__(self, rate=1.0):
+        super().__init__()
+        self.threshold = int(max(0.0, min(float(rate), 1.0)) * 10000)
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.threshold >= 10000:
+            return True
+        key = getattr(record, "request_id", "-")
+        if key == "-":
+            key = f"{record.thread}:{record.relativeCreated}"
+        return zlib.crc32(key.encode()) % 10000 < self.threshold
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class QueueLogHandler(QueueHandler):
+    """
+    ``QueueHandler`` that owns its listener and a stream handler.
+
+    ``emit`` never blocks: when the queue is full the record is dropped and
+    counted in ``dropped``. The formatter set by ``dictConfig`` is applied on
+    the listener thread.
+    """
+
+    def __init__(self, stream=None, queue_size=10000):
+        super().__init__(queue.Queue(maxsize=queue_size))
+        self.target = logging.StreamHandler(stream)
+        self.dropped = 0
+        self.listener = QueueListener(self.queue, self.target, respect_handler_level=False)
+        self.listener.start()
+        atexit.register(self._stop_listener)
+
+    def setFormatter(self, fmt):
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        # Resolve what can change or cannot be read later, leave formatting to the listener
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _stop_listener(self):
+        # Flushes the queue; safe to call twice (atexit and logging.shutdown)
+        if self.listener._thread is not None:
+            self.listener.stop()
+
+    def close(self):
+        self._stop_listener()
+        super().close()
@@ -0,0 +1,226 @@
+"""
+Process-local metrics, exposed in the Prometheus text format.
+
+Nothing is recorded unless ``settings.METRICS_ENABLED`` is set: the
+middleware removes itself and every recording helper returns straight
+away. Each process keeps its own numbers, so with several workers scrape
+each one (Prometheus aggregates them).
+"""
+import bisect
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+_registry = []
+
+
+def enabled():
+    return settings.METRICS_ENABLED
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        f'{name}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for name, value in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+        _registry.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+            lines.extend(self._render_samples(items))
+        return lines
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        if not enabled():
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _render_samples(self, items):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value}" for key, value in items]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        if not enabled():
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def _render_samples(self, items):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value}" for key, value in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        if not enabled():
+            return
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _render_samples(self, items):
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', le)])} {cumulative}"
+                )
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+    def time(self, **labels):
+        """Decorator recording the wrapped function's duration."""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not enabled():
+                    return func(*args, **kwargs)
+                started = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(time.perf_counter() - started, **labels)
+            return wrapper
+        return decorator
+
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time to produce a response, by route.",
+    ["view", "method", "status"]
+)
+DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "Database queries executed per request, by route.",
+    ["view"],
+    buckets=QUERY_COUNT_BUCKETS
+)
+DB_QUERY_DURATION = Histogram(
+    "http_request_db_seconds",
+    "Time spent in database queries per request, by route.",
+    ["view"]
+)
+GENERATION_DURATION = Histogram(
+    "generation_duration_seconds",
+    "End-to-end duration of content generation functions, cache hits included.",
+    ["function"]
+)
+LLM_CALL_DURATION = Histogram(
+    "llm_call_duration_seconds",
+    "Duration of LLM provider calls.",
+    ["function", "outcome"]
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_estimated_total",
+    "Estimated LLM tokens (characters / 4), by direction.",
+    ["function", "direction"]
+)
+GENERATION_FALLBACKS = Counter(
+    "generation_fallbacks_total",
+    "Generations that returned static fallback content because the LLM call failed.",
+    ["function"]
+)
+
+LLM_POOL_IN_FLIGHT = Gauge(
+    "llm_pool_in_flight",
+    "Gemini calls currently holding a pooled client."
+)
+LLM_POOL_QUEUE_WAIT = Histogram(
+    "llm_pool_queue_wait_seconds",
+    "Time Gemini calls waited for a free pooled client."
+)
+LLM_POOL_REJECTED = Counter(
+    "llm_pool_rejected_total",
+    "Gemini calls refused because no pooled client came free within LLM_POOL_ACQUIRE_TIMEOUT."
+)
+GENERATION_CACHE_LOOKUPS = Counter(
+    "generation_cache_lookups_total",
+    "Generated content cache lookups, by kind and result (hit or miss).",
+    ["kind", "result"]
+)
+GENERATION_CACHE_STORES = Counter(
+    "generation_cache_stores_total",
+    "Generated content written to the cache, by kind.",
+    ["kind"]
+)
+GENERATION_CACHE_EVICTIONS = Counter(
+    "generation_cache_evictions_total",
+    "Cache entries removed because they expired or the cache was over its size cap."
+)
+
+
+def estimate_tokens(text):
+    return max(len(text or "") // 4, 1)
+
+
+def render():
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint; 404 unless metrics are enabled."""
+    if not enabled():
+        raise Http404
+    token = settings.METRICS_AUTH_TOKEN
+    if token and request.headers.get("Authorization") != f"Bearer {token}":
+        return HttpResponse(status=401)
+    return HttpResponse(render(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,143 @@
+import logging
+import re
+import time
+import uuid
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.signals import request_finished
+from django.db import connection
+
+from . import metrics
+from .log import request_id
+
+logger = logging.getLogger(__name__)
+
+# Incoming ids are reused only if they look like ids, so they can't inject into logs
+_REQUEST_ID = re.compile(r"^[A-Za-z0-9._-]{1,128}$")
+
+
+class _QueryTimer:
+    """``execute_wrapper`` that counts and times the queries it sees."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+
+class _TimedStream:
+    """
+    Streaming content that keeps counting queries while it is consumed and
+    records the request once the response is closed.
+    """
+
+    def __init__(self, content, timer, record):
+        self.content = content
+        self.timer = timer
+        self.record = record
+
+    def __iter__(self):
+        with connection.execute_wrapper(self.timer):
+            yield from self.content
+
+    def close(self):
+        if self.record is not None:
+            self.record()
+            self.record = None
+
+
+def _route(request):
+    match = getattr(request, "resolver_match", None)
+    # The route pattern ("api/modules/<int:module_id>/") keeps label cardinality bounded
+    return match.route if match else "unmatched"
+
+
+def _counts_queries(request):
+    match = getattr(request, "resolver_match", None)
+    view_class = getattr(match.func, "view_class", None) if match else None
+    return getattr(view_class, "db_queries_on_request_thread", True)
+
+
+class MetricsMiddleware:
+    """
+    Record latency and database usage of every request; removed when metrics are disabled.
+
+    Streaming responses are recorded when they are closed, so their duration
+    covers the whole stream. Queries are seen only on the request's own
+    connection: views that run theirs on worker threads set
+    ``db_queries_on_request_thread = False`` and are left out of the
+    database histograms. Work handed to the job queue is not the request's.
+    """
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = _QueryTimer()
+        started = time.perf_counter()
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+
+        def record():
+            view = _route(request)
+            metrics.HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - started, view=view, method=request.method, status=response.status_code
+            )
+            if _counts_queries(request):
+                metrics.DB_QUERIES.observe(timer.count, view=view)
+                metrics.DB_QUERY_DURATION.observe(timer.duration, view=view)
+
+        if response.streaming and not response.is_async:
+            response.streaming_content = _TimedStream(response.streaming_content, timer, record)
+        else:
+            record()
+        return response
+
+
+class RequestIdMiddleware:
+    """
+    Tag the request, its log records and the response with a request id.
+
+    A well-formed ``X-Request-ID`` from the client or a proxy is kept so
+    logs can be correlated across services; otherwise a new one is made.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        incoming = request.headers.get("X-Request-ID", "")
+        request.id = incoming if _REQUEST_ID.match(incoming) else uuid.uuid4().hex
+        # Not reset on the way out: Django logs 4xx/5xx responses (django.request)
+        # after the middleware chain returns, and those lines need the id too.
+        # clear_request_id resets it once the response is closed.
+        request_id.set(request.id)
+        started = time.perf_counter()
+        response = self.get_response(request)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Request finished", extra={
+                "method": request.method,
+                "path": request.path,
+                "status": response.status_code,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+            })
+        response["X-Request-ID"] = request.id
+        return response
+
+
+def clear_request_id(sender, **kwargs):
+    """Forget the request id when the response is closed, after Django has logged it."""
+    request_id.set("-")
+
+
+request_finished.connect(clear_request_id, dispatch_uid="techbridge.clear_request_id")
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+import sys
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -54,13 +55,17 @@ CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_HEADERS = [
     "content-type",
     "authorization",
+    "x-request-id",
 ]
+CORS_EXPOSE_HEADERS = ["x-request-id"]
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     )
 }
 MIDDLEWARE = [
+    "techbridge.middleware.RequestIdMiddleware",
+    "techbridge.middleware.MetricsMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -96,12 +101,62 @@ AUTH_USER_MODEL = 'accounts.User'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# DB_ENGINE=postgresql for production. Connections are either pooled
+# (DB_POOL=True, psycopg_pool) or kept open for DB_CONN_MAX_AGE seconds.
+# The SQLite default runs in WAL mode with IMMEDIATE write transactions so
+# concurrent writers queue on the busy timeout instead of failing.
+DB_ENGINE = os.getenv("DB_ENGINE", "sqlite")
+
+if DB_ENGINE == "postgresql":
+    DB_POOL = os.getenv("DB_POOL", "False") == "True"
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv("DB_NAME", "techbridge"),
+            'USER': os.getenv("DB_USER", "techbridge"),
+            'PASSWORD': os.getenv("DB_PASSWORD", ""),
+            'HOST': os.getenv("DB_HOST", "localhost"),
+            'PORT': os.getenv("DB_PORT", "5432"),
+            # Persistent connections and the pool are mutually exclusive
+            'CONN_MAX_AGE': 0 if DB_POOL else int(os.getenv("DB_CONN_MAX_AGE", 60)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'connect_timeout': int(os.getenv("DB_CONNECT_TIMEOUT", 5)),
+            },
+        }
+    }
+    if DB_POOL:
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.getenv("DB_POOL_MIN_SIZE", 2)),
+            'max_size': int(os.getenv("DB_POOL_MAX_SIZE", 10)),
+            'timeout': float(os.getenv("DB_POOL_TIMEOUT", 10)),
+        }
+else:
+    SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 20000))
+    SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", 20000))
+    SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", 128 * 1024 * 1024))
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv("DB_NAME", BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                'timeout': SQLITE_BUSY_TIMEOUT_MS / 1000,
+                # Take the write lock when a transaction starts; a deferred
+                # transaction that upgrades to a write can fail with
+                # "database is locked" without waiting on the busy timeout
+                'transaction_mode': os.getenv("SQLITE_TRANSACTION_MODE", "IMMEDIATE"),
+                'init_command': (
+                    f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE};"
+                    f"PRAGMA synchronous={SQLITE_SYNCHRONOUS};"
+                    f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB};"
+                    f"PRAGMA mmap_size={SQLITE_MMAP_SIZE};"
+                    "PRAGMA temp_store=MEMORY;"
+                ),
+            },
+        }
     }
-}
 
 
 # Password validation
@@ -122,6 +177,32 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing (accounts.hashers). New hashes use PASSWORD_HASH_POLICY
+# (pbkdf2, scrypt or argon2). Hashes made under another policy or cost still
+# verify and are upgraded on the next login. Size the costs with
+# `manage.py benchmark_password_hashers`; the defaults are Django's
+PASSWORD_HASH_POLICY = os.getenv("PASSWORD_HASH_POLICY", "pbkdf2")
+PASSWORD_PBKDF2_ITERATIONS = int(os.getenv("PASSWORD_PBKDF2_ITERATIONS", 1000000))
+PASSWORD_SCRYPT_WORK_FACTOR = int(os.getenv("PASSWORD_SCRYPT_WORK_FACTOR", 2 ** 14))
+PASSWORD_SCRYPT_BLOCK_SIZE = int(os.getenv("PASSWORD_SCRYPT_BLOCK_SIZE", 32))
+PASSWORD_SCRYPT_PARALLELISM = int(os.getenv("PASSWORD_SCRYPT_PARALLELISM", 1))
+PASSWORD_ARGON2_TIME_COST = int(os.getenv("PASSWORD_ARGON2_TIME_COST", 2))
+PASSWORD_ARGON2_MEMORY_COST = int(os.getenv("PASSWORD_ARGON2_MEMORY_COST", 102400))  # KiB
+PASSWORD_ARGON2_PARALLELISM = int(os.getenv("PASSWORD_ARGON2_PARALLELISM", 8))
+
+_PASSWORD_HASHERS = {
+    "pbkdf2": "accounts.hashers.PBKDF2PasswordHasher",
+    "scrypt": "accounts.hashers.ScryptPasswordHasher",
+    "argon2": "accounts.hashers.Argon2PasswordHasher",
+}
+PASSWORD_HASHERS = [_PASSWORD_HASHERS[PASSWORD_HASH_POLICY]] + [
+    path for policy, path in _PASSWORD_HASHERS.items() if policy != PASSWORD_HASH_POLICY
+] + [
+    # Verify-only: the rest of Django's defaults, so hashes made by them still log in
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+]
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
@@ -146,4 +227,153 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Gemini API Key
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
\ No newline at end of file
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+
+# Generated content cache (modules.cache)
+GENERATION_CACHE_TTL = int(os.getenv("GENERATION_CACHE_TTL", 60 * 60 * 24 * 7))
+GENERATION_CACHE_MAX_ENTRIES = int(os.getenv("GENERATION_CACHE_MAX_ENTRIES", 5000))
+# Seconds between write-backs of an entry's hit count and last use
+GENERATION_CACHE_TOUCH_INTERVAL = int(os.getenv("GENERATION_CACHE_TOUCH_INTERVAL", 300))
+# Seconds between evictions triggered by stores in one process
+GENERATION_CACHE_EVICT_INTERVAL = int(os.getenv("GENERATION_CACHE_EVICT_INTERVAL", 600))
+
+# Module body compression (modules.compression): preset dictionaries are read from
+# v<version>.zdict files in this directory; new bodies use COMPRESSION_DICTIONARY_VERSION.
+# Deploy a newly trained dictionary file to every server before switching to it.
+COMPRESSION_DICTIONARY_DIR = os.getenv("COMPRESSION_DICTIONARY_DIR", str(BASE_DIR / "modules" / "dictionaries"))
+COMPRESSION_DICTIONARY_VERSION = int(os.getenv("COMPRESSION_DICTIONARY_VERSION", 1))
+
+# Background generation jobs (modules.jobs)
+# Eager mode runs jobs inside the request, for local development without a worker.
+GENERATION_JOBS_EAGER = os.getenv("GENERATION_JOBS_EAGER", "False") == "True"
+GENERATION_WORKER_CONCURRENCY = int(os.getenv("GENERATION_WORKER_CONCURRENCY", 4))
+GENERATION_JOB_MAX_ATTEMPTS = int(os.getenv("GENERATION_JOB_MAX_ATTEMPTS", 3))
+GENERATION_JOB_RETRY_BACKOFF = int(os.getenv("GENERATION_JOB_RETRY_BACKOFF", 5))
+GENERATION_JOB_RETRY_BACKOFF_MAX = int(os.getenv("GENERATION_JOB_RETRY_BACKOFF_MAX", 300))
+GENERATION_JOB_LOCK_TIMEOUT = int(os.getenv("GENERATION_JOB_LOCK_TIMEOUT", 600))
+
+# LLM provider (modules.llm): "gemini" or "fake" for offline load testing
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "gemini")
+LLM_MODEL_NAME = os.getenv("LLM_MODEL_NAME", "gemini-2.5-flash")
+LLM_FAKE_LATENCY_MS = float(os.getenv("LLM_FAKE_LATENCY_MS", 0))
+LLM_FAKE_JITTER_MS = float(os.getenv("LLM_FAKE_JITTER_MS", 0))
+LLM_FAKE_ERROR_RATE = float(os.getenv("LLM_FAKE_ERROR_RATE", 0))
+LLM_FAKE_SEED = os.getenv("LLM_FAKE_SEED")
+
+# Gemini client pool: channels per process, in-flight cap and timeouts (seconds)
+LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", 2))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 16))
+LLM_POOL_ACQUIRE_TIMEOUT = float(os.getenv("LLM_POOL_ACQUIRE_TIMEOUT", 30))
+LLM_REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", 60))
+LLM_KEEPALIVE_MS = int(os.getenv("LLM_KEEPALIVE_MS", 30000))
+
+# Single-flight generation lease (modules.singleflight), in seconds
+GENERATION_LOCK_TIMEOUT = int(os.getenv("GENERATION_LOCK_TIMEOUT", 120))
+GENERATION_LOCK_POLL_INTERVAL = float(os.getenv("GENERATION_LOCK_POLL_INTERVAL", 0.5))
+
+# Questions generated per batched call when topping up the question bank
+QUESTION_BANK_BATCH_SIZE = int(os.getenv("QUESTION_BANK_BATCH_SIZE", 25))
+
+# Learning level bands (analysis.services): assessment score <= SLOW_MAX is "slow",
+# <= AVERAGE_MAX is "average", anything higher is "fast"
+LEARNING_LEVEL_SLOW_MAX_SCORE = int(os.getenv("LEARNING_LEVEL_SLOW_MAX_SCORE", 15))
+LEARNING_LEVEL_AVERAGE_MAX_SCORE = int(os.getenv("LEARNING_LEVEL_AVERAGE_MAX_SCORE", 30))
+
+# Adaptive difficulty (modules.services): Elo K-factor, larger for a learner's first few tests
+SKILL_RATING_K = float(os.getenv("SKILL_RATING_K", 40))
+SKILL_RATING_K_PROVISIONAL = float(os.getenv("SKILL_RATING_K_PROVISIONAL", 80))
+SKILL_RATING_PROVISIONAL_ATTEMPTS = int(os.getenv("SKILL_RATING_PROVISIONAL_ATTEMPTS", 5))
+
+# Topic index (modules.topics): minimum cosine similarity for two topics to share content,
+# and how many topics each process keeps in memory (least recently used are dropped)
+TOPIC_SIMILARITY_THRESHOLD = float(os.getenv("TOPIC_SIMILARITY_THRESHOLD", 0.8))
+TOPIC_INDEX_SIZE = int(os.getenv("TOPIC_INDEX_SIZE", 10000))
+
+# Logins within this many seconds of the recorded last_login don't write it again
+LAST_LOGIN_UPDATE_INTERVAL = int(os.getenv("LAST_LOGIN_UPDATE_INTERVAL", 60))
+
+# Shared cache. Every worker process must see the same counters for rate limits
+# to hold, so set REDIS_URL in production; CACHE_DIR gives processes on one host
+# a file-based cache, and without either each process keeps its own.
+REDIS_URL = os.getenv("REDIS_URL")
+CACHE_DIR = os.getenv("CACHE_DIR")
+CACHE_KEY_PREFIX = os.getenv("CACHE_KEY_PREFIX", "techbridge")
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+            "KEY_PREFIX": CACHE_KEY_PREFIX,
+        }
+    }
+elif CACHE_DIR:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": CACHE_DIR,
+            "KEY_PREFIX": CACHE_KEY_PREFIX,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "KEY_PREFIX": CACHE_KEY_PREFIX,
+        }
+    }
+
+# Rate limits (accounts.throttling) as "<count>/<period>", per user or client
+# address; an empty value turns a scope off. Counters live in Redis when it is
+# configured, otherwise in the database (the file cache can't increment atomically)
+THROTTLE_STORE = os.getenv("THROTTLE_STORE", "cache" if REDIS_URL else "database")
+THROTTLE_RATES = {
+    "login": os.getenv("THROTTLE_RATE_LOGIN", "20/min"),
+    "register": os.getenv("THROTTLE_RATE_REGISTER", "10/hour"),
+    "generation": os.getenv("THROTTLE_RATE_GENERATION", "30/hour"),
+}
+
+# Request/LLM metrics (techbridge.metrics), scraped from /metrics/; off by default
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "False") == "True"
+METRICS_AUTH_TOKEN = os.getenv("METRICS_AUTH_TOKEN")
+
+# Logging (techbridge.log): JSON lines (or "text") written from a background thread.
+# DEBUG records are kept for LOG_DEBUG_SAMPLE_RATE of requests; records beyond
+# LOG_QUEUE_SIZE waiting to be written are dropped rather than blocking requests
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", 0.01))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+# The test suite makes 4xx/5xx responses on purpose; don't print a line for each
+TESTING = sys.argv[1:2] == ["test"]
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "filters": {
+        "request_id": {"()": "techbridge.log.RequestIdFilter"},
+        "sample_debug": {"()": "techbridge.log.DebugSampler", "rate": LOG_DEBUG_SAMPLE_RATE},
+    },
+    "formatters": {
+        "json": {"()": "techbridge.log.JsonFormatter"},
+        "text": {"format": "%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s"},
+    },
+    "handlers": {
+        "queue": {
+            "class": "techbridge.log.QueueLogHandler",
+            "formatter": LOG_FORMAT,
+            "filters": ["request_id", "sample_debug"],
+            "queue_size": LOG_QUEUE_SIZE,
+        },
+        "null": {"class": "logging.NullHandler"},
+    },
+    "root": {"handlers": ["queue"], "level": "WARNING"},
+    "loggers": {
+        "django": {"handlers": ["queue"], "level": "INFO", "propagate": False},
+        "django.request": {"handlers": ["null" if TESTING else "queue"], "level": "WARNING", "propagate": False},
+        "accounts": {"level": LOG_LEVEL},
+        "analysis": {"level": LOG_LEVEL},
+        "modules": {"level": LOG_LEVEL},
+        "techbridge": {"level": LOG_LEVEL},
+    },
+}
@@ -17,8 +17,11 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path,include
 
+from .metrics import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics/', metrics_view),
     path('api/accounts/', include('accounts.urls')),
     path('api/analysis/', include('analysis.urls')),
     path('api/modules/', include('modules.urls')),
@@ -32,4 +32,47 @@ api.interceptors.response.use(
     }
 );
 
+// Poll a background generation job until it finishes
+export const waitForJob = async (jobId, { interval = 1500, timeout = 120000 } = {}) => {
+    const deadline = Date.now() + timeout;
+    while (Date.now() < deadline) {
+        const { data: job } = await api.get(`modules/jobs/${jobId}/`);
+        if (job.status === 'succeeded') return job;
+        if (job.status === 'failed') throw new Error(job.error || 'Generation failed');
+        await new Promise((resolve) => setTimeout(resolve, interval));
+    }
+    throw new Error('Generation timed out');
+};
+
+// POST to a server-sent events endpoint and call onEvent for each event as it arrives
+export const streamEvents = async (path, body, onEvent) => {
+    const token = localStorage.getItem('accessToken');
+    const response = await fetch(`${api.defaults.baseURL}${path}`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            ...(token ? { Authorization: `Bearer ${token}` } : {}),
+        },
+        body: JSON.stringify(body),
+    });
+    if (!response.ok) throw new Error(`Request failed with status ${response.status}`);
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    for (;;) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const raw = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            const event = raw.match(/^event: (.*)$/m)?.[1] || 'message';
+            const data = raw.match(/^data: (.*)$/m)?.[1];
+            if (data) onEvent({ event, data: JSON.parse(data) });
+        }
+    }
+};
+
 export default api;
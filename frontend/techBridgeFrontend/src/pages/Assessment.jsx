@@ -2,7 +2,7 @@ import React, { useState, useEffect } from 'react';
 import { motion, AnimatePresence } from 'framer-motion';
 import { FaCheck, FaArrowRight, FaSpinner, FaBrain, FaLightbulb, FaBookOpen } from 'react-icons/fa';
 import DashboardLayout from '../layouts/DashboardLayout';
-import api from '../api';
+import api, { waitForJob } from '../api';
 
 const Assessment = () => {
     const [phase, setPhase] = useState(1); // 1: Personality, 2: Topic, 3: Module View
@@ -66,7 +66,12 @@ const Assessment = () => {
 
         try {
             const response = await api.post('modules/generate/', { topic });
-            setGeneratedModule(response.data);
+            const job = await waitForJob(response.data.job.id);
+            const [moduleRes, testRes] = await Promise.all([
+                api.get(`modules/${job.module}/`),
+                api.get(`modules/${job.module}/test/`),
+            ]);
+            setGeneratedModule({ module: moduleRes.data, test: testRes.data });
             setPhase(3);
         } catch (err) {
             console.error("Module generation failed:", err);
@@ -6,7 +6,7 @@ import {
     FaArrowLeft, FaBrain
 } from 'react-icons/fa';
 import DashboardLayout from '../layouts/DashboardLayout';
-import api from '../api';
+import api, { streamEvents } from '../api';
 import ReactMarkdown from 'react-markdown';
 import remarkGfm from 'remark-gfm';
 
@@ -25,7 +25,7 @@ const LearningPath = () => {
     const fetchHistory = async () => {
         try {
             const response = await api.get('modules/history/');
-            setHistory(response.data);
+            setHistory(response.data.results);
         } catch (err) {
             console.error('Failed to fetch history:', err);
         }
@@ -40,8 +40,16 @@ const LearningPath = () => {
         setActiveModule(null);
 
         try {
-            const response = await api.post('modules/search/', { topic: topic.trim() });
-            setActiveModule(response.data.module);
+            let content = '';
+            await streamEvents('modules/search/stream/', { topic: topic.trim() }, ({ event, data }) => {
+                if (event === 'chunk') {
+                    content += data.text;
+                    setLoading(false);
+                    setActiveModule((prev) => ({ ...(prev || { topic: topic.trim() }), content }));
+                } else if (event === 'done') {
+                    setActiveModule({ ...data.module, content });
+                }
+            });
             fetchHistory(); // Refresh history
         } catch (err) {
             console.error('Search failed:', err);
@@ -51,10 +59,18 @@ const LearningPath = () => {
         }
     };
 
-    const selectModule = (module) => {
+    const selectModule = async (module) => {
         setActiveModule(module);
         setTopic(module.topic);
         if (window.innerWidth < 768) setShowHistory(false);
+
+        // History entries omit content; load the full module on demand
+        try {
+            const response = await api.get(`modules/${module.id}/`);
+            setActiveModule(response.data);
+        } catch (err) {
+            console.error('Failed to load module:', err);
+        }
     };
 
     return (